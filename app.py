@@ -4,12 +4,34 @@ Main Flask application
 """
 import os
 import json
-from flask import Flask, render_template, jsonify, request
+import click
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 from flask_cors import CORS
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 from config import Config
-from models import db, Recipe, Ingredient, RecipeIngredient, ProductionRun, ProductionItem, ProductionIngredient, ScheduleTemplate, MixerCapacity, Customer, Order, WeeklyOrderTemplate, MixingLog, MixingLogEntry, DDTTarget, ProductionIssue, InventoryTransaction
+from models import db, Recipe, Ingredient, RecipeIngredient, ProductionRun, ProductionItem, ProductionIngredient, ScheduleTemplate, MixerCapacity, Customer, Order, WeeklyOrderTemplate, MixingLog, MixingLogEntry, DDTTarget, ProductionIssue, InventoryTransaction, MEPSheet, MEPPrint
 from datetime import datetime, date, timedelta
 from mep_calculator import MEPCalculator
+from mep_core import MEPSheetCalculator
+from batch_splitter import legacy_capacities
+from mep_cache import mep_cache_key
+from mep_delta import diff_sheets
+from dependency_resolver import get_dependency_graph
+from production_scheduler import ProductionScheduler, MAX_MIXERS, MAX_OVENS
+from recipe_store import get_recipe_graph, invalidate_recipe_graph
+from scaling import get_scaling_engine
+from mep_materializer import load_production_items, compute_mep_sheets, compute_mep_sheets_for_dates, store_mep_sheets, store_many_mep_sheets, mark_mep_sheets_stale, refresh_mep_sheets, is_fresh
+from request_metrics import request_metrics, init_request_metrics
+from order_upsert import upsert_orders
+from upsert import check_upsert_support
+from standing_orders import generate_standing_orders, next_monday, MAX_WEEKS
+from daily_demand import rebuild_daily_demand, check_daily_demand
+from consumption import refresh_consumption, rebuild_consumption, consumption_report, PERIODS
+from order_aggregates import order_totals, demand_totals, production_calendar, production_calendar_columnar, production_cube
+from production_sync import sync_production_runs_for_dates, lock_production_runs, clear_production_items, write_ingredient_amounts, queue_production_sync, schedule_production_sync, resume_production_sync
+from schema import upgrade_schema
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -17,6 +39,8 @@ app.config.from_object(Config)
 # Initialize extensions
 CORS(app)
 db.init_app(app)
+init_request_metrics(app, db)
+check_upsert_support(app)
 
 
 # Auto-import recipes on startup if they don't exist
@@ -98,15 +122,22 @@ def auto_import_recipes():
 
                     print(f"Imported starter recipe: {recipe_name}")
 
+                invalidate_recipe_graph()
                 db.session.commit()
                 print("Auto-import completed successfully!")
         except Exception as e:
             print(f"Auto-import failed: {e}")
             db.session.rollback()
 
+# Add columns introduced since the database was created (before anything queries recipes)
+upgrade_schema(app)
+
 # Run auto-import on startup
 auto_import_recipes()
 
+# Finish production syncs queued before the last shutdown
+resume_production_sync(app)
+
 
 # =============================================================================
 # Database Initialization
@@ -177,14 +208,69 @@ def seed_db():
     db.session.commit()
     print("Created sample Italian bread recipe")
 
-    # Create mixer capacity limit
-    capacity = MixerCapacity(recipe_id=italian.id, max_batch_weight=5000)
-    db.session.add(capacity)
-    db.session.commit()
+    # Mixer capacity limits, the same the capacity migration seeds
+    for recipe, max_batch_weight in legacy_capacities([italian]):
+        db.session.add(MixerCapacity(recipe_id=recipe.id, max_batch_weight=max_batch_weight))
+    recipes_changed()
 
     print("Database seeded successfully!")
 
 
+@app.cli.command('export-recipe-graph')
+@click.argument('path')
+def export_recipe_graph(path):
+    """Write the recipe graph to a JSON file (for running mep_core without a database)"""
+    graph = get_recipe_graph()
+    with open(path, 'w') as f:
+        json.dump(graph.to_dict(), f)
+
+    print(f"Exported {len(graph.recipes)} recipes to {path}")
+
+
+@app.cli.command('rebuild-daily-demand')
+def rebuild_daily_demand_command():
+    """Recompute the daily_demand table from the orders"""
+    rows = rebuild_daily_demand()
+    db.session.commit()
+    print(f"Rebuilt daily_demand: {rows} date/recipe totals")
+
+
+@app.cli.command('check-daily-demand')
+def check_daily_demand_command():
+    """Compare daily_demand with the orders; exits with 1 if they disagree"""
+    mismatches = check_daily_demand()
+    for mismatch in mismatches:
+        print(f"{mismatch['date']} recipe {mismatch['recipe_id']}: "
+              f"expected {mismatch['expected']}, found {mismatch['actual']}")
+    if mismatches:
+        print(f"{len(mismatches)} mismatches; run 'flask rebuild-daily-demand' to fix them")
+        raise SystemExit(1)
+    print("daily_demand matches the orders")
+
+
+@app.cli.command('rebuild-consumption')
+def rebuild_consumption_command():
+    """Recompute the daily and weekly ingredient consumption rollups from production runs"""
+    rows = rebuild_consumption()
+    db.session.commit()
+    print(f"Rebuilt ingredient consumption: {rows} daily rows")
+
+
+@app.cli.command('generate-standing-orders')
+@click.option('--start-date', help='first delivery date (YYYY-MM-DD), default next Monday')
+@click.option('--weeks', type=click.IntRange(1, MAX_WEEKS), default=4, show_default=True)
+@click.option('--overwrite', is_flag=True, help='replace quantities of orders that already exist')
+def generate_standing_orders_command(start_date, weeks, overwrite):
+    """Expand the active weekly order templates into orders and sync their production runs"""
+    start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else next_monday()
+    result = generate_standing_orders(start_date, weeks, overwrite=overwrite)
+    db.session.commit()
+    sync_production_runs_for_dates(result['dates'])
+
+    print(f"Standing orders from {start_date} for {weeks} weeks: {result['created']} created, "
+          f"{result['updated']} updated, {result['skipped']} kept as they were")
+
+
 @app.cli.command('import-recipes')
 def import_recipes():
     """Import recipes from Excel file"""
@@ -366,6 +452,8 @@ def import_recipes():
     for sheet_name in soaker_sheets:
         import_sheet(sheet_name, 'soaker')
 
+    recipes_changed()
+
     print(f"\n✅ Import complete!")
     print(f"   Recipes imported: {recipes_imported}")
     print(f"   New ingredients created: {ingredients_created}")
@@ -375,68 +463,14 @@ def import_recipes():
 # Helper Functions
 # =============================================================================
 
-def sync_production_runs_for_dates(dates):
+def recipes_changed():
     """
-    Automatically sync production runs from orders for the given dates.
-    This eliminates the need to manually click "Create Production Runs".
-
-    Args:
-        dates: Single date object or list of date objects
+    Drop everything computed from the previous recipe definitions.
+    Commits, so call it instead of committing the recipe write itself: the graph version
+    bump then lands in the same transaction as the write.
     """
-    if not isinstance(dates, list):
-        dates = [dates]
-
-    for target_date in dates:
-        # Get all orders for this date
-        orders = Order.query.filter_by(order_date=target_date).all()
-
-        # Aggregate orders by recipe
-        recipe_quantities = {}
-        for order in orders:
-            if order.recipe_id not in recipe_quantities:
-                recipe_quantities[order.recipe_id] = 0
-            recipe_quantities[order.recipe_id] += order.quantity
-
-        # Check if production run exists
-        existing_run = ProductionRun.query.filter_by(date=target_date).first()
-
-        if not recipe_quantities:
-            # No orders for this date - delete production run if it exists
-            if existing_run:
-                # Delete all production items first (cascade should handle this, but being explicit)
-                for item in existing_run.items:
-                    db.session.delete(item)
-                db.session.delete(existing_run)
-        else:
-            # Orders exist - create or update production run
-            if existing_run:
-                # Delete existing items and recreate
-                for item in existing_run.items:
-                    db.session.delete(item)
-                production_run = existing_run
-            else:
-                # Create new production run
-                production_run = ProductionRun(
-                    date=target_date,
-                    batch_id=target_date.strftime('%m%d%y'),  # Auto-generate batch ID (MMDDYY)
-                    created_by='auto_sync',
-                    notes='Auto-synced from customer orders'
-                )
-                db.session.add(production_run)
-                db.session.flush()  # Get the production_run.id
-
-            # Add production items
-            for recipe_id, quantity in recipe_quantities.items():
-                recipe = Recipe.query.get(recipe_id)
-                if recipe:
-                    production_item = ProductionItem(
-                        production_run_id=production_run.id,
-                        recipe_id=recipe_id,
-                        quantity=quantity,
-                        batch_weight=quantity * recipe.loaf_weight
-                    )
-                    db.session.add(production_item)
-
+    invalidate_recipe_graph()
+    mark_mep_sheets_stale()
     db.session.commit()
 
 
@@ -546,49 +580,33 @@ def get_recipe(recipe_id):
         'base_batch_weight': recipe.base_batch_weight,
         'loaf_weight': recipe.loaf_weight,
         'selling_price': recipe.selling_price,
+        'mix_minutes': recipe.mix_minutes,
+        'bulk_minutes': recipe.bulk_minutes,
+        'bake_minutes': recipe.bake_minutes,
         'cost_per_loaf': round(recipe_cost_per_loaf, 2),
         'ingredients': ingredients,
         'notes': recipe.notes
     })
 
 
-@app.route('/api/production/calculate', methods=['POST'])
-def calculate_production():
-    """
-    Calculate ingredient amounts for production
-    Expected input: { "items": [{"recipe_id": 1, "quantity": 10}, ...] }
-    """
-    data = request.json
-    items = data.get('items', [])
-
+def scale_production_items(graph, engine, items):
+    """Per-item ingredient amounts for [{'recipe_id', 'quantity'}]; unknown recipes are skipped"""
     results = []
 
     for item in items:
         recipe_id = item['recipe_id']
         quantity = item['quantity']
 
-        recipe = Recipe.query.get(recipe_id)
+        recipe = graph.get(recipe_id)
         if not recipe:
             continue
 
         # Calculate batch weight needed
-        total_weight = quantity * recipe.loaf_weight
-
-        # Calculate total percentage for baker's percentage calculation
-        total_percentage = sum(ri.percentage for ri in recipe.ingredients if ri.is_percentage)
-        flour_weight = total_weight / (total_percentage / 100.0) if total_percentage > 0 else 0
+        total_weight = quantity * (recipe.loaf_weight or 0)
 
-        # Calculate ingredients
+        # Calculate ingredients (baker's percentages, precomputed per recipe)
         ingredients = []
-        for ri in recipe.ingredients:
-            if ri.is_percentage:
-                # Baker's percentage calculation
-                # flour_weight is the base (flour = 100%), other ingredients are relative to it
-                amount = (ri.percentage / 100.0) * flour_weight
-            else:
-                # Fixed amount
-                amount = ri.amount_grams * (total_weight / recipe.base_batch_weight)
-
+        for ri, amount in engine.scale(recipe, total_weight):
             ingredients.append({
                 'name': ri.ingredient.name,
                 'amount_grams': round(amount, 1),
@@ -602,49 +620,203 @@ def calculate_production():
             'ingredients': ingredients
         })
 
-    return jsonify(results)
+    return results
+
+
+def ingredient_totals_list(engine, totals):
+    """{ingredient_id: grams} -> [{'name', 'category', 'amount_grams'}] by name"""
+    ingredients = [(engine.ingredients[engine.ingredient_index[ingredient_id]], grams)
+                   for ingredient_id, grams in totals.items()]
+    return sorted([{
+        'name': ingredient.name,
+        'category': ingredient.category,
+        'amount_grams': round(grams, 1)
+    } for ingredient, grams in ingredients], key=lambda i: i['name'])
+
+
+@app.route('/api/production/calculate', methods=['POST'])
+def calculate_production():
+    """
+    Calculate ingredient amounts for production
+    Expected input: { "items": [{"recipe_id": 1, "quantity": 10}, ...] }
+    or named what-if scenarios, computed together:
+    { "scenarios": [{"name": "Wedding quote", "items": [{"recipe_id": 1, "quantity": 10}, ...]}, ...] }
+    -> { "scenarios": [{"name", "items", "total_weight", "ingredient_totals"}], "combined": {"total_weight", "ingredient_totals"} }
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict) or ('items' not in data and 'scenarios' not in data):
+        return jsonify({'error': 'Expected a JSON body with items or scenarios'}), 400
+
+    # Every recipe and its ingredients come from the cached recipe graph (one joined query when it is
+    # loaded), not from a query per item
+    graph = get_recipe_graph()
+    engine = get_scaling_engine(graph)
+
+    if 'scenarios' not in data:
+        return jsonify(scale_production_items(graph, engine, data.get('items', [])))
+
+    try:
+        scenarios = [{
+            'name': str(scenario.get('name') or f'Scenario {i + 1}'),
+            'items': [{
+                'recipe_id': int(item['recipe_id']),
+                'quantity': float(item['quantity'])
+            } for item in scenario.get('items', [])]
+        } for i, scenario in enumerate(data['scenarios'])]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Each scenario needs a name and items with recipe_id and quantity'}), 400
+
+    # Ingredient totals for all scenarios in one scenarios x recipes x ingredients product
+    totals = engine.rollup({
+        i: [(item['recipe_id'], item['quantity']) for item in scenario['items']]
+        for i, scenario in enumerate(scenarios)
+    })
+
+    results = []
+    combined = {}
+    for i, scenario in enumerate(scenarios):
+        items = scale_production_items(graph, engine, scenario['items'])
+        for ingredient_id, grams in totals.get(i, {}).items():
+            combined[ingredient_id] = combined.get(ingredient_id, 0) + grams
+        results.append({
+            'name': scenario['name'],
+            'items': items,
+            'skipped_recipe_ids': [item['recipe_id'] for item in scenario['items'] if not graph.get(item['recipe_id'])],
+            'total_weight': sum(item['total_weight'] for item in items),
+            'ingredient_totals': ingredient_totals_list(engine, totals.get(i, {}))
+        })
+
+    return jsonify({
+        'scenarios': results,
+        'combined': {
+            'total_weight': sum(result['total_weight'] for result in results),
+            'ingredient_totals': ingredient_totals_list(engine, combined)
+        }
+    })
+
+
+# Most production runs one page of /api/production/history returns
+MAX_HISTORY_PAGE = 1000
+
+
+def keyset_page_args(max_limit):
+    """
+    limit and after ("YYYY-MM-DD,id", the next_after of the previous page) from the query string
+    Returns (limit or None, (date, id) or None); raises ValueError with a message for the client.
+    """
+    try:
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        after = None
+        if request.args.get('after'):
+            after_date, after_id = request.args['after'].split(',')
+            after = (datetime.strptime(after_date, '%Y-%m-%d').date(), int(after_id))
+    except ValueError:
+        raise ValueError('limit must be a number and after "YYYY-MM-DD,id"')
+    if limit is not None and not 1 <= limit <= max_limit:
+        raise ValueError(f'limit must be between 1 and {max_limit}')
+    return limit, after
 
 
 @app.route('/api/production/history', methods=['GET'])
 def get_production_history():
-    """Get production history with optional date filtering"""
+    """
+    Get production history with optional date and recipe filtering, newest first
+    Paginated with limit and after (the next_after of the previous page, "YYYY-MM-DD,id");
+    without limit every matching run is returned as one array.
+    summary=1 returns per-run item counts, loaves and weight instead of the items.
+    """
     # Query parameters
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     recipe_name = request.args.get('recipe_name')
+    summary = request.args.get('summary') == '1'
 
-    query = ProductionRun.query
+    try:
+        limit, after = keyset_page_args(MAX_HISTORY_PAGE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = db.session.query(ProductionRun.id, ProductionRun.date, ProductionRun.batch_id, ProductionRun.created_by)
 
     if start_date:
         query = query.filter(ProductionRun.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
     if end_date:
         query = query.filter(ProductionRun.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-
-    production_runs = query.order_by(ProductionRun.date.desc()).all()
-
-    results = []
-    for run in production_runs:
-        items = []
-        for item in run.items:
-            if recipe_name and item.recipe.name != recipe_name:
-                continue
-
-            items.append({
-                'recipe_name': item.recipe.name,
-                'quantity': item.quantity,
-                'batch_weight': item.batch_weight
-            })
-
-        if items or not recipe_name:  # Include run if it has matching items or no filter
+    if recipe_name:
+        # Only runs that made this recipe
+        query = query.filter(ProductionRun.id.in_(
+            db.session.query(ProductionItem.production_run_id).join(
+                Recipe, Recipe.id == ProductionItem.recipe_id
+            ).filter(Recipe.name == recipe_name)
+        ))
+    if after:
+        after_date, after_id = after
+        query = query.filter(or_(
+            ProductionRun.date < after_date,
+            and_(ProductionRun.date == after_date, ProductionRun.id < after_id)
+        ))
+
+    query = query.order_by(ProductionRun.date.desc(), ProductionRun.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    runs = query.all()
+
+    # Items (with recipe names) or their totals for every run on the page, from one joined query
+    run_ids = [run.id for run in runs]
+    items = db.session.query(ProductionItem.production_run_id).join(
+        Recipe, Recipe.id == ProductionItem.recipe_id
+    ).filter(ProductionItem.production_run_id.in_(run_ids))
+    if recipe_name:
+        items = items.filter(Recipe.name == recipe_name)
+
+    if summary:
+        totals = {
+            run_id: (item_count, total_quantity, total_weight)
+            for run_id, item_count, total_quantity, total_weight in items.add_columns(
+                db.func.count(ProductionItem.id),
+                db.func.sum(ProductionItem.quantity),
+                db.func.sum(ProductionItem.batch_weight)
+            ).group_by(ProductionItem.production_run_id).all()
+        } if run_ids else {}
+        results = []
+        for run in runs:
+            item_count, total_quantity, total_weight = totals.get(run.id, (0, 0, 0))
             results.append({
                 'id': run.id,
                 'date': run.date.isoformat(),
                 'batch_id': run.batch_id,
                 'created_by': run.created_by,
-                'items': items
+                'item_count': item_count,
+                'total_quantity': total_quantity or 0,
+                'total_weight': total_weight or 0
             })
-
-    return jsonify(results)
+    else:
+        run_items = {}
+        if run_ids:
+            for run_id, name, quantity, batch_weight in items.add_columns(
+                Recipe.name, ProductionItem.quantity, ProductionItem.batch_weight
+            ).order_by(ProductionItem.id).all():
+                run_items.setdefault(run_id, []).append({
+                    'recipe_name': name,
+                    'quantity': quantity,
+                    'batch_weight': batch_weight
+                })
+        results = [{
+            'id': run.id,
+            'date': run.date.isoformat(),
+            'batch_id': run.batch_id,
+            'created_by': run.created_by,
+            'items': run_items.get(run.id, [])
+        } for run in runs]
+
+    if limit is None:
+        return jsonify(results)
+
+    last = runs[-1] if len(runs) == limit else None
+    return jsonify({
+        'runs': results,
+        'next_after': f'{last.date.isoformat()},{last.id}' if last else None
+    })
 
 
 @app.route('/api/production/batch/<batch_id>', methods=['GET'])
@@ -677,37 +849,45 @@ def get_production_by_batch(batch_id):
 
 @app.route('/api/production/save', methods=['POST'])
 def save_production():
-    """Save a production run"""
+    """Save the production run for a date (replaces the items of an existing run)"""
     data = request.json
 
     run_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-    production_run = ProductionRun(
-        date=run_date,
-        batch_id=run_date.strftime('%m%d%y'),  # Auto-generate batch ID (MMDDYY)
-        created_by=data.get('created_by', 'admin'),
-        notes=data.get('notes', '')
+    created_by = data.get('created_by', 'admin')
+    notes = data.get('notes', '')
+    run_id = lock_production_runs([run_date], [run_date], created_by=created_by, notes=notes)[run_date]
+    clear_production_items([run_id])
+    ProductionRun.query.filter_by(id=run_id).update(
+        {'created_by': created_by, 'notes': notes}, synchronize_session=False
     )
-    db.session.add(production_run)
-    db.session.flush()  # Get the ID
 
+    production_items = []
     for item_data in data['items']:
         recipe = Recipe.query.get(item_data['recipe_id'])
 
         production_item = ProductionItem(
-            production_run_id=production_run.id,
+            production_run_id=run_id,
             recipe_id=item_data['recipe_id'],
             customer_id=item_data.get('customer_id'),
             quantity=item_data['quantity'],
             batch_weight=item_data['quantity'] * recipe.loaf_weight
         )
-        db.session.add(production_item)
+        production_items.append(production_item)
+    db.session.add_all(production_items)
+    db.session.flush()  # Get the item IDs
+
+    # Ingredient amounts as the recipes are today, kept for later reports
+    write_ingredient_amounts([(item.id, item.recipe_id, item.batch_weight) for item in production_items])
+    refresh_consumption([run_date])
 
+    mark_mep_sheets_stale(run_date)
     db.session.commit()
+    refresh_mep_sheets(app, [run_date])
 
     return jsonify({
         'success': True,
-        'production_run_id': production_run.id,
-        'batch_id': production_run.batch_id
+        'production_run_id': run_id,
+        'batch_id': run_date.strftime('%m%d%y')
     })
 
 
@@ -725,6 +905,9 @@ def get_mep_sheet(date_str):
     if not production_run:
         return jsonify({'error': 'No production run found for this date'}), 404
 
+    graph = get_recipe_graph()
+    engine = get_scaling_engine(graph)
+
     # Generate MEP sheet data
     mep_data = {
         'date': target_date.isoformat(),
@@ -733,7 +916,7 @@ def get_mep_sheet(date_str):
     }
 
     for item in production_run.items:
-        recipe = item.recipe
+        recipe = graph.get(item.recipe_id)
         bread_data = {
             'name': recipe.name,
             'quantity': item.quantity,
@@ -742,30 +925,21 @@ def get_mep_sheet(date_str):
             'ingredients': []
         }
 
-        # Calculate ingredients for this bread
-        for ri in recipe.ingredients:
-            if ri.is_percentage:
-                amount = (ri.percentage / 100.0) * item.batch_weight
-            else:
-                amount = ri.amount_grams * (item.batch_weight / recipe.base_batch_weight)
-
+        # Calculate ingredients for this bread (no batch weight when the recipe has no loaf weight)
+        for ri, amount in engine.scale(recipe, item.batch_weight or 0):
             bread_data['ingredients'].append({
                 'name': ri.ingredient.name,
                 'amount': round(amount, 1),
                 'category': ri.ingredient.category
             })
 
-            # Add to total ingredients
-            ingredient_name = ri.ingredient.name
-            if ingredient_name not in mep_data['total_ingredients']:
-                mep_data['total_ingredients'][ingredient_name] = 0
-            mep_data['total_ingredients'][ingredient_name] += amount
-
         mep_data['breads'].append(bread_data)
 
-    # Round total ingredients
-    for ingredient in mep_data['total_ingredients']:
-        mep_data['total_ingredients'][ingredient] = round(mep_data['total_ingredients'][ingredient], 1)
+    # Total ingredients for the day in one matrix-vector product over batch weights
+    totals = engine.totals_for_weights((item.recipe_id, item.batch_weight or 0) for item in production_run.items)
+    for ingredient in engine.ingredients:
+        if ingredient.id in totals:
+            mep_data['total_ingredients'][ingredient.name] = round(totals[ingredient.id], 1)
 
     return jsonify(mep_data)
 
@@ -819,7 +993,7 @@ def update_ingredient(ingredient_id):
     ingredient.category = data.get('category', ingredient.category)
     ingredient.cost_per_unit = data.get('cost_per_unit')
 
-    db.session.commit()
+    recipes_changed()
 
     return jsonify({
         'success': True,
@@ -865,7 +1039,10 @@ def create_recipe():
         base_batch_weight=data.get('base_batch_weight'),
         loaf_weight=data.get('loaf_weight'),
         notes=data.get('notes', ''),
-        selling_price=data.get('selling_price')
+        selling_price=data.get('selling_price'),
+        mix_minutes=data.get('mix_minutes'),
+        bulk_minutes=data.get('bulk_minutes'),
+        bake_minutes=data.get('bake_minutes')
     )
     db.session.add(recipe)
     db.session.flush()  # Get recipe.id before adding ingredients
@@ -882,7 +1059,7 @@ def create_recipe():
             )
             db.session.add(recipe_ingredient)
 
-    db.session.commit()
+    recipes_changed()
 
     return jsonify({
         'success': True,
@@ -902,6 +1079,9 @@ def update_recipe(recipe_id):
     recipe.loaf_weight = data.get('loaf_weight', recipe.loaf_weight)
     recipe.notes = data.get('notes', recipe.notes)
     recipe.selling_price = data.get('selling_price', recipe.selling_price)
+    recipe.mix_minutes = data.get('mix_minutes', recipe.mix_minutes)
+    recipe.bulk_minutes = data.get('bulk_minutes', recipe.bulk_minutes)
+    recipe.bake_minutes = data.get('bake_minutes', recipe.bake_minutes)
 
     # Update ingredients if provided
     if 'ingredients' in data:
@@ -919,7 +1099,7 @@ def update_recipe(recipe_id):
             )
             db.session.add(recipe_ingredient)
 
-    db.session.commit()
+    recipes_changed()
 
     return jsonify({'success': True})
 
@@ -929,7 +1109,7 @@ def delete_recipe(recipe_id):
     """Delete a recipe"""
     recipe = Recipe.query.get_or_404(recipe_id)
     recipe.is_active = False
-    db.session.commit()
+    recipes_changed()
 
     return jsonify({'success': True})
 
@@ -949,7 +1129,7 @@ def add_recipe_ingredient(recipe_id):
         order=data.get('order', 0)
     )
     db.session.add(recipe_ingredient)
-    db.session.commit()
+    recipes_changed()
 
     return jsonify({'success': True})
 
@@ -978,6 +1158,22 @@ def calculate_mep_sheets():
     return jsonify(sheets)
 
 
+MEP_RANGE_MAX_DAYS = 31
+
+
+def mep_sheet_timeline(sheets, delivery_date, batch_id):
+    """
+    Add the timeline metadata to a set of MEP sheets (copy, so cached sheets stay untouched)
+    System calculates backwards: delivery date -> mix date (-1 day) -> prep date (-2 days)
+    """
+    sheets = dict(sheets)
+    sheets['delivery_date'] = delivery_date.isoformat()
+    sheets['mix_date'] = (delivery_date - timedelta(days=1)).isoformat()
+    sheets['prep_date'] = (delivery_date - timedelta(days=2)).isoformat()
+    sheets['batch_id'] = batch_id  # Add batch ID for labeling
+    return sheets
+
+
 @app.route('/api/mep/<date_str>/all', methods=['GET'])
 def get_all_mep_sheets(date_str):
     """
@@ -993,35 +1189,249 @@ def get_all_mep_sheets(date_str):
     # Calculate backwards:
     # - Mix date: delivery - 1 day (when doughs are mixed)
     # - Prep date: delivery - 2 days (when starters/soakers are built)
+
+    # Materialized sheets are shared by every worker; recompute only if orders or recipes changed since
+    graph = get_recipe_graph()
+    row = MEPSheet.query.filter_by(delivery_date=delivery_date).first()
+    if is_fresh(row, graph):
+        sheets = json.loads(row.sheets)
+        batch_id = row.batch_id
+    else:
+        # Find production runs for the delivery date and the next day (for the Emmy Feed)
+        runs = load_production_items([delivery_date, delivery_date + timedelta(days=1)])
+        computed = compute_mep_sheets(delivery_date, runs, graph)
+
+        if not computed:
+            # The run was deleted; drop its leftover sheets so they are not recomputed every time
+            if row:
+                store_mep_sheets(delivery_date, None, row)
+                db.session.commit()
+            return jsonify({'error': 'No production run found for this delivery date'}), 404
+
+        store_mep_sheets(delivery_date, computed, row)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Background refresh stored the same date concurrently
+            db.session.rollback()
+
+        sheets = computed['sheets']
+        batch_id = computed['batch_id']
+
+    return jsonify(mep_sheet_timeline(sheets, delivery_date, batch_id))
+
+
+@app.route('/api/mep/range', methods=['GET'])
+def get_mep_sheet_range():
+    """
+    Get all MEP sheets for every delivery date in a range (e.g. to print the week)
+    Query params: start, end (YYYY-MM-DD, inclusive)
+    Production runs for the range plus the trailing day are loaded in one query
+    """
+    try:
+        start_date = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    if end_date < start_date:
+        return jsonify({'error': 'end must not be before start'}), 400
+    if (end_date - start_date).days >= MEP_RANGE_MAX_DAYS:
+        return jsonify({'error': f'Range is limited to {MEP_RANGE_MAX_DAYS} days'}), 400
+
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+    # Materialized rows that are still fresh are used as-is
+    graph = get_recipe_graph()
+    rows = {row.delivery_date: row for row in MEPSheet.query.filter(
+        MEPSheet.delivery_date >= start_date,
+        MEPSheet.delivery_date <= end_date
+    ).all()}
+    days = {}
+    missing = []
+    for delivery_date in dates:
+        row = rows.get(delivery_date)
+        if is_fresh(row, graph):
+            days[delivery_date] = mep_sheet_timeline(json.loads(row.sheets), delivery_date, row.batch_id)
+        else:
+            missing.append(delivery_date)
+
+    if missing:
+        # Every run in the window plus one trailing day (for the last day's Emmy Feed)
+        runs = load_production_items(dates + [end_date + timedelta(days=1)])
+        computed = compute_mep_sheets_for_dates(missing, runs, graph)
+        for delivery_date in missing:
+            if computed[delivery_date] is None:
+                continue
+            days[delivery_date] = mep_sheet_timeline(computed[delivery_date]['sheets'], delivery_date,
+                                                     computed[delivery_date]['batch_id'])
+        try:
+            # Also removes the leftover row of a date whose run was deleted
+            store_many_mep_sheets([(d, computed[d], rows.get(d)) for d in missing])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+    return jsonify({
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'days': [days[d] for d in dates if d in days]
+    })
+
+
+@app.route('/api/mep/<date_str>/schedule', methods=['GET'])
+def get_mix_schedule(date_str):
+    """
+    Mixing/baking schedule for the mix batches of a delivery date
+    Query params: mixers (1..MAX_MIXERS), ovens (1..MAX_OVENS) (default 1 each),
+    start (HH:MM on the mix date, default 04:00)
+    """
+    try:
+        delivery_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        start_time = datetime.strptime(request.args.get('start', '04:00'), '%H:%M').time()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD and HH:MM'}), 400
+
+    try:
+        mixers = int(request.args.get('mixers', 1))
+        ovens = int(request.args.get('ovens', 1))
+    except ValueError:
+        return jsonify({'error': 'mixers and ovens must be whole numbers'}), 400
+    if not 1 <= mixers <= MAX_MIXERS or not 1 <= ovens <= MAX_OVENS:
+        return jsonify({'error': f'mixers must be 1-{MAX_MIXERS} and ovens 1-{MAX_OVENS}'}), 400
+
+    runs = load_production_items([delivery_date])
+    if delivery_date not in runs:
+        return jsonify({'error': 'No production run found for this delivery date'}), 404
+
+    calculator = MEPCalculator(runs[delivery_date][1], delivery_date=delivery_date)
+    scheduler = ProductionScheduler(mixers=mixers, ovens=ovens)
+    jobs = scheduler.build_jobs(calculator.plan_bread_batches())
+    plan = scheduler.schedule(jobs)
+
     mix_date = delivery_date - timedelta(days=1)
-    prep_date = delivery_date - timedelta(days=2)
+    result = scheduler.gantt(jobs, plan, datetime.combine(mix_date, start_time))
+    result['delivery_date'] = delivery_date.isoformat()
+    result['mix_date'] = mix_date.isoformat()
+    result['batch_id'] = runs[delivery_date][0]
 
-    # Find production run for the delivery date
-    production_run = ProductionRun.query.filter_by(date=delivery_date).first()
+    return jsonify(result)
 
-    if not production_run:
+
+def production_totals(items):
+    """{recipe_id: quantity} for production items"""
+    totals = {}
+    for item in items:
+        totals[item['recipe_id']] = totals.get(item['recipe_id'], 0) + item['quantity']
+    return totals
+
+
+@app.route('/api/mep/<date_str>/print', methods=['POST'])
+def record_mep_print(date_str):
+    """
+    Record the MEP sheets for a delivery date as printed, so later changes can be shown against them
+    Body (optional): {"printed_by": "name"}
+    """
+    try:
+        delivery_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    graph = get_recipe_graph()
+    next_date = delivery_date + timedelta(days=1)
+    runs = load_production_items([delivery_date, next_date])
+    computed = compute_mep_sheets(delivery_date, runs, graph)
+    if not computed:
         return jsonify({'error': 'No production run found for this delivery date'}), 404
 
-    # Build items list
-    items = []
-    for item in production_run.items:
-        items.append({
-            'recipe_id': item.recipe_id,
-            'quantity': item.quantity
-        })
+    data = request.get_json(silent=True) or {}
+    printed = MEPPrint(
+        delivery_date=delivery_date,
+        input_hash=computed['input_hash'],
+        recipe_fingerprint=graph.fingerprint,
+        items=json.dumps(runs[delivery_date][1]),
+        next_day_items=json.dumps(runs[next_date][1] if next_date in runs else []),
+        sheets=json.dumps(computed['sheets']),
+        printed_by=data.get('printed_by')
+    )
+    db.session.add(printed)
+    db.session.commit()
 
-    # Calculate all sheets (pass delivery_date for Emmy Feed calculation)
-    calculator = MEPCalculator(items, delivery_date=delivery_date)
-    sheets = calculator.calculate_all_sheets()
+    return jsonify({
+        'id': printed.id,
+        'delivery_date': delivery_date.isoformat(),
+        'batch_id': computed['batch_id'],
+        'printed_at': printed.printed_at.isoformat(),
+        'printed_by': printed.printed_by
+    }), 201
 
-    # Add metadata with proper timeline
-    # All calculated from the delivery date
-    sheets['delivery_date'] = delivery_date.isoformat()
-    sheets['mix_date'] = mix_date.isoformat()
-    sheets['prep_date'] = prep_date.isoformat()
-    sheets['batch_id'] = production_run.batch_id  # Add batch ID for labeling
 
-    return jsonify(sheets)
+@app.route('/api/mep/<date_str>/changes', methods=['GET'])
+def get_mep_changes(date_str):
+    """
+    What changed on the MEP sheets since they were last printed for a delivery date
+    Only the recipes affected by changed quantities (and what they are built from) are recomputed;
+    a recipe edit since the print recomputes and compares everything.
+    """
+    try:
+        delivery_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    printed = MEPPrint.query.filter_by(delivery_date=delivery_date).order_by(
+        MEPPrint.printed_at.desc(), MEPPrint.id.desc()
+    ).first()
+    if not printed:
+        return jsonify({'error': 'MEP sheets for this delivery date have not been printed'}), 404
+
+    graph = get_recipe_graph()
+    next_date = delivery_date + timedelta(days=1)
+    runs = load_production_items([delivery_date, next_date])
+    batch_id, items = runs.get(delivery_date, (None, []))
+    next_day_items = runs[next_date][1] if next_date in runs else []
+
+    result = {
+        'delivery_date': delivery_date.isoformat(),
+        'batch_id': batch_id,
+        'printed_at': printed.printed_at.isoformat(),
+        'printed_by': printed.printed_by,
+        'changed': False,
+        'changed_recipes': [],
+        'recomputed_recipes': []
+    }
+    if delivery_date in runs and mep_cache_key(items, next_day_items, graph.fingerprint) == printed.input_hash:
+        return jsonify(result)
+
+    printed_sheets = json.loads(printed.sheets)
+    recipes_edited = printed.recipe_fingerprint != graph.fingerprint
+    include_emmy_feed = recipes_edited or production_totals(json.loads(printed.next_day_items)) != production_totals(next_day_items)
+
+    old_totals = production_totals(json.loads(printed.items))
+    new_totals = production_totals(items)
+    changed_ids = {
+        recipe_id for recipe_id in set(old_totals) | set(new_totals)
+        if old_totals.get(recipe_id, 0) != new_totals.get(recipe_id, 0)
+    }
+
+    calculator = MEPSheetCalculator(graph, items, delivery_date=delivery_date, next_day_items=next_day_items)
+    if recipes_edited:
+        recomputed_ids = {recipe.id for recipe in graph.recipes}
+        current = calculator.calculate_all_sheets()
+        delta = diff_sheets(printed_sheets, current)
+    else:
+        dependencies = get_dependency_graph(graph)
+        recomputed_ids = dependencies.affected(changed_ids)
+        current = calculator.calculate_subtree(recomputed_ids, include_emmy_feed)
+        delta = diff_sheets(printed_sheets, current, dependencies.sheet_names(recomputed_ids), include_emmy_feed)
+
+    def names(recipe_ids):
+        return sorted(graph.get(recipe_id).name for recipe_id in recipe_ids if graph.get(recipe_id))
+
+    result.update(delta)
+    result['changed_recipes'] = names(changed_ids)
+    result['recomputed_recipes'] = names(recomputed_ids)
+    result['recipes_edited'] = recipes_edited
+    return jsonify(result)
 
 
 @app.route('/api/customers', methods=['GET'])
@@ -1103,50 +1513,59 @@ def get_customer_typical_breads(customer_id):
     return jsonify({'breads': breads})
 
 
+def unknown_order_refs(orders):
+    """Error message naming customer and recipe ids of these orders that do not exist, or None"""
+    customer_ids = {order['customer_id'] for order in orders}
+    recipe_ids = {order['recipe_id'] for order in orders}
+    missing_customers = customer_ids - {row.id for row in db.session.query(Customer.id).filter(Customer.id.in_(customer_ids))}
+    missing_recipes = recipe_ids - {row.id for row in db.session.query(Recipe.id).filter(Recipe.id.in_(recipe_ids))}
+    if not missing_customers and not missing_recipes:
+        return None
+    return 'Unknown ' + ', '.join(
+        f'{kind} {", ".join(str(i) for i in sorted(ids))}'
+        for kind, ids in (('customer', missing_customers), ('recipe', missing_recipes)) if ids
+    )
+
+
 @app.route('/api/orders/bulk', methods=['POST'])
 def create_bulk_orders():
-    """Create multiple orders at once"""
+    """
+    Create or update multiple orders at once
+    Existing orders for the same customer/recipe/date get the new quantity (one upsert statement)
+    """
     data = request.json
     orders_data = data.get('orders', [])
 
     if not orders_data:
         return jsonify({'error': 'No orders provided'}), 400
 
-    created_count = 0
-    updated_count = 0
-    affected_dates = set()
-
-    for order_data in orders_data:
-        order_date = datetime.strptime(order_data['order_date'], '%Y-%m-%d').date()
-        affected_dates.add(order_date)
-
-        # Check if order already exists for this customer/recipe/date
-        existing_order = Order.query.filter_by(
-            customer_id=order_data['customer_id'],
-            recipe_id=order_data['recipe_id'],
-            order_date=order_date
-        ).first()
-
-        if existing_order:
-            # Update existing order
-            existing_order.quantity = order_data['quantity']
-            updated_count += 1
-        else:
-            # Create new order
-            order = Order(
-                customer_id=order_data['customer_id'],
-                recipe_id=order_data['recipe_id'],
-                order_date=order_date,
-                quantity=order_data['quantity'],
-                day_of_week=order_date.strftime('%A')
-            )
-            db.session.add(order)
-            created_count += 1
+    try:
+        orders = [{
+            'customer_id': int(order_data['customer_id']),
+            'recipe_id': int(order_data['recipe_id']),
+            'order_date': datetime.strptime(order_data['order_date'], '%Y-%m-%d').date(),
+            'quantity': int(order_data['quantity'])
+        } for order_data in orders_data]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Each order needs customer_id, recipe_id, order_date (YYYY-MM-DD) and quantity'}), 400
+
+    # SQLite does not enforce the foreign keys, so unknown ids are caught here
+    error = unknown_order_refs(orders)
+    if error:
+        return jsonify({'error': error}), 400
+
+    affected_dates = {order['order_date'] for order in orders}
 
-    db.session.commit()
+    try:
+        created_count, updated_count = upsert_orders(orders)
+        queue_production_sync(affected_dates)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Unknown customer or recipe'}), 400
 
-    # Auto-sync production runs for all affected dates
-    sync_production_runs_for_dates(list(affected_dates))
+    # Production runs for the affected dates are re-synced in the background
+    schedule_production_sync(app)
 
     return jsonify({
         'success': True,
@@ -1156,25 +1575,48 @@ def create_bulk_orders():
     })
 
 
-@app.route('/api/orders', methods=['GET'])
-def get_orders():
-    """Get all orders with optional date and customer filtering"""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    customer_id = request.args.get('customer_id')
+@app.route('/api/orders/generate-from-templates', methods=['POST'])
+def generate_orders_from_templates():
+    """
+    Expand the active weekly order templates into orders for the coming weeks
+    Input: { "start_date": "2026-01-05" (default: next Monday), "weeks": 13, "customer_id": 1 (optional),
+             "overwrite": false (replace quantities of orders that already exist) }
+    Output: { "success": true, "created": 820, "updated": 0, "skipped": 14, "dates": 78 }
+    """
+    data = request.json or {}
 
-    query = Order.query
+    try:
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else next_monday()
+        weeks = int(data.get('weeks', 4))
+        customer_id = int(data['customer_id']) if data.get('customer_id') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'start_date must be YYYY-MM-DD, weeks and customer_id numbers'}), 400
+    if not 1 <= weeks <= MAX_WEEKS:
+        return jsonify({'error': f'weeks must be between 1 and {MAX_WEEKS}'}), 400
+
+    # All orders in one transaction; their dates are synced together in one batch afterwards
+    result = generate_standing_orders(start_date, weeks, customer_id, overwrite=bool(data.get('overwrite')))
+    queue_production_sync(result['dates'])
+    db.session.commit()
 
-    if start_date:
-        query = query.filter(Order.order_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Order.order_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    if customer_id:
-        query = query.filter(Order.customer_id == int(customer_id))
+    schedule_production_sync(app)
+
+    return jsonify({
+        'success': True,
+        'created': result['created'],
+        'updated': result['updated'],
+        'skipped': result['skipped'],
+        'dates': len(result['dates'])
+    })
 
-    orders = query.order_by(Order.order_date.asc()).all()
 
-    return jsonify([{
+# Most orders one page of /api/orders returns, and the page size when only after is given
+MAX_ORDERS_PAGE = 5000
+DEFAULT_ORDERS_PAGE = 1000
+
+
+def order_to_dict(o):
+    return {
         'id': o.id,
         'customer_id': o.customer_id,
         'customer_name': o.customer.name,
@@ -1185,32 +1627,112 @@ def get_orders():
         'day_of_week': o.day_of_week,
         'quantity': o.quantity,
         'notes': o.notes
-    } for o in orders])
+    }
+
+
+@app.route('/api/orders', methods=['GET'])
+def get_orders():
+    """
+    Get orders with optional date and customer filtering, ordered by (order_date, id)
+    Without limit or after this is the plain array of every matching order. Either one pages the
+    result as {"orders", "next_after"}: limit (default DEFAULT_ORDERS_PAGE) and after (the next_after
+    of the previous page, "YYYY-MM-DD,id").
+    With Accept: application/x-ndjson the orders are streamed one JSON object per line,
+    all of them unless a limit is given.
+    """
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    customer_id = request.args.get('customer_id')
+    stream = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+    try:
+        limit, after = keyset_page_args(MAX_ORDERS_PAGE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    paged = not stream and (limit is not None or after is not None)
+    if paged and limit is None:
+        limit = DEFAULT_ORDERS_PAGE
+
+    # Customer and recipe come from the same query instead of one lazy load per order
+    query = Order.query.join(Order.customer).join(Order.recipe).options(
+        contains_eager(Order.customer), contains_eager(Order.recipe)
+    )
+
+    if start_date:
+        query = query.filter(Order.order_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+    if end_date:
+        query = query.filter(Order.order_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    if customer_id:
+        query = query.filter(Order.customer_id == int(customer_id))
+    if after:
+        after_date, after_id = after
+        query = query.filter(or_(
+            Order.order_date > after_date,
+            and_(Order.order_date == after_date, Order.id > after_id)
+        ))
+
+    query = query.order_by(Order.order_date.asc(), Order.id.asc())
+    if limit is not None:
+        query = query.limit(limit)
+
+    if stream:
+        # Rows are fetched in chunks from a server-side cursor while the response is written
+        def generate():
+            for o in query.yield_per(1000):
+                yield app.json.dumps(order_to_dict(o)) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    orders = query.all()
+    if not paged:
+        return jsonify([order_to_dict(o) for o in orders])
+
+    last = orders[-1] if len(orders) == limit else None
+    return jsonify({
+        'orders': [order_to_dict(o) for o in orders],
+        'next_after': f'{last.order_date.isoformat()},{last.id}' if last else None
+    })
 
 
 @app.route('/api/orders', methods=['POST'])
 def create_order():
-    """Create a new order"""
-    data = request.json
+    """Create a new order (added to the existing order if the customer already has this bread that day)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        order = {
+            'customer_id': int(data['customer_id']),
+            'recipe_id': int(data['recipe_id']),
+            'order_date': datetime.strptime(data['order_date'], '%Y-%m-%d').date(),
+            'quantity': int(data['quantity']),
+            'notes': data.get('notes')
+        }
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'An order needs customer_id, recipe_id, order_date (YYYY-MM-DD) and quantity'}), 400
 
-    order = Order(
-        customer_id=data['customer_id'],
-        recipe_id=data['recipe_id'],
-        order_date=datetime.strptime(data['order_date'], '%Y-%m-%d').date(),
-        quantity=data['quantity'],
-        day_of_week=data.get('day_of_week', ''),
-        notes=data.get('notes', '')
-    )
+    error = unknown_order_refs([order])
+    if error:
+        return jsonify({'error': error}), 400
 
-    db.session.add(order)
-    db.session.commit()
+    # Same INSERT ... ON CONFLICT path as /api/orders/bulk, adding to an existing order's quantity,
+    # so concurrent posts for one order neither lose an update nor hit the unique index
+    try:
+        upsert_orders([order], add_quantities=True)
+        queue_production_sync(order['order_date'])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Unknown customer or recipe'}), 400
+
+    order_id = db.session.query(Order.id).filter_by(
+        customer_id=order['customer_id'], recipe_id=order['recipe_id'], order_date=order['order_date']
+    ).scalar()
 
-    # Auto-sync production runs for this date
-    sync_production_runs_for_dates(order.order_date)
+    # Production run for this date is re-synced in the background
+    schedule_production_sync(app)
 
     return jsonify({
         'success': True,
-        'order_id': order.id
+        'order_id': order_id
     })
 
 
@@ -1220,10 +1742,11 @@ def delete_order(order_id):
     order = Order.query.get_or_404(order_id)
     order_date = order.order_date  # Save before deletion
     db.session.delete(order)
+    queue_production_sync(order_date)
     db.session.commit()
 
-    # Auto-sync production runs for this date
-    sync_production_runs_for_dates(order_date)
+    # Production run for this date is re-synced in the background
+    schedule_production_sync(app)
 
     return jsonify({'success': True})
 
@@ -1249,10 +1772,11 @@ def delete_week_orders():
     for order in orders:
         db.session.delete(order)
 
+    queue_production_sync(affected_dates)
     db.session.commit()
 
-    # Auto-sync production runs for all affected dates
-    sync_production_runs_for_dates(list(affected_dates))
+    # Production runs for the affected dates are re-synced in the background
+    schedule_production_sync(app)
 
     return jsonify({'success': True, 'deleted': len(orders)})
 
@@ -1268,33 +1792,14 @@ def aggregate_orders():
     start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
     end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
 
-    # Get all orders in date range
-    orders = Order.query.filter(
-        Order.order_date >= start_date,
-        Order.order_date <= end_date
-    ).all()
-
-    # Aggregate by date and recipe
-    aggregated = {}
-    for order in orders:
-        date_key = order.order_date.isoformat()
-
-        if date_key not in aggregated:
-            aggregated[date_key] = {}
-
-        if order.recipe_id not in aggregated[date_key]:
-            aggregated[date_key][order.recipe_id] = {
-                'recipe_id': order.recipe_id,
-                'recipe_name': order.recipe.name,
-                'total_quantity': 0
-            }
-
-        aggregated[date_key][order.recipe_id]['total_quantity'] += order.quantity
-
-    # Convert to list format
+    # Totals by date and recipe, kept up to date in daily_demand
     result = {}
-    for date_key, recipes in aggregated.items():
-        result[date_key] = list(recipes.values())
+    for row in demand_totals(start_date, end_date):
+        result.setdefault(row.order_date.isoformat(), []).append({
+            'recipe_id': row.recipe_id,
+            'recipe_name': row.recipe_name,
+            'total_quantity': row.quantity
+        })
 
     return jsonify(result)
 
@@ -1310,60 +1815,38 @@ def create_production_from_orders():
     start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
     end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
 
-    # Get aggregated orders
-    orders = Order.query.filter(
-        Order.order_date >= start_date,
-        Order.order_date <= end_date
-    ).all()
-
-    # Aggregate by date and recipe
+    # Totals by date and recipe, kept up to date in daily_demand
     aggregated = {}
-    for order in orders:
-        date_key = order.order_date
-
-        if date_key not in aggregated:
-            aggregated[date_key] = {}
-
-        if order.recipe_id not in aggregated[date_key]:
-            aggregated[date_key][order.recipe_id] = 0
+    for row in demand_totals(start_date, end_date):
+        aggregated.setdefault(row.order_date, {})[row.recipe_id] = (row.quantity, row.loaf_weight)
 
-        aggregated[date_key][order.recipe_id] += order.quantity
+    # Create production runs (existing runs are reused and their items recreated)
+    existing = lock_production_runs(aggregated)
+    runs = lock_production_runs(aggregated, aggregated, created_by='orders_system', notes='Auto-generated from customer orders')
+    runs_created = len(runs) - len(existing)
+    clear_production_items(list(runs.values()))
 
-    # Create production runs
-    runs_created = 0
+    production_items = []
     for production_date, recipes in aggregated.items():
-        # Check if production run already exists
-        existing_run = ProductionRun.query.filter_by(date=production_date).first()
-
-        if existing_run:
-            # Delete existing items and recreate
-            for item in existing_run.items:
-                db.session.delete(item)
-            production_run = existing_run
-        else:
-            # Create new production run
-            production_run = ProductionRun(
-                date=production_date,
-                batch_id=production_date.strftime('%m%d%y'),  # Auto-generate batch ID (MMDDYY)
-                created_by='orders_system',
-                notes='Auto-generated from customer orders'
-            )
-            db.session.add(production_run)
-            db.session.flush()
-            runs_created += 1
-
         # Add production items
-        for recipe_id, quantity in recipes.items():
-            recipe = Recipe.query.get(recipe_id)
+        for recipe_id, (quantity, loaf_weight) in recipes.items():
             production_item = ProductionItem(
-                production_run_id=production_run.id,
+                production_run_id=runs[production_date],
                 recipe_id=recipe_id,
                 quantity=quantity,
-                batch_weight=quantity * recipe.loaf_weight
+                batch_weight=quantity * loaf_weight
             )
             db.session.add(production_item)
+            production_items.append(production_item)
+
+    # Ingredient amounts as the recipes are today, kept for later reports
+    db.session.flush()
+    write_ingredient_amounts([(item.id, item.recipe_id, item.batch_weight) for item in production_items])
+    refresh_consumption(aggregated.keys())
 
+    mark_mep_sheets_stale(list(aggregated.keys()))
     db.session.commit()
+    refresh_mep_sheets(app, list(aggregated.keys()))
 
     return jsonify({
         'success': True,
@@ -1382,26 +1865,26 @@ def get_orders_for_production(date_str):
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
-    # Get all orders for this date
-    orders = Order.query.filter_by(order_date=target_date).all()
+    # Totals per recipe and customer for this date
+    rows = order_totals(dates=[target_date], by_customer=True)
 
-    if not orders:
+    if not rows:
         return jsonify({'orders': [], 'message': 'No orders found for this date'})
 
     # Aggregate by recipe
     aggregated = {}
-    for order in orders:
-        if order.recipe_id not in aggregated:
-            aggregated[order.recipe_id] = {
-                'recipe_id': order.recipe_id,
-                'recipe_name': order.recipe.name,
+    for row in rows:
+        if row.recipe_id not in aggregated:
+            aggregated[row.recipe_id] = {
+                'recipe_id': row.recipe_id,
+                'recipe_name': row.recipe_name,
                 'quantity': 0,
                 'customers': []
             }
-        aggregated[order.recipe_id]['quantity'] += order.quantity
-        aggregated[order.recipe_id]['customers'].append({
-            'name': order.customer.name,
-            'quantity': order.quantity
+        aggregated[row.recipe_id]['quantity'] += row.quantity
+        aggregated[row.recipe_id]['customers'].append({
+            'name': row.customer_name,
+            'quantity': row.quantity
         })
 
     return jsonify({
@@ -2061,7 +2544,7 @@ def customer_production_page():
 
 @app.route('/api/customer-production/<int:customer_id>', methods=['GET'])
 def get_customer_production(customer_id):
-    """Get customer production calendar for a date range"""
+    """Get customer production calendar for a date range (format=columnar: one integer per date and recipe)"""
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
@@ -2071,65 +2554,65 @@ def get_customer_production(customer_id):
     start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
     end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
 
-    # Get all orders for this customer in the date range
-    orders = Order.query.filter(
-        Order.customer_id == customer_id,
-        Order.order_date >= start_date,
-        Order.order_date <= end_date
-    ).all()
-
     # Get customer info
     customer = Customer.query.get_or_404(customer_id)
 
-    # Organize orders by recipe and date
-    production_data = {}
     all_dates = []
     current_date = start_date
     while current_date <= end_date:
         all_dates.append(current_date)
         current_date += timedelta(days=1)
 
-    # Group orders by recipe
-    for order in orders:
-        recipe_name = order.recipe.name
-        if recipe_name not in production_data:
-            production_data[recipe_name] = {
-                'recipe_id': order.recipe_id,
-                'dates': {}
-            }
-
-        date_str = order.order_date.strftime('%Y-%m-%d')
-        production_data[recipe_name]['dates'][date_str] = order.quantity
+    # This customer's loaves per recipe and date, summed in the database
+    rows = order_totals(start_date, end_date, customer_id=customer_id)
 
-    # Build response
     result = {
         'customer_id': customer.id,
         'customer_name': customer.name,
         'start_date': start_date_str,
         'end_date': end_date_str,
-        'dates': [d.strftime('%Y-%m-%d') for d in all_dates],
-        'recipes': []
+        'dates': [d.strftime('%Y-%m-%d') for d in all_dates]
     }
+    if request.args.get('format') == 'columnar':
+        result.update(format='columnar', **production_calendar_columnar(rows, all_dates))
+    else:
+        result['recipes'] = production_calendar(rows, all_dates)
+    return jsonify(result)
 
-    # Add each recipe with quantities for each date
-    for recipe_name, data in sorted(production_data.items()):
-        recipe_row = {
-            'recipe_name': recipe_name,
-            'recipe_id': data['recipe_id'],
-            'quantities': []
-        }
 
-        for date_obj in all_dates:
-            date_str = date_obj.strftime('%Y-%m-%d')
-            quantity = data['dates'].get(date_str, 0)
-            recipe_row['quantities'].append({
-                'date': date_str,
-                'day_of_week': date_obj.strftime('%A'),
-                'quantity': quantity
-            })
+@app.route('/api/production-cube', methods=['GET'])
+def get_production_cube():
+    """
+    Loaves per customer x recipe x date for a date range, from one aggregated query
+    encoding=dense (default): nested quantities[customer][recipe][date];
+    encoding=sparse: parallel index arrays of the non-zero cells
+    """
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+    encoding = request.args.get('encoding', 'dense')
+
+    if not start_date_str or not end_date_str:
+        return jsonify({'error': 'start_date and end_date required'}), 400
+    if encoding not in ('dense', 'sparse'):
+        return jsonify({'error': 'encoding must be dense or sparse'}), 400
+
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+
+    all_dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        all_dates.append(current_date)
+        current_date += timedelta(days=1)
 
-        result['recipes'].append(recipe_row)
+    rows = order_totals(start_date, end_date, by_customer=True)
 
+    result = {
+        'start_date': start_date_str,
+        'end_date': end_date_str,
+        'dates': [d.strftime('%Y-%m-%d') for d in all_dates]
+    }
+    result.update(production_cube(rows, all_dates, encoding))
     return jsonify(result)
 
 
@@ -2141,7 +2624,10 @@ def total_production_page():
 
 @app.route('/api/total-production', methods=['GET'])
 def get_total_production():
-    """Get total production calendar aggregated across all customers for a date range"""
+    """
+    Get total production calendar aggregated across all customers for a date range
+    (format=columnar: one integer per date and recipe)
+    """
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
@@ -2151,62 +2637,80 @@ def get_total_production():
     start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
     end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
 
-    # Get all orders in the date range (across all customers)
-    orders = Order.query.filter(
-        Order.order_date >= start_date,
-        Order.order_date <= end_date
-    ).all()
-
-    # Organize orders by recipe and date
-    production_data = {}
     all_dates = []
     current_date = start_date
     while current_date <= end_date:
         all_dates.append(current_date)
         current_date += timedelta(days=1)
 
-    # Group orders by recipe, aggregating quantities across all customers
-    for order in orders:
-        recipe_name = order.recipe.name
-        if recipe_name not in production_data:
-            production_data[recipe_name] = {
-                'recipe_id': order.recipe_id,
-                'dates': {}
-            }
-
-        date_str = order.order_date.strftime('%Y-%m-%d')
-        if date_str not in production_data[recipe_name]['dates']:
-            production_data[recipe_name]['dates'][date_str] = 0
-        production_data[recipe_name]['dates'][date_str] += order.quantity
+    # Loaves per recipe and date across all customers, from daily_demand
+    rows = demand_totals(start_date, end_date)
 
-    # Build response
     result = {
         'start_date': start_date_str,
         'end_date': end_date_str,
-        'dates': [d.strftime('%Y-%m-%d') for d in all_dates],
-        'recipes': []
+        'dates': [d.strftime('%Y-%m-%d') for d in all_dates]
     }
+    if request.args.get('format') == 'columnar':
+        result.update(format='columnar', **production_calendar_columnar(rows, all_dates))
+    else:
+        result['recipes'] = production_calendar(rows, all_dates)
+    return jsonify(result)
 
-    # Add each recipe with quantities for each date
-    for recipe_name, data in sorted(production_data.items()):
-        recipe_row = {
-            'recipe_name': recipe_name,
-            'recipe_id': data['recipe_id'],
-            'quantities': []
-        }
 
-        for date_obj in all_dates:
-            date_str = date_obj.strftime('%Y-%m-%d')
-            quantity = data['dates'].get(date_str, 0)
-            recipe_row['quantities'].append({
-                'date': date_str,
-                'day_of_week': date_obj.strftime('%A'),
-                'quantity': quantity
-            })
+# =============================================================================
+# Reports
+# =============================================================================
 
-        result['recipes'].append(recipe_row)
+@app.route('/api/reports/consumption', methods=['GET'])
+def get_consumption_report():
+    """
+    Ingredient usage per day, week or month from the consumption rollups
+    Query: start_date, end_date (YYYY-MM-DD), period=day|week|month (default week),
+           ingredient_id (repeatable), category (e.g. flour), by_recipe=1
+    """
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+    period = request.args.get('period', 'week')
 
-    return jsonify(result)
+    if not start_date_str or not end_date_str:
+        return jsonify({'error': 'start_date and end_date required'}), 400
+    if period not in PERIODS:
+        return jsonify({'error': f"period must be one of {', '.join(PERIODS)}"}), 400
+
+    try:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        ingredient_ids = [int(i) for i in request.args.getlist('ingredient_id')]
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD and ingredient_id a number'}), 400
+
+    return jsonify(consumption_report(
+        start_date, end_date, period,
+        ingredient_ids=ingredient_ids,
+        category=request.args.get('category'),
+        by_recipe=request.args.get('by_recipe') == '1'
+    ))
+
+
+# =============================================================================
+# Instrumentation
+# =============================================================================
+
+@app.route('/api/_metrics', methods=['GET', 'DELETE'])
+def get_request_metrics():
+    """
+    Per-endpoint SQL query counts, DB time, JSON serialization time and slowest statements
+    Only available when SQL_METRICS=1; DELETE resets the counters
+    """
+    if not app.config.get('SQL_METRICS'):
+        return jsonify({'error': 'Request metrics are disabled. Set SQL_METRICS=1 to enable them'}), 404
+
+    if request.method == 'DELETE':
+        request_metrics.reset()
+        return jsonify({'message': 'Request metrics reset'})
+
+    return jsonify(request_metrics.snapshot())
 
 
 if __name__ == '__main__':
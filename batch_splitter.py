@@ -0,0 +1,114 @@
+"""
+Batch Splitting Engine
+Splits doughs, starters and soakers into mixer loads using MixerCapacity limits
+"""
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from recipe_graph import RecipeGraph, RecipeNode
+
+
+# Split limits of the hardcoded MEP calculator that MixerCapacity replaced
+LEGACY_ITALIAN_MAX_LOAVES = 110  # Italian dough, carved-out dough included
+LEGACY_LEVAIN_MAX_GRAMS = 6999  # every starter with "levain" in its name
+
+
+def legacy_capacities(recipes) -> List[Tuple[object, float]]:
+    """(recipe, max batch grams) for the recipes the old thresholds applied to (Recipe rows or RecipeNodes)"""
+    capacities = []
+    for recipe in recipes:
+        if recipe.recipe_type == 'bread' and recipe.name == 'Italian':
+            capacities.append((recipe, LEGACY_ITALIAN_MAX_LOAVES * (recipe.loaf_weight or 0)))
+        elif recipe.recipe_type == 'starter' and 'levain' in recipe.name.lower():
+            capacities.append((recipe, LEGACY_LEVAIN_MAX_GRAMS))
+    return capacities
+
+
+@dataclass
+class DoughBatch:
+    """One mixer load of a bread dough: its own loaves plus any dough carved out for other breads"""
+    number: int
+    loaves: int = 0
+    carve_outs: List[Tuple] = field(default_factory=list)  # [(consumer recipe, dependency, grams)]
+    weight: float = 0.0
+
+
+class BatchSplitter:
+    """
+    Decide how many mixer loads each dough needs.
+
+    Capacities come from MixerCapacity (per recipe, falling back to the default row with no recipe).
+    A recipe without any capacity is never split.
+    """
+
+    def __init__(self, graph: RecipeGraph):
+        self.graph = graph
+
+    def capacity(self, recipe: RecipeNode) -> Optional[float]:
+        """Largest batch (grams) the mixer takes for this recipe, or None if unlimited"""
+        capacity = self.graph.capacities.get(recipe.id)
+        if capacity is None:
+            capacity = self.graph.capacities.get(None)
+        return capacity
+
+    def split_weight(self, recipe: RecipeNode, total_weight: float) -> List[float]:
+        """Split a starter/soaker into the fewest equal batches that fit the mixer"""
+        capacity = self.capacity(recipe)
+        if not capacity or total_weight <= capacity:
+            return [total_weight]
+
+        count = math.ceil(total_weight / capacity)
+        return [total_weight / count] * count
+
+    def split_dough(self, recipe: RecipeNode, loaves: int, carve_outs: List[Tuple]) -> List[DoughBatch]:
+        """
+        Pack a bread's loaves and carve-outs into the fewest batches that fit the mixer.
+        Each carve-out stays whole in one batch so it can be taken out of that batch;
+        loaves are then spread so the batches end up about the same size.
+        """
+        loaf_weight = recipe.loaf_weight or 0
+        total_weight = loaves * loaf_weight + sum(grams for consumer, dep, grams in carve_outs)
+
+        capacity = self.capacity(recipe)
+        if not capacity or total_weight <= capacity:
+            return [DoughBatch(1, loaves, list(carve_outs), total_weight)]
+
+        # More bins than pieces can never help; a loaf bigger than the mixer never fits,
+        # so every piece goes in a batch of its own straight away
+        max_count = len(carve_outs) + loaves
+        count = max_count if loaf_weight > capacity else math.ceil(total_weight / capacity)
+        while True:
+            batches = self._pack(count, loaves, loaf_weight, carve_outs)
+            if count >= max_count or all(self._fits(batch, capacity) for batch in batches):
+                break
+            count += 1
+
+        batches = [batch for batch in batches if batch.loaves or batch.carve_outs]
+        for number, batch in enumerate(batches, start=1):
+            batch.number = number
+        return batches
+
+    @staticmethod
+    def _fits(batch: DoughBatch, capacity: float) -> bool:
+        """Within capacity, or a carve-out on its own that is bigger than the mixer (nothing more can be done)"""
+        return batch.weight <= capacity + 1e-6 or (batch.loaves == 0 and len(batch.carve_outs) == 1)
+
+    def _pack(self, count: int, loaves: int, loaf_weight: float, carve_outs: List[Tuple]) -> List[DoughBatch]:
+        """Largest carve-outs first, each into the lightest batch, then loaves one at a time the same way"""
+        batches = [DoughBatch(number) for number in range(1, count + 1)]
+        heap = [(0.0, i) for i in range(count)]
+
+        for carve_out in sorted(carve_outs, key=lambda c: -c[2]):
+            weight, i = heapq.heappop(heap)
+            batches[i].carve_outs.append(carve_out)
+            batches[i].weight = weight + carve_out[2]
+            heapq.heappush(heap, (batches[i].weight, i))
+
+        for _ in range(loaves):
+            weight, i = heapq.heappop(heap)
+            batches[i].loaves += 1
+            batches[i].weight = weight + loaf_weight
+            heapq.heappush(heap, (batches[i].weight, i))
+
+        return batches
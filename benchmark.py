@@ -0,0 +1,311 @@
+"""
+MEP Benchmark Suite
+Builds a synthetic bakery (recipe graph + order book) in a throwaway SQLite database,
+times the hot paths, counts their SQL queries and compares both with benchmark_baseline.json.
+
+Usage:
+    python benchmark.py                      # run and fail (exit 1) if the baseline regressed
+    python benchmark.py --update-baseline    # record the current numbers as the new baseline
+    python benchmark.py --breads 40 --customers 80 --days 28 --repeat 5
+
+Query counts must not go up at all; wall times may be --time-tolerance slower than the
+baseline before they count as a regression (they depend on the machine).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MEP calculation, production sync and order APIs')
+    parser.add_argument('--breads', type=int, default=30, help='number of bread recipes')
+    parser.add_argument('--customers', type=int, default=40, help='number of customers')
+    parser.add_argument('--days', type=int, default=14, help='days in the order book')
+    parser.add_argument('--density', type=float, default=0.3, help='chance a customer orders a bread on a day')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (median is reported)')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.5,
+                        help='allowed wall time increase over the baseline (0.5 = 50%%)')
+    parser.add_argument('--output', default='bench_output.txt', help='also write the report here')
+    return parser.parse_args(argv)
+
+
+# =============================================================================
+# Synthetic dataset
+# =============================================================================
+
+def build_recipe_graph(db, models, rnd, bread_count):
+    """
+    Recipes shaped like the real ones: breads on two or three starters and an optional soaker,
+    starters built from other starters, a perpetual culture (Emmy <-> Levain) and
+    breads carved from another bread's dough
+    """
+    Recipe, Ingredient, RecipeIngredient, MixerCapacity = (
+        models.Recipe, models.Ingredient, models.RecipeIngredient, models.MixerCapacity
+    )
+
+    ingredients = {}
+
+    def ingredient(name, category):
+        if name not in ingredients:
+            ingredients[name] = Ingredient(name=name, category=category, unit='grams')
+            db.session.add(ingredients[name])
+        return ingredients[name]
+
+    def recipe(name, recipe_type, loaf_weight, lines):
+        r = Recipe(name=name, recipe_type=recipe_type, loaf_weight=loaf_weight, base_batch_weight=loaf_weight)
+        db.session.add(r)
+        for order, (ingredient_name, category, percentage) in enumerate(lines):
+            db.session.add(RecipeIngredient(
+                recipe=r, ingredient=ingredient(ingredient_name, category),
+                percentage=percentage, is_percentage=True, order=order
+            ))
+        return r
+
+    flours = ['Red Rose Flour', 'Whole Wheat Flour', 'Rye Flour']
+    base = [('Water', 'water', 100), ('Salt', 'salt', 1)]
+
+    # Emmy and Levain feed each other (the cycle is closed by yesterday's saved Levain)
+    recipe('Emmy(starter)', 'starter', 1500, [('Red Rose Flour', 'flour', 100), ('Water', 'water', 100),
+                                              ('Levain', 'starter', 25)])
+    recipe('Levain', 'starter', 0, [('Red Rose Flour', 'flour', 100), ('Water', 'water', 100),
+                                    ('Emmy(starter)', 'starter', 20)])
+    starters = ['Levain']
+    for i in range(1, max(2, bread_count // 5) + 1):
+        name = f'Starter {i}'
+        lines = [(rnd.choice(flours), 'flour', 100), ('Water', 'water', rnd.choice([60, 80, 100])),
+                 ('Yeast', 'yeast', 0.2)]
+        if i > 2:
+            # Nested: built partly from an earlier starter
+            lines.append((rnd.choice(starters), 'starter', 10))
+        recipe(name, 'starter', 0, lines)
+        starters.append(name)
+
+    soakers = []
+    for i in range(1, max(1, bread_count // 6) + 1):
+        name = f'Soaker {i}'
+        recipe(name, 'soaker', 0, [('Seeds', 'other', 100), ('Water', 'water', 120)] + base[1:])
+        soakers.append(name)
+
+    doughs = []
+    for i in range(1, bread_count + 1):
+        name = f'Bread {i}'
+        loaf_weight = rnd.choice([350, 500, 800, 900, 1000, 1200])
+        if i % 5 == 0 and doughs:
+            # Dough-in-dough: carved from an earlier bread plus a soaker
+            lines = [(f'{rnd.choice(doughs)} dough', 'dough', 85), (rnd.choice(soakers), 'soaker', 15)]
+        else:
+            lines = [(rnd.choice(flours), 'flour', 100), ('Water', 'water', rnd.randint(60, 80))] + base[1:]
+            for starter in rnd.sample(starters, rnd.choice([1, 2])):
+                lines.append((starter, 'starter', rnd.choice([15, 20, 30])))
+            if rnd.random() < 0.4:
+                lines.append((rnd.choice(soakers), 'soaker', 10))
+            doughs.append(name)
+        recipe(name, 'bread', loaf_weight, lines)
+
+    db.session.add(MixerCapacity(recipe_id=None, max_batch_weight=60000))
+    db.session.commit()
+
+
+def build_order_book(db, models, rnd, customer_count, days, density):
+    """Orders for every customer and bread, skipping Sundays; returns the dates in the book"""
+    Customer, Order, Recipe = models.Customer, models.Order, models.Recipe
+
+    customers = [Customer(name=f'Customer {i}', short_name=f'C{i}') for i in range(1, customer_count + 1)]
+    db.session.add_all(customers)
+    db.session.flush()
+    breads = Recipe.query.filter_by(recipe_type='bread').order_by(Recipe.id).all()
+
+    start = date(2026, 1, 5)
+    dates = [start + timedelta(days=d) for d in range(days)]
+    orders = []
+    for order_date in dates:
+        if order_date.weekday() == 6:
+            continue
+        for customer in customers:
+            for bread in breads:
+                if rnd.random() < density:
+                    orders.append(Order(
+                        customer_id=customer.id, recipe_id=bread.id, order_date=order_date,
+                        quantity=rnd.randint(1, 30), day_of_week=order_date.strftime('%A')
+                    ))
+    db.session.add_all(orders)
+    db.session.commit()
+    return dates, len(orders)
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+class QueryCounter:
+    """Counts statements sent to the database while active"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def measure(counter, repeat, setup, run):
+    """Median wall time (ms) over repeat runs, and the query count of the last run"""
+    timings = []
+    for _ in range(repeat):
+        setup()
+        counter.count = 0
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+        queries = counter.count
+    return {'ms': round(statistics.median(timings), 2), 'queries': queries}
+
+
+def run_benchmarks(args):
+    # Importing the app tries its startup recipe import against the still empty database
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app, db
+    from production_sync import sync_production_runs_for_dates
+    import models
+    from mep_calculator import MEPCalculator
+    from mep_materializer import load_production_items
+    from mep_cache import mep_sheet_cache
+    from recipe_store import get_recipe_graph
+
+    rnd = random.Random(args.seed)
+    results = {}
+    with app.app_context():
+        db.create_all()
+        build_recipe_graph(db, models, rnd, args.breads)
+        dates, order_count = build_order_book(db, models, rnd, args.customers, args.days, args.density)
+        counter = QueryCounter(db.engine)
+
+        def fresh():
+            # Every run starts from an empty session and no cached sheets, like a new request after orders changed
+            db.session.remove()
+            mep_sheet_cache.clear()
+
+        # First sync creates the production runs; later runs replace their items
+        results['sync_production_runs_for_dates'] = measure(
+            counter, args.repeat, fresh, lambda: sync_production_runs_for_dates(list(dates))
+        )
+
+        get_recipe_graph()
+        runs = load_production_items(dates)
+
+        def calculate_all():
+            for delivery_date in sorted(runs):
+                MEPCalculator(runs[delivery_date][1], delivery_date=delivery_date).calculate_all_sheets()
+
+        results['calculate_all_sheets'] = measure(counter, args.repeat, fresh, calculate_all)
+
+    client = app.test_client()
+    start, end = dates[0].isoformat(), dates[-1].isoformat()
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, f'{url} returned {response.status_code}'
+        return run
+
+    with app.app_context():
+        results['/api/total-production'] = measure(
+            counter, args.repeat, fresh, get(f'/api/total-production?start_date={start}&end_date={end}')
+        )
+        results['/api/orders'] = measure(
+            counter, args.repeat, fresh, get(f'/api/orders?start_date={start}&end_date={end}')
+        )
+
+    dataset = {
+        'breads': args.breads, 'customers': args.customers, 'days': args.days,
+        'density': args.density, 'seed': args.seed, 'orders': order_count
+    }
+    return dataset, results
+
+
+def compare(dataset, results, baseline, time_tolerance):
+    """Regression messages against a baseline (empty when nothing regressed)"""
+    if baseline.get('dataset') != dataset:
+        return [f"dataset {dataset} differs from the baseline's {baseline.get('dataset')}; "
+                f"run with the baseline's parameters or --update-baseline"]
+
+    regressions = []
+    for name, result in results.items():
+        expected = baseline['results'].get(name)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {expected['queries']})")
+        if result['ms'] > expected['ms'] * (1 + time_tolerance):
+            regressions.append(f"{name}: {result['ms']}ms (baseline {expected['ms']}ms)")
+    return regressions
+
+
+def report(dataset, results, baseline) -> str:
+    lines = [
+        f"Dataset: {dataset['breads']} breads, {dataset['customers']} customers, {dataset['days']} days, "
+        f"{dataset['orders']} orders (seed {dataset['seed']})",
+        f"{'case':<36}{'queries':>10}{'ms':>12}{'baseline q':>12}{'baseline ms':>13}"
+    ]
+    for name, result in results.items():
+        expected = (baseline or {}).get('results', {}).get(name, {})
+        lines.append(f"{name:<36}{result['queries']:>10}{result['ms']:>12.2f}"
+                     f"{expected.get('queries', '-'):>12}{expected.get('ms', '-'):>13}")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # The app reads its configuration on import, so point it at the throwaway database first
+    workdir = tempfile.mkdtemp(prefix='bakery-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['MEP_BACKGROUND_REFRESH'] = '0'  # refresh sheets inline so every query is counted
+
+    dataset, results = run_benchmarks(args)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    output = report(dataset, results, baseline)
+    status = 0
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'dataset': dataset, 'results': results}, f, indent=2)
+            f.write('\n')
+        output += f'\n\nBaseline written to {args.baseline}'
+    elif baseline is None:
+        output += f'\n\nNo baseline at {args.baseline}; run with --update-baseline to record one'
+    else:
+        regressions = compare(dataset, results, baseline, args.time_tolerance)
+        if regressions:
+            output += '\n\nREGRESSIONS:\n' + '\n'.join(f'  {r}' for r in regressions)
+            status = 1
+        else:
+            output += '\n\nNo regressions against the baseline'
+
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
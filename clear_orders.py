@@ -3,10 +3,12 @@ Clear all orders from the database
 """
 from app import app, db
 from models import Order
+from daily_demand import rebuild_daily_demand
 
 with app.app_context():
     # Delete all orders
     num_deleted = Order.query.delete()
+    rebuild_daily_demand()
     db.session.commit()
 
     print(f"Deleted {num_deleted} orders")
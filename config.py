@@ -14,6 +14,20 @@ class Config:
     SQLALCHEMY_DATABASE_URI = database_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Recompute materialized MEP sheets in a background thread when orders change
+    MEP_BACKGROUND_REFRESH = os.environ.get('MEP_BACKGROUND_REFRESH', '1') != '0'
+
+    # Re-sync production runs in a background thread once orders stop changing (seconds)
+    PRODUCTION_SYNC_BACKGROUND = os.environ.get('PRODUCTION_SYNC_BACKGROUND', '1') != '0'
+    PRODUCTION_SYNC_DELAY = float(os.environ.get('PRODUCTION_SYNC_DELAY', '2'))
+    PRODUCTION_SYNC_MAX_DELAY = float(os.environ.get('PRODUCTION_SYNC_MAX_DELAY', '10'))
+    # A failed sync is retried after this delay, doubling per failure up to the max (seconds)
+    PRODUCTION_SYNC_RETRY_DELAY = float(os.environ.get('PRODUCTION_SYNC_RETRY_DELAY', '5'))
+    PRODUCTION_SYNC_RETRY_MAX_DELAY = float(os.environ.get('PRODUCTION_SYNC_RETRY_MAX_DELAY', '300'))
+
+    # Per-request SQL query counts and timings at /api/_metrics and in a Server-Timing header
+    SQL_METRICS = os.environ.get('SQL_METRICS', '0') == '1'
+
     # Excel file paths
     BREAD_FORMULAS_FILE = 'Bread Formulas 2024.xlsx'
     WEEKLY_ORDERS_FILE = 'Weekly Bread-Pastry Orders.xlsx'
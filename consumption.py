@@ -0,0 +1,175 @@
+"""
+Ingredient Consumption Rollups
+Grams of each ingredient per (day, recipe), (week, recipe) and (month, recipe), summed from the stored
+ProductionIngredient amounts. Dates are refreshed whenever their production items change,
+so reports read a few rollup rows per period instead of every production run.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+from models import db, ProductionRun, ProductionItem, ProductionIngredient, Ingredient, Recipe, DailyConsumption, WeeklyConsumption, MonthlyConsumption
+
+
+PERIODS = ('day', 'week', 'month')
+
+
+def week_start(d: date) -> date:
+    """Monday of d's week"""
+    return d - timedelta(days=d.weekday())
+
+
+def month_start(d: date) -> date:
+    """First day of d's month"""
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+# Rollup table, its period column, period of a date, first date after a period
+ROLLUPS = [
+    (WeeklyConsumption, 'week_start', week_start, lambda start: start + timedelta(days=7)),
+    (MonthlyConsumption, 'month_start', month_start, _next_month),
+]
+
+
+def _daily_rows(dates: Optional[List[date]] = None) -> List[Dict]:
+    """(date, ingredient, recipe) sums of the stored ingredient amounts, for dates or every date"""
+    query = db.session.query(
+        ProductionRun.date, ProductionIngredient.ingredient_id, ProductionItem.recipe_id,
+        db.func.sum(ProductionIngredient.amount_grams)
+    ).join(
+        ProductionItem, ProductionItem.id == ProductionIngredient.production_item_id
+    ).join(
+        ProductionRun, ProductionRun.id == ProductionItem.production_run_id
+    )
+    if dates is not None:
+        query = query.filter(ProductionRun.date.in_(dates))
+
+    return [{
+        'date': run_date, 'ingredient_id': ingredient_id, 'recipe_id': recipe_id, 'grams': grams
+    } for run_date, ingredient_id, recipe_id, grams in query.group_by(
+        ProductionRun.date, ProductionIngredient.ingredient_id, ProductionItem.recipe_id
+    ).all()]
+
+
+def _write_rollups(dates: Optional[List[date]] = None):
+    """Re-sum the weekly and monthly tables from consumption_daily for the periods of dates (or all of them)"""
+    for model, column_name, period_of, period_end in ROLLUPS:
+        column = getattr(model, column_name)
+        delete = model.query
+        daily = db.session.query(
+            DailyConsumption.date, DailyConsumption.ingredient_id, DailyConsumption.recipe_id, DailyConsumption.grams
+        )
+        starts = None
+        if dates is not None:
+            starts = sorted({period_of(d) for d in dates})
+            delete = delete.filter(column.in_(starts))
+            daily = daily.filter(DailyConsumption.date >= starts[0], DailyConsumption.date < period_end(starts[-1]))
+        delete.delete(synchronize_session=False)
+
+        wanted = set(starts) if starts is not None else None
+        totals = {}
+        for run_date, ingredient_id, recipe_id, grams in daily.all():
+            key = (period_of(run_date), ingredient_id, recipe_id)
+            if wanted is None or key[0] in wanted:
+                totals[key] = totals.get(key, 0) + grams
+
+        if totals:
+            db.session.execute(model.__table__.insert(), [{
+                column_name: start, 'ingredient_id': ingredient_id, 'recipe_id': recipe_id, 'grams': grams
+            } for (start, ingredient_id, recipe_id), grams in totals.items()])
+
+
+def refresh_consumption(dates: Iterable[date]):
+    """Recompute the rollups for production dates whose items changed; caller commits"""
+    if isinstance(dates, date):
+        dates = [dates]
+    dates = sorted(set(dates))
+    if not dates:
+        return
+
+    DailyConsumption.query.filter(DailyConsumption.date.in_(dates)).delete(synchronize_session=False)
+    rows = _daily_rows(dates)
+    if rows:
+        db.session.execute(DailyConsumption.__table__.insert(), rows)
+
+    _write_rollups(dates)
+
+
+def rebuild_consumption() -> int:
+    """Recompute the rollup tables from every production run; caller commits. Returns the daily rows written."""
+    DailyConsumption.query.delete(synchronize_session=False)
+    rows = _daily_rows()
+    if rows:
+        db.session.execute(DailyConsumption.__table__.insert(), rows)
+
+    _write_rollups()
+    return len(rows)
+
+
+def consumption_report(start_date: date, end_date: date, period: str = 'week', ingredient_ids=None,
+                       category: Optional[str] = None, by_recipe: bool = False) -> Dict:
+    """
+    Grams used per period and ingredient (and recipe with by_recipe) between start_date and end_date.
+    'week' and 'month' cover whole periods, from the one start_date falls in.
+    {'start_date', 'end_date', 'period', 'rows': [{'period', 'ingredient_id', 'ingredient_name', 'category',
+     ['recipe_id', 'recipe_name'], 'grams'}], 'totals': [{'ingredient_id', 'ingredient_name', 'category', 'grams'}]}
+    """
+    if period == 'week':
+        start_date = week_start(start_date)
+        table, day = WeeklyConsumption, WeeklyConsumption.week_start
+    elif period == 'month':
+        start_date = month_start(start_date)
+        table, day = MonthlyConsumption, MonthlyConsumption.month_start
+    else:
+        table, day = DailyConsumption, DailyConsumption.date
+
+    columns = [day, table.ingredient_id, Ingredient.name, Ingredient.category]
+    if by_recipe:
+        columns += [table.recipe_id, Recipe.name]
+
+    query = db.session.query(*columns, db.func.sum(table.grams)).join(
+        Ingredient, Ingredient.id == table.ingredient_id
+    ).filter(day >= start_date, day <= end_date)
+    if by_recipe:
+        query = query.join(Recipe, Recipe.id == table.recipe_id)
+    if ingredient_ids:
+        query = query.filter(table.ingredient_id.in_(list(ingredient_ids)))
+    if category:
+        query = query.filter(Ingredient.category == category)
+
+    rows = []
+    totals = {}
+    for row in query.group_by(*columns).order_by(day, Ingredient.name).all():
+        start, ingredient_id, ingredient_name, ingredient_category = row[:4]
+        grams = row[-1]
+        entry = {
+            'period': start.strftime('%Y-%m') if period == 'month' else start.isoformat(),
+            'ingredient_id': ingredient_id,
+            'ingredient_name': ingredient_name,
+            'category': ingredient_category,
+            'grams': round(grams, 1)
+        }
+        if by_recipe:
+            entry['recipe_id'], entry['recipe_name'] = row[4:6]
+        rows.append(entry)
+
+        total = totals.setdefault(ingredient_id, {
+            'ingredient_id': ingredient_id,
+            'ingredient_name': ingredient_name,
+            'category': ingredient_category,
+            'grams': 0
+        })
+        total['grams'] += grams
+
+    for total in totals.values():
+        total['grams'] = round(total['grams'], 1)
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'period': period,
+        'rows': rows,
+        'totals': sorted(totals.values(), key=lambda t: -t['grams'])
+    }
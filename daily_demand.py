@@ -0,0 +1,164 @@
+"""
+Daily Demand
+Total loaves per (delivery date, recipe) kept in the daily_demand table. Every ORM flush that
+adds, changes or deletes orders applies the difference; bulk writes that bypass the ORM
+call apply_demand_deltas themselves (or rebuild_daily_demand afterwards).
+"""
+from typing import Dict, List, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import db, Order, DailyDemand
+from upsert import dialect_insert
+
+
+# (date, recipe_id) -> (quantity change, order count change)
+Deltas = Dict[Tuple, Tuple[int, int]]
+
+# Keys per locking statement: 4 bound parameters each stays under SQLite's 32766 variable limit
+LOCK_BATCH_SIZE = 5000
+
+
+def _add(deltas: Deltas, order_date, recipe_id, quantity, count):
+    if order_date is None or recipe_id is None:
+        return
+    old_quantity, old_count = deltas.get((order_date, recipe_id), (0, 0))
+    deltas[(order_date, recipe_id)] = (old_quantity + (quantity or 0), old_count + count)
+
+
+def _recipe_id(order):
+    if order.recipe_id is None and order.recipe is not None:
+        return order.recipe.id
+    return order.recipe_id
+
+
+def _committed(order, name):
+    """Value of an order attribute as it is in the database, before this flush"""
+    history = inspect(order).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(order, name)
+
+
+def apply_demand_deltas(session, deltas: Deltas):
+    """Add quantity / order count changes to daily_demand; rows left without orders are removed"""
+    deltas = {key: change for key, change in deltas.items() if change != (0, 0)}
+    if not deltas:
+        return
+
+    table = DailyDemand.__table__
+    statement = dialect_insert(table, session).values([
+        {'date': order_date, 'recipe_id': recipe_id, 'quantity': quantity, 'order_count': count}
+        for (order_date, recipe_id), (quantity, count) in deltas.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=['date', 'recipe_id'],
+        set_={
+            'quantity': table.c.quantity + statement.excluded.quantity,
+            'order_count': table.c.order_count + statement.excluded.order_count
+        }
+    )
+    session.execute(statement)
+
+    if any(count < 0 for quantity, count in deltas.values()):
+        session.execute(table.delete().where(
+            table.c.date.in_({order_date for order_date, recipe_id in deltas}),
+            table.c.order_count <= 0
+        ))
+
+
+def lock_demand_rows(session, keys):
+    """
+    Lock the daily_demand rows of these (date, recipe_id) keys until the transaction ends,
+    creating empty rows for keys without one. Bulk writers call this before reading the orders
+    they compute deltas from, so concurrent writers touching the same keys take turns instead
+    of both applying deltas against the same old orders. Rows are locked in (date, recipe_id)
+    order so overlapping writers cannot deadlock.
+    """
+    keys = sorted(set(keys))
+    table = DailyDemand.__table__
+    for start in range(0, len(keys), LOCK_BATCH_SIZE):
+        statement = dialect_insert(table, session).values([
+            {'date': order_date, 'recipe_id': recipe_id, 'quantity': 0, 'order_count': 0}
+            for order_date, recipe_id in keys[start:start + LOCK_BATCH_SIZE]
+        ])
+        # A no-op update still takes the row lock (and SQLite's write lock)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=['date', 'recipe_id'],
+            set_={'order_count': table.c.order_count}
+        ))
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_order_changes(session, flush_context, instances):
+    deltas = {}
+    for order in session.new:
+        if isinstance(order, Order):
+            _add(deltas, order.order_date, _recipe_id(order), order.quantity, 1)
+
+    for order in session.deleted:
+        if isinstance(order, Order) and inspect(order).has_identity:
+            _add(deltas, _committed(order, 'order_date'), _committed(order, 'recipe_id'),
+                 -(_committed(order, 'quantity') or 0), -1)
+
+    for order in session.dirty:
+        if not isinstance(order, Order) or not session.is_modified(order):
+            continue
+        old = tuple(_committed(order, name) for name in ('order_date', 'recipe_id', 'quantity'))
+        new = (order.order_date, _recipe_id(order), order.quantity)
+        if old != new:
+            _add(deltas, old[0], old[1], -(old[2] or 0), -1)
+            _add(deltas, new[0], new[1], new[2], 1)
+
+    apply_demand_deltas(session, deltas)
+
+
+def _demand_from_orders(dates=None):
+    """Grouped (date, recipe_id, quantity, order_count) from the orders themselves, in first-ordered order"""
+    query = db.session.query(
+        Order.order_date, Order.recipe_id, db.func.sum(Order.quantity), db.func.count(Order.id)
+    )
+    if dates is not None:
+        query = query.filter(Order.order_date.in_(list(dates)))
+    return query.group_by(Order.order_date, Order.recipe_id).order_by(db.func.min(Order.id))
+
+
+def rebuild_daily_demand(dates=None) -> int:
+    """Recompute daily_demand from orders (every date, or just dates); caller commits. Returns the rows written."""
+    delete = DailyDemand.query
+    if dates is not None:
+        delete = delete.filter(DailyDemand.date.in_(list(dates)))
+    delete.delete(synchronize_session=False)
+
+    rows = [
+        {'date': order_date, 'recipe_id': recipe_id, 'quantity': quantity, 'order_count': count}
+        for order_date, recipe_id, quantity, count in _demand_from_orders(dates).all()
+    ]
+    if rows:
+        db.session.execute(DailyDemand.__table__.insert(), rows)
+    return len(rows)
+
+
+def check_daily_demand(dates=None) -> List[Dict]:
+    """
+    Differences between daily_demand and the orders it summarizes (empty when consistent)
+    [{'date', 'recipe_id', 'expected': (quantity, order_count), 'actual': (quantity, order_count) or None}]
+    """
+    expected = {
+        (order_date, recipe_id): (quantity, count)
+        for order_date, recipe_id, quantity, count in _demand_from_orders(dates).all()
+    }
+
+    query = db.session.query(DailyDemand.date, DailyDemand.recipe_id, DailyDemand.quantity, DailyDemand.order_count)
+    if dates is not None:
+        query = query.filter(DailyDemand.date.in_(list(dates)))
+    actual = {(order_date, recipe_id): (quantity, count) for order_date, recipe_id, quantity, count in query.all()}
+
+    return [{
+        'date': order_date.isoformat(),
+        'recipe_id': recipe_id,
+        'expected': expected.get((order_date, recipe_id)),
+        'actual': actual.get((order_date, recipe_id))
+    } for order_date, recipe_id in sorted(set(expected) | set(actual))
+        if expected.get((order_date, recipe_id)) != actual.get((order_date, recipe_id))]
@@ -0,0 +1,285 @@
+"""
+Recipe Dependency Resolver
+Expands bread orders into dough, starter, soaker and culture requirements in one topological pass
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from recipe_graph import RecipeGraph, RecipeNode, RecipeLine, IngredientNode
+from scaling import ScalingEngine, get_scaling_engine
+
+
+# Which recipe types can supply an ingredient of a given category
+SUPPLIER_TYPES = {
+    'starter': ('starter',),
+    'soaker': ('soaker',),
+    'dough': ('bread',),
+}
+
+
+@dataclass(frozen=True)
+class Dependency:
+    """One ingredient line of a recipe that is itself made from another recipe"""
+    consumer_id: int
+    index: int          # position of the line in the consumer's ingredients
+    line: RecipeLine
+    supplier: RecipeNode
+    coefficient: float  # grams of supplier per gram of consumer
+    carry_over: bool    # supplied from a previous day's batch (e.g. Emmy fed with yesterday's Levain)
+
+
+class DependencyGraph:
+    """
+    Static dependency structure of a recipe graph.
+
+    Edges run from a consumer recipe to the recipe that supplies one of its ingredient lines
+    (bread -> dough -> starter -> culture, soakers at any level). Cycles only occur for
+    perpetual cultures; the edge that closes a cycle is marked carry_over and the recipe
+    owning it is a culture, fed every morning rather than built to order.
+    """
+
+    def __init__(self, graph: RecipeGraph, engine: ScalingEngine):
+        self.graph = graph
+        self.engine = engine
+
+        self.dependencies: Dict[int, List[Dependency]] = {}
+        for recipe in graph.recipes:
+            deps = []
+            for index, (ri, coefficient) in enumerate(zip(recipe.ingredients, engine.coefficients[recipe.id].tolist())):
+                supplier = self.supplier(ri.ingredient)
+                if supplier is not None and supplier.id != recipe.id:
+                    deps.append((index, ri, supplier, coefficient))
+            self.dependencies[recipe.id] = deps
+
+        self.order, back_edges = self._sort()
+        self.cultures = set()
+        for recipe_id, deps in self.dependencies.items():
+            resolved = []
+            for index, ri, supplier, coefficient in deps:
+                carry_over = (recipe_id, supplier.id) in back_edges
+                if carry_over:
+                    self.cultures.add(recipe_id)
+                resolved.append(Dependency(recipe_id, index, ri, supplier, coefficient, carry_over))
+            self.dependencies[recipe_id] = resolved
+        self._leaves: Dict[int, Dict[int, float]] = {}
+
+    def supplier(self, ingredient: IngredientNode) -> Optional[RecipeNode]:
+        """The recipe that makes an ingredient (Levain -> Levain starter, 'Italian dough' -> Italian)"""
+        for recipe_type in SUPPLIER_TYPES.get(ingredient.category, ()):
+            recipe = self.graph.find(ingredient.name, recipe_type)
+            if recipe is None and ingredient.name.lower().endswith(' dough'):
+                recipe = self.graph.find(ingredient.name[:-len(' dough')], recipe_type)
+            if recipe is not None:
+                return recipe
+        return None
+
+    def _sort(self) -> Tuple[List[int], set]:
+        """Depth-first sort from the breads: returns consumers-first order and the cycle-closing edges"""
+        state = {}
+        postorder = []
+        back_edges = set()
+
+        def visit(recipe_id):
+            state[recipe_id] = 'active'
+            for index, ri, supplier, coefficient in self.dependencies[recipe_id]:
+                if state.get(supplier.id) == 'active':
+                    back_edges.add((recipe_id, supplier.id))
+                elif supplier.id not in state:
+                    visit(supplier.id)
+            state[recipe_id] = 'done'
+            postorder.append(recipe_id)
+
+        roots = sorted(self.graph.recipes, key=lambda r: (r.recipe_type != 'bread', r.id))
+        for recipe in roots:
+            if recipe.id not in state:
+                visit(recipe.id)
+
+        return postorder[::-1], back_edges
+
+    def affected(self, recipe_ids) -> set:
+        """
+        Recipes whose sheet entries can change when production of these recipes changes:
+        everything they are built from, plus breads carved out of an affected dough
+        """
+        affected = set()
+        stack = list(recipe_ids)
+        while stack:
+            recipe_id = stack.pop()
+            if recipe_id in affected or recipe_id not in self.dependencies:
+                continue
+            affected.add(recipe_id)
+            stack.extend(dep.supplier.id for dep in self.dependencies[recipe_id] if not dep.carry_over)
+            stack.extend(
+                consumer_id for consumer_id, deps in self.dependencies.items()
+                if any(dep.supplier.id == recipe_id and dep.supplier.recipe_type == 'bread' for dep in deps)
+            )
+        return affected
+
+    def sheet_names(self, recipe_ids) -> set:
+        """Names these recipes appear under on the MEP sheets (their own name and the ingredient lines they supply)"""
+        names = {self.graph.get(recipe_id).name for recipe_id in recipe_ids}
+        for deps in self.dependencies.values():
+            for dep in deps:
+                if dep.supplier.id in recipe_ids:
+                    names.add(dep.line.ingredient.name)
+        return names
+
+    def leaf_coefficients(self, recipe_id: int) -> Dict[int, float]:
+        """
+        Grams of each raw ingredient (ingredient_id -> grams) per gram of a recipe, with starters,
+        soakers and carved dough expanded into what they are made of. Carry-over lines are left out:
+        yesterday's batch feeding a culture was counted when it was made.
+        """
+        leaves = self._leaves.get(recipe_id)
+        if leaves is not None:
+            return leaves
+
+        recipe = self.graph.get(recipe_id)
+        suppliers = {dep.index: dep for dep in self.dependencies[recipe_id]}
+        leaves = defaultdict(float)
+        for index, (ri, coefficient) in enumerate(zip(recipe.ingredients, self.engine.coefficients[recipe_id].tolist())):
+            dep = suppliers.get(index)
+            if dep is None:
+                leaves[ri.ingredient.id] += coefficient
+            elif not dep.carry_over:
+                for ingredient_id, grams in self.leaf_coefficients(dep.supplier.id).items():
+                    leaves[ingredient_id] += coefficient * grams
+
+        leaves = dict(leaves)
+        self._leaves[recipe_id] = leaves
+        return leaves
+
+    def resolve(self, production_items: List[Dict]) -> 'Requirements':
+        """Expand bread production items into total grams of every recipe they depend on"""
+        return Requirements(self, production_items)
+
+
+class Requirements:
+    """
+    Resolved requirements for one set of production items.
+
+    breads    - [(recipe, loaves)] in production order, one entry per bread recipe
+    totals    - recipe_id -> grams needed (breads include dough carved out for other breads)
+    consumers - recipe_id -> [(consumer recipe, dependency, grams)]
+    """
+
+    def __init__(self, deps: DependencyGraph, production_items: List[Dict]):
+        self.deps = deps
+        self.graph = deps.graph
+        self.engine = deps.engine
+
+        self.breads: List[Tuple[RecipeNode, int]] = []
+        loaves: Dict[int, int] = {}
+        for item in production_items:
+            recipe = self.graph.get(item['recipe_id'])
+            if not recipe or recipe.recipe_type != 'bread':
+                continue
+            if recipe.id not in loaves:
+                loaves[recipe.id] = 0
+                self.breads.append(recipe)
+            loaves[recipe.id] += item['quantity']
+        self.loaves = loaves
+        self.breads = [(recipe, loaves[recipe.id]) for recipe in self.breads]
+
+        # Single topological pass: every consumer is complete before its suppliers are expanded
+        self.totals: Dict[int, float] = defaultdict(float)
+        self.consumers: Dict[int, list] = defaultdict(list)
+        for recipe, quantity in self.breads:
+            # A bread without a loaf weight has nothing to build (it stays on the sheets at 0g)
+            self.totals[recipe.id] += quantity * (recipe.loaf_weight or 0)
+
+        for recipe_id in deps.order:
+            total = self.totals.get(recipe_id)
+            if not total:
+                continue
+            consumer = self.graph.get(recipe_id)
+            for dep in deps.dependencies[recipe_id]:
+                if dep.carry_over:
+                    continue
+                grams = dep.coefficient * total
+                self.totals[dep.supplier.id] += grams
+                self.consumers[dep.supplier.id].append((consumer, dep, grams))
+
+        self.discovery_order = self._discovery_order()
+
+    def dough_consumers(self, recipe: RecipeNode) -> List[Tuple[RecipeNode, Dependency, float]]:
+        """Breads that are carved out of this bread's dough"""
+        return [c for c in self.consumers.get(recipe.id, []) if c[0].recipe_type == 'bread']
+
+    def dough_suppliers(self, recipe: RecipeNode) -> List[Dependency]:
+        """Dependencies of a bread on another bread's dough"""
+        return [d for d in self.deps.dependencies[recipe.id] if d.supplier.recipe_type == 'bread']
+
+    def prep_items(self, category: str) -> List[Dict]:
+        """
+        Everything of a category (starter / soaker) that has to be built ahead of the mix,
+        in the order it is first needed. Cultures and carry-over lines are excluded.
+        Returns [{'name', 'recipe', 'total_grams', 'recipes_needing': [(recipe, grams)]}]
+        """
+        prep = {}
+        for recipe_id in self.discovery_order:
+            total = self.totals.get(recipe_id)
+            if not total or recipe_id in self.deps.cultures:
+                continue
+            consumer = self.graph.get(recipe_id)
+            suppliers = {d.index: d for d in self.deps.dependencies[recipe_id]}
+            for index, (ri, grams) in enumerate(self.engine.scale(consumer, total)):
+                if ri.ingredient.category != category:
+                    continue
+                dep = suppliers.get(index)
+                if dep is not None and (dep.carry_over or dep.supplier.id in self.deps.cultures):
+                    continue
+                if ri.ingredient.name not in prep:
+                    prep[ri.ingredient.name] = {
+                        'name': ri.ingredient.name,
+                        'recipe': dep.supplier if dep is not None else None,
+                        'total_grams': 0.0,
+                        'recipes_needing': []
+                    }
+                prep[ri.ingredient.name]['total_grams'] += grams
+                prep[ri.ingredient.name]['recipes_needing'].append((consumer, grams))
+        return list(prep.values())
+
+    def culture_totals(self) -> List[Tuple[RecipeNode, float]]:
+        """Perpetual cultures (e.g. Emmy) with the grams the resolved starters draw from them"""
+        return [
+            (self.graph.get(recipe_id), self.totals[recipe_id])
+            for recipe_id in self.discovery_order
+            if recipe_id in self.deps.cultures and self.totals.get(recipe_id)
+        ]
+
+    def _discovery_order(self) -> List[int]:
+        """Recipes with demand, in the order they are reached walking the breads in production order"""
+        seen = []
+        visited = set()
+
+        def visit(recipe_id):
+            visited.add(recipe_id)
+            seen.append(recipe_id)
+            for dep in self.deps.dependencies[recipe_id]:
+                if not dep.carry_over and dep.supplier.id not in visited:
+                    visit(dep.supplier.id)
+
+        for recipe, quantity in self.breads:
+            if recipe.id not in visited:
+                visit(recipe.id)
+        return seen
+
+
+_dependency_graph: Optional[DependencyGraph] = None
+_dependency_lock = Lock()
+
+
+def get_dependency_graph(graph: RecipeGraph) -> DependencyGraph:
+    """Return the dependency graph for a recipe graph, building it once per graph"""
+    global _dependency_graph
+
+    deps = _dependency_graph
+    if deps is not None and deps.graph is graph:
+        return deps
+
+    with _dependency_lock:
+        if _dependency_graph is None or _dependency_graph.graph is not graph:
+            _dependency_graph = DependencyGraph(graph, get_scaling_engine(graph))
+        return _dependency_graph
@@ -0,0 +1,59 @@
+"""
+MEP Sheet Cache
+Content-addressed LRU cache for calculate_all_sheets output
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional
+
+
+MEP_CACHE_SIZE = 64  # cached sheet sets (one per distinct production content)
+
+
+def mep_cache_key(items: List[Dict], next_day_items: Optional[List[Dict]], recipe_fingerprint: str) -> str:
+    """
+    Hash of everything the sheets depend on: the run's items, the next day's items
+    (for the Emmy feed) and the recipe graph fingerprint
+    """
+    def normalize(production_items):
+        if production_items is None:
+            return None
+        return sorted([item['recipe_id'], item['quantity']] for item in production_items)
+
+    payload = json.dumps([normalize(items), normalize(next_day_items), recipe_fingerprint])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MEPSheetCache:
+    """
+    LRU cache of computed MEP sheets, keyed by mep_cache_key.
+    Keys change whenever the inputs do, so entries never need invalidating; old ones age out.
+    """
+
+    def __init__(self, max_size: int = MEP_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            sheets = self.entries.get(key)
+            if sheets is not None:
+                self.entries.move_to_end(key)
+            return sheets
+
+    def put(self, key: str, sheets: Dict):
+        with self.lock:
+            self.entries[key] = sheets
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+mep_sheet_cache = MEPSheetCache()
@@ -0,0 +1,437 @@
+"""
+MEP (Mise en Place) Calculation Core
+Pure calculation of the MEP sheets from a recipe graph and production items.
+No Flask, ORM or database access: everything it needs is passed in, so it runs
+in process pools, benchmarks and batch jobs as well as behind the Flask routes
+(see mep_calculator.MEPCalculator for the database-backed adapter).
+"""
+from datetime import timedelta
+from recipe_graph import RecipeGraph
+from scaling import get_scaling_engine
+from dependency_resolver import Requirements, get_dependency_graph
+from batch_splitter import BatchSplitter
+from typing import Dict, List, Optional, Set
+
+
+class MEPSheetCalculator:
+    """Calculate MEP sheets for bakery production"""
+
+    def __init__(self, graph: RecipeGraph, production_items: List[Dict], delivery_date=None,
+                 next_day_items: Optional[List[Dict]] = None, requirements: Requirements = None,
+                 next_day_requirements: Requirements = None):
+        """
+        graph: recipe graph to read recipes from
+        production_items: [{'recipe_id': int, 'quantity': int}, ...]
+        delivery_date: date object for the delivery date (used for Emmy Feed calculation)
+        next_day_items: next day's production items (no Emmy Feed without them)
+        requirements / next_day_requirements: already resolved requirements for these items / the next day's
+        """
+        self.production_items = production_items
+        self.delivery_date = delivery_date
+        self.next_day_items = next_day_items
+        self.graph = graph
+        self.engine = get_scaling_engine(self.graph)
+        self.dependencies = get_dependency_graph(self.graph)
+        self.splitter = BatchSplitter(self.graph)
+        self._requirements = requirements
+        self.next_day_requirements = next_day_requirements
+        self._bread_batches = None
+
+    @property
+    def requirements(self) -> Requirements:
+        """Resolved dough/starter/soaker/culture totals, shared by every sheet"""
+        if self._requirements is None:
+            self._requirements = self.dependencies.resolve(self.production_items)
+        return self._requirements
+
+    def calculate_all_sheets(self) -> Dict:
+        """
+        Calculate all MEP sheets for a mix date:
+        1. Today's Mix Sheet (mix this morning)
+        2. Morning Emmy Feed (feed Emmy this morning)
+        3. Starter Prep Sheet (should have been built last night for today's mix)
+        4. Soak Prep Sheet (should have been prepared last night for today's mix)
+        5. MEP Ingredient List (should have been measured last night for today's mix)
+
+        All sheets are for the SAME production run:
+        - Mix date: When doughs are mixed (morning)
+        - Prep date: Evening before mix date (when starters/soakers were built)
+        - Delivery date: Day after mix date (when breads are baked and delivered)
+        """
+        mix_sheet = self.calculate_mix_sheet()
+        morning_emmy = self.calculate_morning_emmy_feed()
+        starter_sheet = self.calculate_starter_sheet()
+        soak_sheet = self.calculate_soak_sheet()
+        mep_ingredients = self.calculate_mep_ingredients(starter_sheet, soak_sheet)
+
+        return {
+            'mix_sheet': mix_sheet,
+            'morning_emmy_feed': morning_emmy,
+            'starter_sheet': starter_sheet,
+            'soak_sheet': soak_sheet,
+            'mep_ingredients': mep_ingredients
+        }
+
+    def plan_bread_batches(self) -> List[Dict]:
+        """
+        Doughs to mix, shared by the mix sheet and the MEP ingredient list.
+        A dough that other breads are carved from (e.g. Multigrain from Italian) is mixed
+        with the extra dough included; doughs larger than the mixer are split into batches.
+        """
+        if self._bread_batches is not None:
+            return self._bread_batches
+
+        requirements = self.requirements
+        doughs = []
+        planned = set()
+
+        def plan(recipe, quantity):
+            if recipe.id in planned:
+                return
+            planned.add(recipe.id)
+
+            # A dough with no loaves of its own still has to be mixed for the breads carved from it
+            for dep in requirements.dough_suppliers(recipe):
+                if dep.supplier.id not in requirements.loaves:
+                    plan(dep.supplier, 0)
+
+            doughs.append((recipe, quantity))
+
+        for recipe, quantity in requirements.breads:
+            plan(recipe, quantity)
+
+        # Split every dough first, so carved breads know which batch their dough comes out of
+        splits = {
+            recipe.id: self.splitter.split_dough(recipe, quantity, requirements.dough_consumers(recipe))
+            for recipe, quantity in doughs
+        }
+        source_batches = {}
+        for supplier_id, dough_batches in splits.items():
+            if len(dough_batches) > 1:
+                for dough_batch in dough_batches:
+                    for consumer, dep, grams in dough_batch.carve_outs:
+                        source_batches[(supplier_id, consumer.id)] = dough_batch.number
+
+        batches = []
+        for recipe, quantity in doughs:
+            dough_batches = splits[recipe.id]
+            for dough_batch in dough_batches:
+                batches.append(self._dough_batch_entry(recipe, dough_batch, len(dough_batches), source_batches))
+
+        self._bread_batches = batches
+        return batches
+
+    def _dough_batch_entry(self, recipe, dough_batch, batch_count, source_batches) -> Dict:
+        """Batch entry for one mixer load of a bread, with notes on carved-out dough"""
+        requirements = self.requirements
+
+        entry = {
+            'recipe': recipe,
+            'name': recipe.name if batch_count == 1 else f'{recipe.name} - BATCH {dough_batch.number}',
+            'quantity': dough_batch.loaves,
+            'total_weight': dough_batch.weight
+        }
+        if batch_count > 1:
+            entry['batch_number'] = dough_batch.number
+
+        if dough_batch.carve_outs:
+            entry['extra_dough_for'] = [{
+                'name': consumer.name,
+                'quantity': requirements.loaves.get(consumer.id, 0),
+                'amount': round(grams, 1)
+            } for consumer, dep, grams in dough_batch.carve_outs]
+
+        dough_from = []
+        for dep in requirements.dough_suppliers(recipe):
+            source = {
+                'recipe_name': dep.supplier.name,
+                'ingredient_name': dep.line.ingredient.name,
+                'amount': round(dep.coefficient * dough_batch.weight, 1)
+            }
+            if (dep.supplier.id, recipe.id) in source_batches:
+                source['batch_number'] = source_batches[(dep.supplier.id, recipe.id)]
+            dough_from.append(source)
+        if dough_from:
+            entry['dough_from'] = dough_from
+            # Legacy key read by the MEP page and scripts
+            entry['italian_dough_amount'] = round(sum(d['amount'] for d in dough_from), 1)
+
+        return entry
+
+    def calculate_subtree(self, recipe_ids: Set[int], include_emmy_feed: bool = True) -> Dict:
+        """
+        Same sheets as calculate_all_sheets, but only the entries for these recipes
+        (e.g. DependencyGraph.affected() of the breads whose orders changed).
+        Totals still come from the whole day, since shared starters depend on every bread.
+        """
+        starter_sheet = self.calculate_starter_sheet(recipe_ids)
+        soak_sheet = self.calculate_soak_sheet(recipe_ids)
+
+        return {
+            'mix_sheet': self.calculate_mix_sheet(recipe_ids),
+            'morning_emmy_feed': self.calculate_morning_emmy_feed() if include_emmy_feed else None,
+            'starter_sheet': starter_sheet,
+            'soak_sheet': soak_sheet,
+            'mep_ingredients': self.calculate_mep_ingredients(starter_sheet, soak_sheet, recipe_ids)
+        }
+
+    def _prep_in_scope(self, prep: Dict, recipe_ids: Optional[Set[int]]) -> bool:
+        """Whether a starter/soaker belongs to the recipes being calculated (all when recipe_ids is None)"""
+        if recipe_ids is None:
+            return True
+        if prep['recipe'] is not None:
+            return prep['recipe'].id in recipe_ids
+        return any(recipe.id in recipe_ids for recipe, grams in prep['recipes_needing'])
+
+    def calculate_mix_sheet(self, recipe_ids: Optional[Set[int]] = None) -> Dict:
+        """
+        Today's Mix Sheet - what to mix right now
+        Doughs larger than the mixer capacity are split into batches
+        """
+        breads = []
+
+        for batch in self.plan_bread_batches():
+            recipe = batch['recipe']
+            if recipe_ids is not None and recipe.id not in recipe_ids:
+                continue
+            bread_info = {key: value for key, value in batch.items() if key != 'recipe'}
+            bread_info['loaf_weight'] = recipe.loaf_weight
+            bread_info['ingredients'] = self._calculate_bread_ingredients(recipe, batch['quantity'], batch['total_weight'])
+            breads.append(bread_info)
+
+        return {'breads': breads}
+
+    def _dough_line_indexes(self, recipe) -> set:
+        """Ingredient lines that are another bread's dough (carved out, not weighed)"""
+        indexes = {dep.index for dep in self.requirements.dough_suppliers(recipe)}
+        indexes.update(i for i, ri in enumerate(recipe.ingredients) if ri.ingredient.category == 'dough')
+        return indexes
+
+    def _calculate_bread_ingredients(self, recipe, quantity, total_weight):
+        """Helper method to calculate ingredients for a bread batch"""
+        skip = self._dough_line_indexes(recipe)
+
+        ingredients = []
+        for index, (ri, amount) in enumerate(self.engine.scale(recipe, total_weight)):
+            # Skip carved-out dough (handled separately)
+            if index in skip:
+                continue
+
+            ingredients.append({
+                'name': ri.ingredient.name,
+                'amount_grams': round(amount, 1),
+                'category': ri.ingredient.category
+            })
+
+        return ingredients
+
+    def _calculate_mep_bread_ingredients(self, recipe, quantity, total_weight):
+        """Helper method to calculate ingredients for MEP (skips starters, soakers, and carved-out dough)"""
+        skip = self._dough_line_indexes(recipe)
+
+        ingredients = []
+        for index, (ri, amount) in enumerate(self.engine.scale(recipe, total_weight)):
+            # Skip starters, soakers, and carved-out dough (handled separately)
+            if ri.ingredient.category in ['starter', 'soaker']:
+                continue
+            if index in skip:
+                continue
+
+            ingredients.append({
+                'name': ri.ingredient.name,
+                'amount_grams': round(amount, 1),
+                'category': ri.ingredient.category
+            })
+
+        # Sort ingredients by category for better organization
+        ingredients.sort(key=lambda x: (x['category'], x['name']))
+
+        return ingredients
+
+    def calculate_starter_sheet(self, recipe_ids: Optional[Set[int]] = None) -> Dict:
+        """
+        Starter Prep Sheet - what starters should have been built last night for today's mix
+        (These were prepared on prep date evening for this morning's mix)
+        """
+        starter_list = []
+
+        for starter in self.requirements.prep_items('starter'):
+            if not self._prep_in_scope(starter, recipe_ids):
+                continue
+            starter_list.extend(self._prep_batches(starter, 'starter_name'))
+
+        return {'starters': starter_list}
+
+    def _prep_batches(self, prep: Dict, name_key: str) -> List[Dict]:
+        """Sheet entries for one starter/soaker, split into batches when it is more than the mixer takes"""
+        name = prep['name']
+        prep_recipe = prep['recipe']
+        total_needed = prep['total_grams']
+        recipes_needing = [{
+            'recipe': recipe.name,
+            'amount_grams': round(grams, 1)
+        } for recipe, grams in prep['recipes_needing']]
+
+        batch_weights = self.splitter.split_weight(prep_recipe, total_needed) if prep_recipe else [total_needed]
+
+        if len(batch_weights) == 1:
+            # No split needed
+            ingredients = []
+            if prep_recipe:
+                # Calculate ingredients from its total weight
+                for ri, amount in self.engine.scale(prep_recipe, total_needed):
+                    ingredients.append({
+                        'name': ri.ingredient.name,
+                        'amount_grams': round(amount, 1)
+                    })
+
+            return [{
+                name_key: name,
+                'total_grams': round(total_needed, 1),
+                'recipes_needing': recipes_needing,
+                'ingredients': ingredients
+            }]
+
+        # Split into equal batches
+        batch_weight = round(batch_weights[0], -1)  # Round to nearest 10g
+
+        batch_ingredients = []
+        for ri, amount in self.engine.scale(prep_recipe, batch_weight):
+            batch_ingredients.append({
+                'name': ri.ingredient.name,
+                'amount_grams': round(amount, -1)  # Round to nearest 10g
+            })
+
+        return [{
+            name_key: f'{name} - BATCH {number}',
+            'total_grams': batch_weight,
+            'recipes_needing': recipes_needing if number == 1 else [],  # Don't repeat recipes for later batches
+            'ingredients': [dict(ing) for ing in batch_ingredients],
+            'batch_number': number
+        } for number in range(1, len(batch_weights) + 1)]
+
+    def calculate_morning_emmy_feed(self) -> Dict:
+        """
+        Morning Emmy Feed - calculate how much Emmy to feed in the morning
+        This uses yesterday's leftover Levain to feed Emmy
+        The fed Emmy will be used for tonight's Levain build (for tomorrow's production)
+        """
+        # If no delivery date provided, can't calculate next day's Emmy
+        if not self.delivery_date:
+            return {'emmy_feed': None, 'feeds': []}
+
+        # NEXT day's production (delivery_date + 1)
+        next_delivery_date = self.delivery_date + timedelta(days=1)
+        next_day_items = self.next_day_items
+        if self.next_day_requirements is not None:
+            next_day_items = self.next_day_requirements.breads
+
+        if not next_day_items:
+            # No production tomorrow, so no Emmy feed needed
+            return {'emmy_feed': None, 'feeds': []}
+
+        # Resolve NEXT day's production down to the cultures its starters are built from
+        next_requirements = self.next_day_requirements
+        if next_requirements is None:
+            next_requirements = self.dependencies.resolve(next_day_items)
+
+        feeds = []
+        for culture, total_needed in next_requirements.culture_totals():
+            feed = self._culture_feed(culture, total_needed, next_delivery_date)
+            if feed:
+                feeds.append(feed)
+
+        return {
+            'emmy_feed': feeds[0] if feeds else None,
+            'feeds': feeds
+        }
+
+    def _culture_feed(self, culture, total_needed, next_delivery_date) -> Optional[Dict]:
+        """Morning feed for one perpetual culture, fed from yesterday's saved starter"""
+        if total_needed == 0:
+            return None
+
+        # Culture recipe, e.g. Emmy: 100% flour + 100% water + 25% levain = 225% total
+        total_percentage = sum(ri.percentage for ri in culture.ingredients if ri.is_percentage)
+        if total_percentage == 0:
+            return None
+
+        carry_over = {dep.index: dep for dep in self.dependencies.dependencies[culture.id] if dep.carry_over}
+
+        feed_ingredients = []
+        for index, (ri, amount) in enumerate(self.engine.scale(culture, total_needed)):
+            # The starter saved from yesterday goes into the feed
+            ingredient_name = ri.ingredient.name
+            if index in carry_over:
+                ingredient_name = f"Yesterday's {ingredient_name} (saved)"
+
+            feed_ingredients.append({
+                'name': ingredient_name,
+                'amount_grams': round(amount, 1),
+                'category': ri.ingredient.category
+            })
+
+        # Format next delivery date for display
+        next_date_str = next_delivery_date.strftime('%m/%d')
+        culture_name = culture.name.split('(')[0].strip()
+        saved = ' + '.join(dep.line.ingredient.name for dep in carry_over.values())
+
+        return {
+            'culture_name': culture.name,
+            'total_grams': round(total_needed, 1),
+            'ingredients': feed_ingredients,
+            'note': f'Feed {culture_name} this morning using saved {saved} from yesterday. This will be used tonight to build starters for tomorrow\'s mix ({next_date_str} delivery).'
+        }
+
+    def calculate_soak_sheet(self, recipe_ids: Optional[Set[int]] = None) -> Dict:
+        """
+        Soak Prep Sheet - what soaks should have been prepared last night for today's mix
+        (These were prepared on prep date evening for this morning's mix)
+        """
+        soaker_list = []
+
+        for soaker in self.requirements.prep_items('soaker'):
+            if not self._prep_in_scope(soaker, recipe_ids):
+                continue
+            soaker_list.extend(self._prep_batches(soaker, 'soaker_name'))
+
+        return {'soakers': soaker_list}
+
+    def calculate_mep_ingredients(self, starter_sheet: Dict = None, soak_sheet: Dict = None,
+                                  recipe_ids: Optional[Set[int]] = None) -> Dict:
+        """
+        MEP Ingredient List - ingredients that should have been measured last night
+        Ingredients organized by bread type - each bread gets its own bin of pre-measured ingredients
+        (These were measured on prep date evening for this morning's mix)
+        """
+        # Get starters and soakers (prepared separately)
+        if starter_sheet is None:
+            starter_sheet = self.calculate_starter_sheet(recipe_ids)
+        if soak_sheet is None:
+            soak_sheet = self.calculate_soak_sheet(recipe_ids)
+
+        # Organize bread ingredients by bread type, one bin per dough batch
+        breads = []
+
+        for batch in self.plan_bread_batches():
+            recipe = batch['recipe']
+            if recipe_ids is not None and recipe.id not in recipe_ids:
+                continue
+            bread_info = {key: value for key, value in batch.items() if key not in ('recipe', 'name')}
+            bread_info['bread_name'] = batch['name']
+            bread_info['ingredients'] = self._calculate_mep_bread_ingredients(recipe, batch['quantity'], batch['total_weight'])
+            breads.append(bread_info)
+
+        return {
+            'starters': starter_sheet['starters'],
+            'soakers': soak_sheet['soakers'],
+            'breads': breads
+        }
+
+
+def calculate_mep_sheets(graph: RecipeGraph, production_items: List[Dict], delivery_date=None,
+                         next_day_items: Optional[List[Dict]] = None) -> Dict:
+    """All MEP sheets for one day (module-level, so it can be sent to a process pool)"""
+    calculator = MEPSheetCalculator(graph, production_items, delivery_date=delivery_date,
+                                    next_day_items=next_day_items)
+    return calculator.calculate_all_sheets()
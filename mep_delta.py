@@ -0,0 +1,114 @@
+"""
+MEP Sheet Delta
+Compares a printed set of MEP sheets with the current one, entry by entry
+"""
+from typing import Dict, List, Optional
+
+
+# (sheet, list key, entry name key, numeric fields compared)
+SHEET_SECTIONS = [
+    ('mix_sheet', 'breads', 'name', ('quantity', 'total_weight')),
+    ('starter_sheet', 'starters', 'starter_name', ('total_grams',)),
+    ('soak_sheet', 'soakers', 'soaker_name', ('total_grams',)),
+    ('mep_ingredients', 'breads', 'bread_name', ('quantity', 'total_weight')),
+]
+
+
+def base_name(name: str) -> str:
+    """'Levain - BATCH 2' -> 'Levain'"""
+    return name.split(' - BATCH ')[0]
+
+
+def _entries(sheets: Optional[Dict], sheet: str, key: str, name_key: str, scope_names=None) -> Dict[str, Dict]:
+    entries = {}
+    for entry in ((sheets or {}).get(sheet) or {}).get(key, []):
+        name = entry.get(name_key)
+        if scope_names is None or base_name(name) in scope_names:
+            entries[name] = entry
+    return entries
+
+
+def _ingredient_changes(old: List[Dict], new: List[Dict]) -> List[Dict]:
+    """Ingredients whose grams differ (missing on one side counts as 0)"""
+    old_grams = {ing['name']: ing['amount_grams'] for ing in old or []}
+    new_grams = {ing['name']: ing['amount_grams'] for ing in new or []}
+
+    changes = []
+    for name in list(old_grams) + [n for n in new_grams if n not in old_grams]:
+        before = old_grams.get(name, 0)
+        after = new_grams.get(name, 0)
+        if round(after - before, 1) != 0:
+            changes.append({'name': name, 'old': before, 'new': after, 'delta': round(after - before, 1)})
+    return changes
+
+
+def diff_entry(name: str, old: Optional[Dict], new: Optional[Dict], fields) -> Optional[Dict]:
+    """Change record for one sheet entry, or None when nothing on it changed"""
+    if old is None:
+        return {'name': name, 'status': 'added', 'entry': new}
+    if new is None:
+        return {'name': name, 'status': 'removed', 'entry': old}
+
+    change = {'name': name, 'status': 'changed'}
+    for field in fields:
+        if old.get(field) != new.get(field):
+            change[field] = [old.get(field), new.get(field)]
+    ingredients = _ingredient_changes(old.get('ingredients'), new.get('ingredients'))
+    if ingredients:
+        change['ingredients'] = ingredients
+    for field in ('dough_from', 'extra_dough_for'):
+        if old.get(field) != new.get(field):
+            change[field] = [old.get(field), new.get(field)]
+
+    return change if len(change) > 2 else None
+
+
+def _batch_counts(old: Dict[str, Dict], new: Dict[str, Dict]) -> Dict[str, List[int]]:
+    """{recipe: [printed batches, current batches]} for recipes whose batch count changed"""
+    def counts(entries):
+        result = {}
+        for name in entries:
+            result[base_name(name)] = result.get(base_name(name), 0) + 1
+        return result
+
+    old_counts, new_counts = counts(old), counts(new)
+    return {
+        name: [old_counts.get(name, 0), new_counts.get(name, 0)]
+        for name in sorted(set(old_counts) | set(new_counts))
+        if old_counts.get(name, 0) != new_counts.get(name, 0)
+    }
+
+
+def diff_sheets(old: Dict, new: Dict, scope_names=None, include_emmy_feed: bool = True) -> Dict:
+    """
+    Differences between two calculate_all_sheets results.
+    scope_names limits the comparison to entries for those recipes / ingredients
+    (new may then be a calculate_subtree result); None compares everything.
+    """
+    result = {}
+    for sheet, key, name_key, fields in SHEET_SECTIONS:
+        old_entries = _entries(old, sheet, key, name_key, scope_names)
+        new_entries = _entries(new, sheet, key, name_key, scope_names)
+
+        changes = []
+        for name in list(old_entries) + [n for n in new_entries if n not in old_entries]:
+            change = diff_entry(name, old_entries.get(name), new_entries.get(name), fields)
+            if change:
+                changes.append(change)
+
+        result[sheet] = {'changes': changes, 'batch_counts': _batch_counts(old_entries, new_entries)}
+
+    if include_emmy_feed:
+        old_feeds = {f['culture_name']: f for f in ((old or {}).get('morning_emmy_feed') or {}).get('feeds', [])}
+        new_feeds = {f['culture_name']: f for f in ((new or {}).get('morning_emmy_feed') or {}).get('feeds', [])}
+        changes = []
+        for name in list(old_feeds) + [n for n in new_feeds if n not in old_feeds]:
+            change = diff_entry(name, old_feeds.get(name), new_feeds.get(name), ('total_grams',))
+            if change:
+                changes.append(change)
+        result['morning_emmy_feed'] = {'changes': changes}
+
+    result['changed'] = any(
+        section['changes'] or section.get('batch_counts') for section in result.values()
+    )
+    return result
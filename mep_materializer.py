@@ -0,0 +1,279 @@
+"""
+Materialized MEP Sheets
+Persists calculate_all_sheets output per delivery date and refreshes it in a background thread
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from models import db, MEPSheet, ProductionRun
+from mep_core import MEPSheetCalculator
+from mep_cache import mep_sheet_cache, mep_cache_key
+from recipe_graph import RecipeGraph
+from recipe_store import get_recipe_graph
+from dependency_resolver import get_dependency_graph
+from upsert import dialect_insert
+
+
+def affected_delivery_dates(dates) -> set:
+    """Delivery dates whose sheets depend on production for these dates (the day itself and the day before, for the Emmy feed)"""
+    if not isinstance(dates, (list, set, tuple)):
+        dates = [dates]
+    affected = set()
+    for target_date in dates:
+        affected.add(target_date)
+        affected.add(target_date - timedelta(days=1))
+    return affected
+
+
+def mark_mep_sheets_stale(dates=None):
+    """
+    Flag materialized sheets as out of date (all of them when dates is None); caller commits.
+    Every mark bumps the row's stale_version, which store_mep_sheets checks before writing. Dates
+    without a row get an empty stale one, so a pass that found no row cannot insert older sheets either.
+    """
+    table = MEPSheet.__table__
+    if dates is None:
+        db.session.execute(table.update().values(is_stale=True, stale_version=table.c.stale_version + 1))
+        return
+
+    statement = dialect_insert(table).values([{
+        'delivery_date': delivery_date, 'input_hash': '', 'sheets': '{}', 'is_stale': True, 'stale_version': 1
+    } for delivery_date in sorted(affected_delivery_dates(dates))])
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['delivery_date'],
+        set_={'is_stale': True, 'stale_version': table.c.stale_version + 1}
+    ))
+
+
+def is_fresh(row: Optional[MEPSheet], graph: RecipeGraph) -> bool:
+    """A stored row can be served as-is: not flagged stale and computed from this recipe graph"""
+    return row is not None and not row.is_stale and row.recipe_fingerprint == graph.fingerprint
+
+
+def load_production_items(dates) -> Dict:
+    """Production runs for many dates in one query: {date: (batch_id, [{'recipe_id', 'quantity'}])}"""
+    runs = ProductionRun.query.options(
+        selectinload(ProductionRun.items)
+    ).filter(
+        ProductionRun.date.in_(list(dates))
+    ).order_by(ProductionRun.id).all()
+
+    items_by_date = {}
+    for run in runs:
+        # Same run per date as ProductionRun.query.filter_by(date=...).first()
+        if run.date in items_by_date:
+            continue
+        items_by_date[run.date] = (run.batch_id, [
+            {'recipe_id': item.recipe_id, 'quantity': item.quantity}
+            for item in run.items
+        ])
+    return items_by_date
+
+
+def compute_mep_sheets_for_dates(dates, runs: Dict, graph: RecipeGraph = None) -> Dict:
+    """
+    Sheets for many delivery dates in one pass from preloaded runs (see load_production_items).
+    Each day's resolved requirements are reused as the previous day's Emmy feed input.
+    Returns {date: {'sheets', 'batch_id', 'input_hash', 'recipe_fingerprint'} or None when there is no production run}.
+    """
+    if graph is None:
+        graph = get_recipe_graph()
+    dependencies = get_dependency_graph(graph)
+
+    requirements = {}
+
+    def resolved(day):
+        if day not in requirements:
+            requirements[day] = dependencies.resolve(runs[day][1])
+        return requirements[day]
+
+    results = {}
+    for delivery_date in sorted(dates):
+        if delivery_date not in runs:
+            results[delivery_date] = None
+            continue
+
+        batch_id, items = runs[delivery_date]
+        next_date = delivery_date + timedelta(days=1)
+        next_day_items = runs[next_date][1] if next_date in runs else []
+
+        key = mep_cache_key(items, next_day_items, graph.fingerprint)
+        sheets = mep_sheet_cache.get(key)
+        if sheets is None:
+            calculator = MEPSheetCalculator(
+                graph, items, delivery_date=delivery_date,
+                next_day_items=next_day_items,
+                requirements=resolved(delivery_date),
+                next_day_requirements=resolved(next_date) if next_date in runs else None
+            )
+            sheets = calculator.calculate_all_sheets()
+            mep_sheet_cache.put(key, sheets)
+
+        results[delivery_date] = {
+            'sheets': sheets, 'batch_id': batch_id, 'input_hash': key, 'recipe_fingerprint': graph.fingerprint
+        }
+
+    return results
+
+
+def compute_mep_sheets(delivery_date, runs: Dict, graph: RecipeGraph = None) -> Optional[Dict]:
+    """
+    Sheets for one delivery date from preloaded runs (see load_production_items).
+    Returns {'sheets', 'batch_id', 'input_hash', 'recipe_fingerprint'} or None when there is no production run.
+    """
+    return compute_mep_sheets_for_dates([delivery_date], runs, graph)[delivery_date]
+
+
+def store_mep_sheets(delivery_date, computed: Optional[Dict], row: Optional[MEPSheet]):
+    """
+    Write (or remove, when computed is None) the materialized row for a date; caller commits.
+    row is the date's row as read before computing (None if there was none), see store_many_mep_sheets.
+    """
+    store_many_mep_sheets([(delivery_date, computed, row)])
+
+
+def store_many_mep_sheets(writes):
+    """
+    Write or remove materialized rows, writes: [(delivery_date, computed or None, row or None)]; caller commits.
+    Read the rows before the production runs the sheets are computed from: a row is only written if it has
+    not been marked stale again since (same stale_version), so a pass that computed from older production
+    never overwrites newer sheets or flags them fresh. One statement per kind of write.
+    """
+    table = MEPSheet.__table__
+    unchanged = and_(table.c.id == bindparam('row_id'), table.c.stale_version == bindparam('seen_version'))
+    inserts, deletes, refreshes, rewrites = [], [], [], []
+    now = datetime.utcnow()
+    for delivery_date, computed, row in writes:
+        if row is None:
+            if computed is not None:
+                # A clash on delivery_date at commit means a newer pass or change created the row first
+                inserts.append(MEPSheet(
+                    delivery_date=delivery_date,
+                    input_hash=computed['input_hash'],
+                    recipe_fingerprint=computed['recipe_fingerprint'],
+                    batch_id=computed['batch_id'],
+                    sheets=json.dumps(computed['sheets']),
+                    is_stale=False
+                ))
+            continue
+
+        params = {'row_id': row.id, 'seen_version': row.stale_version}
+        if computed is None:
+            deletes.append(params)
+        elif row.input_hash == computed['input_hash']:
+            # Inputs unchanged since the last computation (the hash covers the recipe fingerprint)
+            refreshes.append({**params, 'new_fingerprint': computed['recipe_fingerprint']})
+        else:
+            rewrites.append({
+                **params,
+                'new_fingerprint': computed['recipe_fingerprint'],
+                'new_hash': computed['input_hash'],
+                'new_batch_id': computed['batch_id'],
+                'new_sheets': json.dumps(computed['sheets'])
+            })
+
+    if inserts:
+        db.session.add_all(inserts)
+    if deletes:
+        db.session.execute(table.delete().where(unchanged), deletes)
+    if refreshes:
+        db.session.execute(table.update().where(unchanged).values(
+            recipe_fingerprint=bindparam('new_fingerprint'), is_stale=False
+        ), refreshes)
+    if rewrites:
+        db.session.execute(table.update().where(unchanged).values(
+            recipe_fingerprint=bindparam('new_fingerprint'),
+            input_hash=bindparam('new_hash'),
+            batch_id=bindparam('new_batch_id'),
+            sheets=bindparam('new_sheets'),
+            is_stale=False,
+            computed_at=now
+        ), rewrites)
+
+
+def materialize_mep_sheets(dates) -> int:
+    """Recompute and persist the sheets for these delivery dates; returns how many were written"""
+    dates = set(dates)
+    if not dates:
+        return 0
+
+    # Rows first: their stale_version is what the writes below are conditional on
+    rows = {row.delivery_date: row for row in MEPSheet.query.filter(MEPSheet.delivery_date.in_(list(dates))).all()}
+    graph = get_recipe_graph()
+    runs = load_production_items(dates | {d + timedelta(days=1) for d in dates})
+
+    computed = compute_mep_sheets_for_dates(dates, runs, graph)
+    try:
+        store_many_mep_sheets([
+            (delivery_date, computed[delivery_date], rows.get(delivery_date)) for delivery_date in sorted(dates)
+        ])
+        db.session.commit()
+    except IntegrityError:
+        # Another pass or a newer change created one of the new rows first; its rows win
+        db.session.rollback()
+        return 0
+    return len(dates)
+
+
+class MEPSheetWorker:
+    """
+    Background thread that recomputes materialized sheets after orders change.
+    Dates queued while a refresh is running are coalesced into the next pass.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pending = set()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def enqueue(self, dates):
+        dates = affected_delivery_dates(dates)
+        if not dates:
+            return
+
+        with self.condition:
+            self.pending.update(dates)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='mep-sheet-worker', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                dates = self.pending
+                self.pending = set()
+
+            with self.app.app_context():
+                try:
+                    materialize_mep_sheets(dates)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f'MEP sheet refresh failed for {sorted(dates)}: {e}')
+                finally:
+                    db.session.remove()
+
+
+_worker: Optional[MEPSheetWorker] = None
+_worker_lock = threading.Lock()
+
+
+def refresh_mep_sheets(app, dates: List):
+    """Recompute sheets affected by production changes on these dates (in the background unless disabled)"""
+    global _worker
+
+    if not app.config.get('MEP_BACKGROUND_REFRESH', True):
+        materialize_mep_sheets(affected_delivery_dates(dates))
+        return
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = MEPSheetWorker(app)
+    _worker.enqueue(dates)
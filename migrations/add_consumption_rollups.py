@@ -0,0 +1,30 @@
+"""
+Migration script to add the ingredient consumption rollups
+
+This script creates:
+1. consumption_daily table - Grams per production date, ingredient and recipe
+2. consumption_weekly table - The same per week (starting Monday)
+3. consumption_monthly table - The same per calendar month
+4. Their initial contents, summed from the stored production ingredient amounts
+   (run add_production_ingredient_snapshots.py first)
+"""
+
+from app import app, db
+from consumption import rebuild_consumption
+
+def run_migration():
+    """Create the tables and fill them from production runs"""
+    with app.app_context():
+        print("Creating consumption_daily, consumption_weekly and consumption_monthly tables...")
+
+        # Create all tables (will skip existing ones)
+        db.create_all()
+
+        rows = rebuild_consumption()
+        db.session.commit()
+        print(f"Filled consumption_daily with {rows} rows")
+
+        print("\nMigration completed successfully!")
+
+if __name__ == '__main__':
+    run_migration()
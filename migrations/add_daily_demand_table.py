@@ -0,0 +1,28 @@
+"""
+Migration script to add the daily demand summary
+
+This script creates:
+1. daily_demand table - Total loaves per delivery date and recipe, kept up to date
+   as orders change
+2. Its initial contents, summed from the existing orders
+"""
+
+from app import app, db
+from daily_demand import rebuild_daily_demand
+
+def run_migration():
+    """Create the table and fill it from the orders"""
+    with app.app_context():
+        print("Creating daily_demand table...")
+
+        # Create all tables (will skip existing ones)
+        db.create_all()
+
+        rows = rebuild_daily_demand()
+        db.session.commit()
+        print(f"Filled daily_demand with {rows} date/recipe totals")
+
+        print("\nMigration completed successfully!")
+
+if __name__ == '__main__':
+    run_migration()
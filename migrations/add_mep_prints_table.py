@@ -0,0 +1,21 @@
+"""
+Migration script to add the MEP print log
+
+This script creates:
+1. mep_prints table - MEP sheets as printed per delivery date, for the "changes since print" view
+"""
+
+from app import app, db
+
+def run_migration():
+    """Create the table"""
+    with app.app_context():
+        print("Creating mep_prints table...")
+
+        # Create all tables (will skip existing ones)
+        db.create_all()
+
+        print("\nMigration completed successfully!")
+
+if __name__ == '__main__':
+    run_migration()
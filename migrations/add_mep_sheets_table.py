@@ -0,0 +1,30 @@
+"""
+Migration script to add the materialized MEP sheets table
+
+This script creates:
+1. mep_sheets table - Computed MEP sheets per delivery date, tagged with an input hash
+
+And materializes sheets for every existing production run.
+"""
+
+from app import app, db
+from models import ProductionRun
+from mep_materializer import materialize_mep_sheets
+
+def run_migration():
+    """Create the table and fill it from existing production runs"""
+    with app.app_context():
+        print("Creating mep_sheets table...")
+
+        # Create all tables (will skip existing ones)
+        db.create_all()
+
+        print("Materializing MEP sheets for existing production runs...")
+        dates = set(run.date for run in ProductionRun.query.all())
+        materialize_mep_sheets(dates)
+
+        print("\nMigration completed successfully!")
+        print(f"Total delivery dates: {len(dates)}")
+
+if __name__ == '__main__':
+    run_migration()
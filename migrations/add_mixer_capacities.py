@@ -0,0 +1,44 @@
+"""
+Migration script to seed mixer capacities
+
+The MEP batch splitter reads mixer_capacities instead of hardcoded thresholds.
+This script carries the old limits over as capacity rows (see legacy_capacities
+in batch_splitter.py):
+1. Italian - split above 110 loaves (110 x loaf weight, carved-out dough included)
+2. Every starter with "levain" in its name (Levain, Itl Levain, ...) - split above 6999g
+
+Recipes that already have a capacity row are left alone.
+"""
+
+from app import app, db
+from models import MixerCapacity, Recipe
+from recipe_store import invalidate_recipe_graph
+from batch_splitter import legacy_capacities
+
+def run_migration():
+    """Create the table if needed and seed the legacy split limits"""
+    with app.app_context():
+        print("Seeding mixer capacities...")
+
+        # Create all tables (will skip existing ones)
+        db.create_all()
+
+        capacities = legacy_capacities(Recipe.query.order_by(Recipe.id).all())
+        if not capacities:
+            print("  [SKIP] No Italian or Levain recipes found")
+
+        for recipe, max_batch_weight in capacities:
+            if MixerCapacity.query.filter_by(recipe_id=recipe.id).first():
+                print(f"  [EXISTS] Capacity for {recipe.name}")
+                continue
+
+            db.session.add(MixerCapacity(recipe_id=recipe.id, max_batch_weight=max_batch_weight))
+            print(f"  + {recipe.name}: {max_batch_weight:,.0f}g")
+
+        invalidate_recipe_graph()
+        db.session.commit()
+
+        print("\nMigration completed successfully!")
+
+if __name__ == '__main__':
+    run_migration()
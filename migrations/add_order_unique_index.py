@@ -0,0 +1,49 @@
+"""
+Migration script to make orders unique per customer, bread and delivery date
+
+Duplicate orders are merged first: the oldest row keeps the summed quantity
+(production already counted every duplicate, so totals do not change).
+Then the unique index uq_orders_customer_recipe_date is created, which
+/api/orders/bulk upserts against (INSERT ... ON CONFLICT DO UPDATE).
+"""
+
+from sqlalchemy import text
+from app import app, db
+from models import Order
+
+def run_migration():
+    """Merge duplicate orders and add the unique index"""
+    with app.app_context():
+        print("Merging duplicate orders...")
+
+        duplicates = db.session.query(
+            Order.customer_id, Order.recipe_id, Order.order_date
+        ).group_by(
+            Order.customer_id, Order.recipe_id, Order.order_date
+        ).having(db.func.count(Order.id) > 1).all()
+
+        removed = 0
+        for customer_id, recipe_id, order_date in duplicates:
+            orders = Order.query.filter_by(
+                customer_id=customer_id, recipe_id=recipe_id, order_date=order_date
+            ).order_by(Order.id).all()
+            keep = orders[0]
+            keep.quantity = sum(order.quantity for order in orders)
+            for order in orders[1:]:
+                db.session.delete(order)
+                removed += 1
+        db.session.commit()
+        print(f"✓ Merged {len(duplicates)} duplicate groups ({removed} rows removed)")
+
+        print("Adding unique index on orders (customer_id, recipe_id, order_date)...")
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_orders_customer_recipe_date "
+                "ON orders (customer_id, recipe_id, order_date)"
+            ))
+        print("✓ Added uq_orders_customer_recipe_date")
+
+        print("\nMigration completed!")
+
+if __name__ == '__main__':
+    run_migration()
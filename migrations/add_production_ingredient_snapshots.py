@@ -0,0 +1,44 @@
+"""
+Migration script to start keeping ingredient amounts per production item
+
+This script:
+1. Indexes production_ingredients by production item and by ingredient, so
+   consumption reports can aggregate the stored rows
+2. Fills in amounts for production items saved before they were recorded.
+   These use the recipes as they are now; later items keep the recipe
+   as it was when they were produced.
+"""
+
+from sqlalchemy import text
+from app import app, db
+from models import ProductionItem, ProductionIngredient
+from production_sync import write_ingredient_amounts
+
+def run_migration():
+    """Add the indexes and backfill missing amounts"""
+    with app.app_context():
+        print("Adding indexes on production_ingredients...")
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_production_ingredients_production_item_id "
+                "ON production_ingredients (production_item_id)"
+            ))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_production_ingredients_ingredient_id "
+                "ON production_ingredients (ingredient_id)"
+            ))
+        print("✓ Added ix_production_ingredients_production_item_id and ix_production_ingredients_ingredient_id")
+
+        print("Backfilling ingredient amounts for earlier production items...")
+        recorded = db.session.query(ProductionIngredient.production_item_id)
+        items = db.session.query(
+            ProductionItem.id, ProductionItem.recipe_id, ProductionItem.batch_weight
+        ).filter(ProductionItem.id.notin_(recorded.scalar_subquery())).all()
+        write_ingredient_amounts(items)
+        db.session.commit()
+        print(f"✓ Backfilled {len(items)} production items")
+
+        print("\nMigration completed!")
+
+if __name__ == '__main__':
+    run_migration()
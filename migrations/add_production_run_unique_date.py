@@ -0,0 +1,78 @@
+"""
+Migration script to make production runs unique per date
+
+Duplicate runs for a date are merged into the oldest one (the run MEP sheets
+and production sync already read). Items of a duplicate created by the
+auto sync are copies of the same orders and are dropped; items of any other
+duplicate are moved over. Mixing logs and inventory transactions follow
+their run. Then the unique index uq_production_runs_date replaces the plain
+index on production_runs.date; production sync inserts runs against it
+(INSERT ... ON CONFLICT (date) DO NOTHING).
+"""
+
+from sqlalchemy import text
+from app import app, db
+from models import ProductionRun, ProductionItem, MixingLog, InventoryTransaction
+from consumption import refresh_consumption
+from mep_materializer import mark_mep_sheets_stale
+
+def run_migration():
+    """Merge duplicate production runs and add the unique index"""
+    with app.app_context():
+        print("Merging duplicate production runs...")
+
+        duplicates = [row.date for row in db.session.query(ProductionRun.date).group_by(
+            ProductionRun.date
+        ).having(db.func.count(ProductionRun.id) > 1).all()]
+
+        removed = 0
+        conflicts = []
+        for run_date in duplicates:
+            runs = ProductionRun.query.filter_by(date=run_date).order_by(ProductionRun.id).all()
+            keep = runs[0]
+            keep_has_log = MixingLog.query.filter_by(production_run_id=keep.id).count() > 0
+            for run in runs[1:]:
+                log = MixingLog.query.filter_by(production_run_id=run.id).first()
+                if log and keep_has_log:
+                    # Two mixing logs for one date can't be merged automatically
+                    conflicts.append((run_date, keep.id, run.id))
+                    continue
+                if log:
+                    log.production_run_id = keep.id
+                    keep_has_log = True
+
+                InventoryTransaction.query.filter_by(production_run_id=run.id).update(
+                    {'production_run_id': keep.id}, synchronize_session=False
+                )
+                for item in list(run.items):
+                    if run.created_by == 'auto_sync':
+                        run.items.remove(item)  # delete-orphan
+                    else:
+                        item.production_run = keep
+                db.session.flush()
+                db.session.delete(run)
+                removed += 1
+
+        refresh_consumption(duplicates)
+        mark_mep_sheets_stale(duplicates)
+        db.session.commit()
+        print(f"✓ Merged {len(duplicates)} duplicate dates ({removed} runs removed)")
+
+        if conflicts:
+            for run_date, keep_id, run_id in conflicts:
+                print(f"✗ {run_date}: runs {keep_id} and {run_id} both have a mixing log; merge them by hand")
+            print("\nUnique index not added; run this migration again once the conflicts are resolved.")
+            return
+
+        print("Adding unique index on production_runs (date)...")
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX IF EXISTS ix_production_runs_date"))
+            connection.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_production_runs_date ON production_runs (date)"
+            ))
+        print("✓ Added uq_production_runs_date")
+
+        print("\nMigration completed!")
+
+if __name__ == '__main__':
+    run_migration()
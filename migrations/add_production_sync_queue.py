@@ -0,0 +1,22 @@
+"""
+Migration script to add the production sync queue
+
+This script creates:
+1. production_sync_dates table - Delivery dates whose orders changed and whose
+   production runs are waiting to be re-synced by the background worker
+"""
+
+from app import app, db
+
+def run_migration():
+    """Create the table"""
+    with app.app_context():
+        print("Creating production_sync_dates table...")
+
+        # Create all tables (will skip existing ones)
+        db.create_all()
+
+        print("\nMigration completed successfully!")
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,35 @@
+"""
+Migration script to add production timing columns to the recipes table
+
+Adds mix_minutes, bulk_minutes and bake_minutes, used by the mixing schedule
+(/api/mep/<date>/schedule). Recipes left empty use the scheduler defaults.
+The app also adds them at startup (schema.upgrade_schema), so running this is optional.
+"""
+
+from sqlalchemy import text
+from app import app, db
+
+COLUMNS = ['mix_minutes', 'bulk_minutes', 'bake_minutes']
+
+def run_migration():
+    """Add timing columns"""
+    with app.app_context():
+        print("Adding timing columns to recipes table...")
+
+        for column in COLUMNS:
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(text(f"ALTER TABLE recipes ADD COLUMN {column} INTEGER"))
+                print(f"✓ Added {column}")
+
+            except Exception as e:
+                if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+                    print(f"! Column {column} already exists, skipping...")
+                else:
+                    print(f"Error: {e}")
+                    raise
+
+        print("\nMigration completed!")
+
+if __name__ == '__main__':
+    run_migration()
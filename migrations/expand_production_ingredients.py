@@ -0,0 +1,50 @@
+"""
+Migration script to expand stored ingredient amounts down to raw ingredients
+
+Production items used to record their recipe lines as they were, so Levain,
+Poolish, soakers and carved dough ("Italian dough") were stored as opaque
+ingredients, and consumption reports missed the flour, seeds and salt in
+them. This script:
+1. Rewrites the amounts of every production item that recorded such a line,
+   expanded through the recipes as they are now
+2. Recomputes the consumption rollups
+"""
+
+from app import app, db
+from models import ProductionItem, ProductionIngredient
+from recipe_store import get_recipe_graph
+from dependency_resolver import get_dependency_graph
+from production_sync import write_ingredient_amounts
+from consumption import rebuild_consumption
+
+def run_migration():
+    """Re-expand amounts recorded for intermediate ingredients and rebuild the rollups"""
+    with app.app_context():
+        deps = get_dependency_graph(get_recipe_graph())
+        intermediate = sorted({
+            dep.line.ingredient.id for dependencies in deps.dependencies.values() for dep in dependencies
+        })
+
+        print("Expanding ingredient amounts of earlier production items...")
+        affected = db.session.query(ProductionIngredient.production_item_id).filter(
+            ProductionIngredient.ingredient_id.in_(intermediate)
+        ).distinct()
+        items = db.session.query(
+            ProductionItem.id, ProductionItem.recipe_id, ProductionItem.batch_weight
+        ).filter(ProductionItem.id.in_(affected.scalar_subquery())).all()
+
+        ProductionIngredient.query.filter(
+            ProductionIngredient.production_item_id.in_(affected.scalar_subquery())
+        ).delete(synchronize_session=False)
+        write_ingredient_amounts(items)
+        print(f"✓ Expanded {len(items)} production items")
+
+        print("Rebuilding consumption rollups...")
+        rows = rebuild_consumption()
+        db.session.commit()
+        print(f"✓ Wrote {rows} daily rows")
+
+        print("\nMigration completed!")
+
+if __name__ == '__main__':
+    run_migration()
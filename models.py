@@ -35,6 +35,11 @@ class Recipe(db.Model):
     notes = db.Column(db.Text)
     selling_price = db.Column(db.Float)  # Price per loaf
 
+    # Production timing (used by the mixing schedule)
+    mix_minutes = db.Column(db.Integer)  # Time on the mixer per batch
+    bulk_minutes = db.Column(db.Integer)  # Bulk fermentation (plus divide/shape) before baking
+    bake_minutes = db.Column(db.Integer)  # Oven time per batch
+
     # Relationships
     ingredients = db.relationship('RecipeIngredient', back_populates='recipe', cascade='all, delete-orphan')
 
@@ -67,7 +72,7 @@ class ProductionRun(db.Model):
     __tablename__ = 'production_runs'
 
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False)
     batch_id = db.Column(db.String(6), index=True)  # MMDDYY format (e.g., '010826')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.String(100))  # username
@@ -76,6 +81,9 @@ class ProductionRun(db.Model):
     # Relationships
     items = db.relationship('ProductionItem', back_populates='production_run', cascade='all, delete-orphan')
 
+    # One run per date; production sync upserts against it
+    __table_args__ = (db.Index('uq_production_runs_date', 'date', unique=True),)
+
     def __repr__(self):
         return f'<ProductionRun {self.date}>'
 
@@ -102,13 +110,13 @@ class ProductionItem(db.Model):
 
 
 class ProductionIngredient(db.Model):
-    """Calculated ingredient amounts for a production item"""
+    """Calculated ingredient amounts for a production item (written when the item is saved or synced)"""
     __tablename__ = 'production_ingredients'
 
     id = db.Column(db.Integer, primary_key=True)
-    production_item_id = db.Column(db.Integer, db.ForeignKey('production_items.id'), nullable=False)
-    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
-    amount_grams = db.Column(db.Float, nullable=False)
+    production_item_id = db.Column(db.Integer, db.ForeignKey('production_items.id'), nullable=False, index=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False, index=True)
+    amount_grams = db.Column(db.Float, nullable=False)  # Snapshot from the recipe as it was at production time
 
     # Relationships
     production_item = db.relationship('ProductionItem', back_populates='ingredient_amounts')
@@ -118,6 +126,114 @@ class ProductionIngredient(db.Model):
         return f'<ProductionIngredient {self.ingredient.name}: {self.amount_grams}g>'
 
 
+class DailyConsumption(db.Model):
+    """Grams of an ingredient used per production date and recipe (see consumption.py)"""
+    __tablename__ = 'consumption_daily'
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    grams = db.Column(db.Float, nullable=False)  # Sum of ProductionIngredient.amount_grams
+
+    __table_args__ = (db.Index('uq_consumption_daily', 'date', 'ingredient_id', 'recipe_id', unique=True),)
+
+    def __repr__(self):
+        return f'<DailyConsumption {self.date} ingredient {self.ingredient_id}: {self.grams}g>'
+
+
+class WeeklyConsumption(db.Model):
+    """Grams of an ingredient used per week (starting Monday) and recipe, summed from consumption_daily"""
+    __tablename__ = 'consumption_weekly'
+
+    id = db.Column(db.Integer, primary_key=True)
+    week_start = db.Column(db.Date, nullable=False)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    grams = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (db.Index('uq_consumption_weekly', 'week_start', 'ingredient_id', 'recipe_id', unique=True),)
+
+    def __repr__(self):
+        return f'<WeeklyConsumption {self.week_start} ingredient {self.ingredient_id}: {self.grams}g>'
+
+
+class MonthlyConsumption(db.Model):
+    """Grams of an ingredient used per calendar month and recipe, summed from consumption_daily"""
+    __tablename__ = 'consumption_monthly'
+
+    id = db.Column(db.Integer, primary_key=True)
+    month_start = db.Column(db.Date, nullable=False)  # First day of the month
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    grams = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (db.Index('uq_consumption_monthly', 'month_start', 'ingredient_id', 'recipe_id', unique=True),)
+
+    def __repr__(self):
+        return f'<MonthlyConsumption {self.month_start} ingredient {self.ingredient_id}: {self.grams}g>'
+
+
+class MEPSheet(db.Model):
+    """Materialized MEP sheets for a delivery date (recomputed in the background when orders change)"""
+    __tablename__ = 'mep_sheets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    delivery_date = db.Column(db.Date, nullable=False, unique=True, index=True)
+    input_hash = db.Column(db.String(64), nullable=False)  # Hash of run items, next day's items and recipes
+    batch_id = db.Column(db.String(6))  # MMDDYY of the production run
+    sheets = db.Column(db.Text, nullable=False)  # JSON output of MEPCalculator.calculate_all_sheets
+    is_stale = db.Column(db.Boolean, default=False)  # Inputs changed, recompute pending
+    stale_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped by every stale mark
+    recipe_fingerprint = db.Column(db.String(64))  # RecipeGraph.fingerprint the sheets were computed from
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MEPSheet {self.delivery_date}>'
+
+
+class RecipeGraphVersion(db.Model):
+    """Single row counting recipe writes, so every worker process knows when its recipe graph snapshot is stale"""
+    __tablename__ = 'recipe_graph_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped in the same transaction as each recipe write
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RecipeGraphVersion {self.version}>'
+
+
+class ProductionSyncDate(db.Model):
+    """Delivery dates whose orders changed since their production run was last synced"""
+    __tablename__ = 'production_sync_dates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, unique=True, index=True)
+    queued_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Latest change for the date
+
+    def __repr__(self):
+        return f'<ProductionSyncDate {self.date}>'
+
+
+class MEPPrint(db.Model):
+    """MEP sheets as they were printed for a delivery date, kept to show what changed since"""
+    __tablename__ = 'mep_prints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    delivery_date = db.Column(db.Date, nullable=False, index=True)
+    input_hash = db.Column(db.String(64), nullable=False)  # Same hash as MEPSheet.input_hash
+    recipe_fingerprint = db.Column(db.String(64), nullable=False)  # RecipeGraph.fingerprint at print time
+    items = db.Column(db.Text, nullable=False)  # JSON production items the sheets were computed from
+    next_day_items = db.Column(db.Text, nullable=False)  # JSON next day's items (Emmy feed)
+    sheets = db.Column(db.Text, nullable=False)  # JSON sheets as printed
+    printed_by = db.Column(db.String(100))
+    printed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MEPPrint {self.delivery_date} {self.printed_at}>'
+
+
 class ScheduleTemplate(db.Model):
     """Saved production schedule templates"""
     __tablename__ = 'schedule_templates'
@@ -173,9 +289,11 @@ class Order(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
-    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
-    order_date = db.Column(db.Date, nullable=False, index=True)  # When they want delivery
-    quantity = db.Column(db.Integer, nullable=False)  # Number of loaves
+    # active_history: the old value is loaded before a change even on an expired order,
+    # so daily_demand can take it off the right date and recipe
+    recipe_id = db.column_property(db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False), active_history=True)
+    order_date = db.column_property(db.Column(db.Date, nullable=False, index=True), active_history=True)  # When they want delivery
+    quantity = db.column_property(db.Column(db.Integer, nullable=False), active_history=True)  # Number of loaves
     day_of_week = db.Column(db.String(10))  # Monday, Tuesday, etc.
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -185,10 +303,29 @@ class Order(db.Model):
     customer = db.relationship('Customer', back_populates='orders')
     recipe = db.relationship('Recipe')
 
+    # One order per customer, bread and day (bulk entry upserts against this)
+    __table_args__ = (db.Index('uq_orders_customer_recipe_date', 'customer_id', 'recipe_id', 'order_date', unique=True),)
+
     def __repr__(self):
         return f'<Order {self.customer.name} - {self.recipe.name} x{self.quantity} on {self.order_date}>'
 
 
+class DailyDemand(db.Model):
+    """Loaves ordered per delivery date and recipe, kept in step with orders (see daily_demand.py)"""
+    __tablename__ = 'daily_demand'
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)  # Sum of Order.quantity
+    order_count = db.Column(db.Integer, nullable=False, default=0)  # Orders behind it; row goes at 0
+
+    __table_args__ = (db.Index('uq_daily_demand_date_recipe', 'date', 'recipe_id', unique=True),)
+
+    def __repr__(self):
+        return f'<DailyDemand {self.date} recipe {self.recipe_id} x{self.quantity}>'
+
+
 class WeeklyOrderTemplate(db.Model):
     """Template for recurring weekly orders"""
     __tablename__ = 'weekly_order_templates'
@@ -0,0 +1,158 @@
+"""
+Order Aggregates
+Loaves ordered per (date, recipe[, customer]) summed in SQL, with recipe and customer names
+joined in. Returns plain result rows instead of Order objects, so long ranges stay cheap.
+Totals across all customers come ready-summed from the daily_demand table.
+"""
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import func
+from models import db, Order, Recipe, Customer, DailyDemand
+
+
+def order_totals(start_date=None, end_date=None, dates=None, customer_id=None, by_customer: bool = False) -> List:
+    """
+    One row per (order_date, recipe) - or per (order_date, recipe, customer) with by_customer -
+    with fields order_date, recipe_id, recipe_name, loaf_weight, quantity
+    (plus customer_id, customer_name), in the order each group was first ordered.
+
+    start_date / end_date: inclusive range; dates: explicit list; customer_id: one customer's orders
+    """
+    columns = [Order.order_date, Order.recipe_id, Recipe.name.label('recipe_name'), Recipe.loaf_weight]
+    if by_customer:
+        columns += [Order.customer_id, Customer.name.label('customer_name')]
+
+    query = db.session.query(*columns, func.sum(Order.quantity).label('quantity')).join(
+        Recipe, Recipe.id == Order.recipe_id
+    )
+    if by_customer:
+        query = query.join(Customer, Customer.id == Order.customer_id)
+
+    if start_date is not None:
+        query = query.filter(Order.order_date >= start_date)
+    if end_date is not None:
+        query = query.filter(Order.order_date <= end_date)
+    if dates is not None:
+        query = query.filter(Order.order_date.in_(list(dates)))
+    if customer_id is not None:
+        query = query.filter(Order.customer_id == customer_id)
+
+    return query.group_by(*columns).order_by(func.min(Order.id)).all()
+
+
+def demand_totals(start_date=None, end_date=None, dates=None) -> List:
+    """
+    Same rows as order_totals() without by_customer or customer_id, read from daily_demand
+    instead of summing every order
+    """
+    query = db.session.query(
+        DailyDemand.date.label('order_date'), DailyDemand.recipe_id, Recipe.name.label('recipe_name'),
+        Recipe.loaf_weight, DailyDemand.quantity
+    ).join(Recipe, Recipe.id == DailyDemand.recipe_id)
+
+    if start_date is not None:
+        query = query.filter(DailyDemand.date >= start_date)
+    if end_date is not None:
+        query = query.filter(DailyDemand.date <= end_date)
+    if dates is not None:
+        query = query.filter(DailyDemand.date.in_(list(dates)))
+
+    return query.order_by(DailyDemand.id).all()
+
+
+def production_calendar(rows, dates) -> List:
+    """
+    Calendar rows for the production views: one per recipe (by name), with the quantity for every date
+    [{'recipe_name', 'recipe_id', 'quantities': [{'date', 'day_of_week', 'quantity'}]}]
+    """
+    recipes = {}
+    for row in rows:
+        recipe = recipes.setdefault(row.recipe_name, {'recipe_id': row.recipe_id, 'dates': {}})
+        recipe['dates'][row.order_date] = recipe['dates'].get(row.order_date, 0) + row.quantity
+
+    labels = [(d, d.strftime('%Y-%m-%d'), d.strftime('%A')) for d in dates]
+    return [{
+        'recipe_name': recipe_name,
+        'recipe_id': data['recipe_id'],
+        'quantities': [{
+            'date': date_str,
+            'day_of_week': day_of_week,
+            'quantity': data['dates'].get(date_obj, 0)
+        } for date_obj, date_str, day_of_week in labels]
+    } for recipe_name, data in sorted(recipes.items())]
+
+
+def production_calendar_columnar(rows, dates) -> Dict:
+    """
+    The same calendar with the dates listed once and one integer per date for each recipe
+    {'days_of_week': [...], 'recipes': [{'recipe_name', 'recipe_id', 'quantities': [int per date]}],
+     'daily_totals': [int per date]}
+    """
+    columns = {d: i for i, d in enumerate(dates)}
+    names = sorted({row.recipe_name for row in rows})
+    recipe_rows = {name: i for i, name in enumerate(names)}
+    recipe_ids = {}
+    for row in rows:
+        recipe_ids.setdefault(row.recipe_name, row.recipe_id)
+
+    cells = [(recipe_rows[row.recipe_name], columns[row.order_date], row.quantity)
+             for row in rows if row.order_date in columns]
+    matrix = np.zeros((len(names), len(dates)), dtype=np.int64)
+    if cells:
+        recipe_index, date_index, quantities = np.array(cells, dtype=np.int64).T
+        np.add.at(matrix, (recipe_index, date_index), quantities)
+
+    return {
+        'days_of_week': [d.strftime('%A') for d in dates],
+        'recipes': [{
+            'recipe_name': name,
+            'recipe_id': recipe_ids[name],
+            'quantities': quantities
+        } for name, quantities in zip(names, matrix.tolist())],
+        'daily_totals': matrix.sum(axis=0).tolist()
+    }
+
+
+def production_cube(rows, dates, encoding: str = 'dense') -> Dict:
+    """
+    Loaves per customer x recipe x date from order_totals(by_customer=True) rows.
+    Customers and recipes that ordered in the range, by name; dates as given.
+    dense: 'quantities'[customer][recipe][date];
+    sparse: 'cells' {'customer', 'recipe', 'date', 'quantity'} - parallel index arrays of the non-zero cells
+    """
+    customers = {}
+    recipes = {}
+    for row in rows:
+        customers.setdefault(row.customer_id, row.customer_name)
+        recipes.setdefault(row.recipe_name, row.recipe_id)
+
+    customer_ids = sorted(customers, key=lambda customer_id: (customers[customer_id], customer_id))
+    recipe_names = sorted(recipes)
+    customer_index = {customer_id: i for i, customer_id in enumerate(customer_ids)}
+    recipe_index = {name: i for i, name in enumerate(recipe_names)}
+    date_index = {d: i for i, d in enumerate(dates)}
+
+    cube = np.zeros((len(customer_ids), len(recipe_names), len(dates)), dtype=np.int64)
+    cells = [(customer_index[row.customer_id], recipe_index[row.recipe_name], date_index[row.order_date], row.quantity)
+             for row in rows if row.order_date in date_index]
+    if cells:
+        c, r, d, quantities = np.array(cells, dtype=np.int64).T
+        np.add.at(cube, (c, r, d), quantities)
+
+    result = {
+        'encoding': encoding,
+        'shape': list(cube.shape),
+        'customers': [{'id': customer_id, 'name': customers[customer_id]} for customer_id in customer_ids],
+        'recipes': [{'id': recipes[name], 'name': name} for name in recipe_names]
+    }
+    if encoding == 'sparse':
+        c, r, d = np.nonzero(cube)
+        result['cells'] = {
+            'customer': c.tolist(),
+            'recipe': r.tolist(),
+            'date': d.tolist(),
+            'quantity': cube[c, r, d].tolist()
+        }
+    else:
+        result['quantities'] = cube.tolist()
+    return result
@@ -0,0 +1,98 @@
+"""
+Set-based Order Upsert
+Writes many (customer, recipe, date) orders with INSERT ... ON CONFLICT DO UPDATE
+on SQLite and PostgreSQL, relying on the uq_orders_customer_recipe_date index.
+Core statements bypass the ORM, so the daily demand is adjusted here explicitly,
+under a lock on the daily_demand rows involved.
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+from models import db, Order
+from upsert import dialect_insert
+from daily_demand import apply_demand_deltas, lock_demand_rows
+
+
+# Rows per statement: 7 bound parameters each stays under SQLite's 32766 variable limit
+UPSERT_BATCH_SIZE = 4000
+
+ORDER_KEY = ('customer_id', 'recipe_id', 'order_date')
+
+
+def upsert_orders(orders: List[Dict], update_existing: bool = True, add_quantities: bool = False) -> Tuple[int, int]:
+    """
+    Create or update orders in bulk; caller commits.
+    orders: [{'customer_id', 'recipe_id', 'order_date': date, 'quantity', optional 'notes'}, ...]
+    A later row for the same customer/recipe/date wins. Existing orders get the new quantity,
+    or are left alone with update_existing=False. With add_quantities the quantities are added
+    to the existing orders (and to each other) instead. Notes are only replaced when given.
+    Returns (created, updated); updated is 0 without update_existing.
+    """
+    rows = {}
+    now = datetime.utcnow()
+    for order in orders:
+        key = (order['customer_id'], order['recipe_id'], order['order_date'])
+        quantity = order['quantity']
+        if add_quantities and key in rows:
+            quantity += rows[key]['quantity']
+        rows[key] = {
+            'customer_id': order['customer_id'],
+            'recipe_id': order['recipe_id'],
+            'order_date': order['order_date'],
+            'quantity': quantity,
+            'day_of_week': order['order_date'].strftime('%A'),
+            'notes': order.get('notes') or None,
+            'created_at': now,
+            'updated_at': now
+        }
+    if not rows:
+        return 0, 0
+
+    # Concurrent upserts of the same dates and recipes wait here until this transaction ends,
+    # so the orders read next are the ones this statement really inserts over
+    lock_demand_rows(db.session, {(key[2], key[1]) for key in rows})
+
+    # Existing orders among the customers and dates touched: tells created from updated,
+    # and the old quantities the daily demand has to be adjusted by
+    dates = [key[2] for key in rows]
+    existing = {
+        (customer_id, recipe_id, order_date): quantity
+        for customer_id, recipe_id, order_date, quantity in db.session.query(
+            Order.customer_id, Order.recipe_id, Order.order_date, Order.quantity
+        ).filter(
+            Order.customer_id.in_({key[0] for key in rows}),
+            Order.order_date >= min(dates),
+            Order.order_date <= max(dates)
+        ).all()
+    }
+
+    deltas = {}
+    for key, row in rows.items():
+        quantity, count = deltas.get((row['order_date'], row['recipe_id']), (0, 0))
+        if key in existing:
+            if not update_existing:
+                continue
+            change = row['quantity'] if add_quantities else row['quantity'] - existing[key]
+            deltas[(row['order_date'], row['recipe_id'])] = (quantity + change, count)
+        else:
+            deltas[(row['order_date'], row['recipe_id'])] = (quantity + row['quantity'], count + 1)
+
+    table = Order.__table__
+    values = list(rows.values())
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        statement = dialect_insert(table).values(values[start:start + UPSERT_BATCH_SIZE])
+        if update_existing:
+            statement = statement.on_conflict_do_update(
+                index_elements=list(ORDER_KEY),
+                set_={
+                    'quantity': table.c.quantity + statement.excluded.quantity if add_quantities else statement.excluded.quantity,
+                    'notes': db.func.coalesce(statement.excluded.notes, table.c.notes),
+                    'updated_at': statement.excluded.updated_at
+                }
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=list(ORDER_KEY))
+        db.session.execute(statement)
+    apply_demand_deltas(db.session, deltas)
+
+    created = sum(1 for key in rows if key not in existing)
+    return created, (len(rows) - created if update_existing else 0)
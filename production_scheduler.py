@@ -0,0 +1,207 @@
+"""
+Production Scheduler
+Sequences the morning's mix batches on mixers and ovens (list scheduling, makespan-minimized)
+"""
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Used when a recipe has no timing set
+DEFAULT_MIX_MINUTES = 15
+DEFAULT_BULK_MINUTES = 180
+DEFAULT_BAKE_MINUTES = 45
+
+# Most mixers / ovens a schedule is built for (one Gantt lane each)
+MAX_MIXERS = 10
+MAX_OVENS = 10
+
+
+@dataclass
+class Job:
+    """One mix batch moving through mixer -> bulk fermentation -> oven"""
+    index: int
+    batch: Dict
+    mix: int
+    bulk: int
+    bake: int
+    predecessors: List[int] = field(default_factory=list)  # batches whose dough this one is carved from
+
+    @property
+    def tail(self) -> int:
+        return self.bulk + self.bake
+
+
+@dataclass
+class Plan:
+    """Start minutes for every job, plus the resource each stage ran on"""
+    heuristic: str
+    mix_start: Dict[int, int]
+    mixer: Dict[int, int]
+    bake_start: Dict[int, int]
+    oven: Dict[int, int]
+    makespan: int
+
+
+def _johnson_order(jobs: List[Job]) -> List[Job]:
+    """
+    Johnson's rule with bulk time as a lag (Mitten): batches where mix+bulk is shorter than bulk+bake
+    go first by increasing mix+bulk, the rest by decreasing bulk+bake
+    """
+    first = sorted((j for j in jobs if j.mix + j.bulk < j.bulk + j.bake), key=lambda j: j.mix + j.bulk)
+    second = sorted((j for j in jobs if j.mix + j.bulk >= j.bulk + j.bake), key=lambda j: -(j.bulk + j.bake))
+    return first + second
+
+
+# Priority rules tried for every day; the plan with the shortest makespan wins
+HEURISTICS: List[Tuple[str, Callable[[List[Job]], List[Job]]]] = [
+    ('longest_tail_first', lambda jobs: sorted(jobs, key=lambda j: (-j.tail, -j.bake, j.index))),
+    ('johnson', _johnson_order),
+    ('longest_bake_first', lambda jobs: sorted(jobs, key=lambda j: (-j.bake, -j.tail, j.index))),
+    ('sheet_order', lambda jobs: list(jobs)),
+]
+
+
+class ProductionScheduler:
+    """
+    Assign mix batches to mixers and ovens.
+
+    Each batch is mixed on one mixer, rests for its bulk time (no resource), then bakes in one oven.
+    A bread carved from another bread's dough cannot be mixed before that batch comes off the mixer.
+    """
+
+    def __init__(self, mixers: int = 1, ovens: int = 1):
+        self.mixers = min(max(1, int(mixers)), MAX_MIXERS)
+        self.ovens = min(max(1, int(ovens)), MAX_OVENS)
+
+    def build_jobs(self, batches: List[Dict]) -> List[Job]:
+        """Jobs from MEPCalculator.plan_bread_batches() entries"""
+        jobs = []
+        by_source = {}
+        for index, batch in enumerate(batches):
+            recipe = batch['recipe']
+            jobs.append(Job(
+                index=index,
+                batch=batch,
+                mix=_minutes(recipe.mix_minutes, DEFAULT_MIX_MINUTES),
+                bulk=_minutes(recipe.bulk_minutes, DEFAULT_BULK_MINUTES),
+                bake=_minutes(recipe.bake_minutes, DEFAULT_BAKE_MINUTES)
+            ))
+            by_source[(recipe.name, batch.get('batch_number'))] = index
+
+        for job in jobs:
+            for source in job.batch.get('dough_from', []):
+                predecessor = by_source.get((source['recipe_name'], source.get('batch_number')))
+                if predecessor is not None and predecessor != job.index:
+                    job.predecessors.append(predecessor)
+        return jobs
+
+    def schedule(self, jobs: List[Job]) -> Optional[Plan]:
+        """Best plan over all priority rules"""
+        best = None
+        for name, order in HEURISTICS:
+            plan = self._list_schedule(jobs, order(jobs), name)
+            if best is None or plan.makespan < best.makespan:
+                best = plan
+        return best
+
+    def _list_schedule(self, jobs: List[Job], priority: List[Job], name: str) -> Plan:
+        """
+        Classic list scheduling: repeatedly take the highest-priority job whose predecessors are placed
+        and put it on the mixer that frees up first; ovens then take batches as they finish bulk
+        """
+        rank = {job.index: position for position, job in enumerate(priority)}
+        waiting = {job.index: len(job.predecessors) for job in jobs}
+        successors = {job.index: [] for job in jobs}
+        for job in jobs:
+            for predecessor in job.predecessors:
+                successors[predecessor].append(job.index)
+
+        ready = [(rank[i], i) for i, count in waiting.items() if count == 0]
+        heapq.heapify(ready)
+        mixers = [(0, m) for m in range(self.mixers)]
+
+        mix_start, mixer, mix_end = {}, {}, {}
+        while ready:
+            _, i = heapq.heappop(ready)
+            job = jobs[i]
+            free_at, m = heapq.heappop(mixers)
+            start = max([free_at] + [mix_end[p] for p in job.predecessors])
+            mix_start[i], mixer[i], mix_end[i] = start, m, start + job.mix
+            heapq.heappush(mixers, (mix_end[i], m))
+            for successor in successors[i]:
+                waiting[successor] -= 1
+                if waiting[successor] == 0:
+                    heapq.heappush(ready, (rank[successor], successor))
+
+        # Ovens: earliest-ready batch first, ties broken by priority
+        ovens = [(0, o) for o in range(self.ovens)]
+        bake_start, oven = {}, {}
+        makespan = 0
+        for i in sorted(mix_end, key=lambda i: (mix_end[i] + jobs[i].bulk, rank[i])):
+            free_at, o = heapq.heappop(ovens)
+            start = max(free_at, mix_end[i] + jobs[i].bulk)
+            bake_start[i], oven[i] = start, o
+            heapq.heappush(ovens, (start + jobs[i].bake, o))
+            makespan = max(makespan, start + jobs[i].bake)
+
+        return Plan(name, mix_start, mixer, bake_start, oven, makespan)
+
+    def gantt(self, jobs: List[Job], plan: Plan, start_time: datetime) -> Dict:
+        """Gantt-style JSON: one lane per mixer/oven plus the full timeline of every batch"""
+        def stamp(minute):
+            return (start_time + timedelta(minutes=minute)).strftime('%Y-%m-%dT%H:%M')
+
+        def task(job, stage, start, duration, resource):
+            return {
+                'batch': job.batch['name'],
+                'recipe': job.batch['recipe'].name,
+                'stage': stage,
+                'resource': resource,
+                'start': stamp(start),
+                'end': stamp(start + duration),
+                'start_minute': start,
+                'end_minute': start + duration
+            }
+
+        lanes = [{'resource': f'Mixer {m + 1}', 'tasks': []} for m in range(self.mixers)]
+        lanes += [{'resource': f'Oven {o + 1}', 'tasks': []} for o in range(self.ovens)]
+
+        batches = []
+        for job in sorted(jobs, key=lambda j: (plan.mix_start[j.index], j.index)):
+            i = job.index
+            mix = task(job, 'mix', plan.mix_start[i], job.mix, f'Mixer {plan.mixer[i] + 1}')
+            bulk = task(job, 'bulk', plan.mix_start[i] + job.mix, plan.bake_start[i] - plan.mix_start[i] - job.mix, None)
+            bake = task(job, 'bake', plan.bake_start[i], job.bake, f'Oven {plan.oven[i] + 1}')
+
+            lanes[plan.mixer[i]]['tasks'].append(mix)
+            lanes[self.mixers + plan.oven[i]]['tasks'].append(bake)
+            batches.append({
+                'name': job.batch['name'],
+                'recipe': job.batch['recipe'].name,
+                'quantity': job.batch['quantity'],
+                'total_weight': job.batch['total_weight'],
+                'after': [jobs[p].batch['name'] for p in job.predecessors],
+                'mix': mix,
+                'bulk': bulk,
+                'bake': bake
+            })
+
+        for lane in lanes:
+            lane['tasks'].sort(key=lambda t: t['start_minute'])
+
+        return {
+            'heuristic': plan.heuristic,
+            'makespan_minutes': plan.makespan,
+            'start': stamp(0),
+            'end': stamp(plan.makespan),
+            'mixers': self.mixers,
+            'ovens': self.ovens,
+            'lanes': lanes,
+            'batches': batches
+        }
+
+
+def _minutes(value, default: int) -> int:
+    return int(value) if value is not None and value >= 0 else default
@@ -0,0 +1,286 @@
+"""
+Production Run Sync
+Rebuilds production runs from customer orders. Order writes queue their dates in a durable
+table; a background worker syncs them once the orders have been quiet for a moment.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from flask import current_app
+from models import db, DailyDemand, Recipe, ProductionRun, ProductionItem, ProductionIngredient, ProductionSyncDate
+from mep_materializer import mark_mep_sheets_stale, refresh_mep_sheets
+from consumption import refresh_consumption
+from recipe_store import get_recipe_graph
+from dependency_resolver import get_dependency_graph
+from upsert import dialect_insert
+
+
+def sync_production_runs_for_dates(dates):
+    """
+    Automatically sync production runs from orders for the given dates.
+    This eliminates the need to manually click "Create Production Runs".
+
+    Set-based: demand for every date comes from one daily_demand query and production items
+    are replaced with bulk DELETE/INSERT statements, so the number of queries does not
+    grow with the number of dates or recipes.
+
+    Args:
+        dates: Single date object or list of date objects
+    """
+    if not isinstance(dates, (list, set, tuple)):
+        dates = [dates]
+    dates = sorted(set(dates))
+    if not dates:
+        return
+
+    # Total loaves per (date, recipe) from daily_demand, recipes in the order they were first ordered
+    demand = {}
+    loaf_weights = {}
+    for target_date, recipe_id, quantity, recipe_exists, loaf_weight in db.session.query(
+        DailyDemand.date, DailyDemand.recipe_id, DailyDemand.quantity, Recipe.id, Recipe.loaf_weight
+    ).outerjoin(
+        Recipe, Recipe.id == DailyDemand.recipe_id
+    ).filter(
+        DailyDemand.date.in_(dates)
+    ).order_by(DailyDemand.id).all():
+        demand.setdefault(target_date, {})[recipe_id] = quantity
+        if recipe_exists is not None:
+            loaf_weights[recipe_id] = loaf_weight
+
+    # One run per date (unique index on date), created if missing and locked until commit, so
+    # two workers syncing the same date take turns instead of both filling the run
+    runs = lock_production_runs(dates, demand, created_by='auto_sync', notes='Auto-synced from customer orders')
+
+    # Clear the items of every run; runs for dates without orders go entirely
+    clear_production_items(list(runs.values()))
+    emptied = [run_id for run_date, run_id in runs.items() if run_date not in demand]
+    if emptied:
+        ProductionRun.query.filter(ProductionRun.id.in_(emptied)).delete(synchronize_session=False)
+
+    items = [{
+        'production_run_id': runs[target_date],
+        'recipe_id': recipe_id,
+        'quantity': quantity,
+        'batch_weight': quantity * loaf_weights[recipe_id] if loaf_weights[recipe_id] is not None else None
+    } for target_date, quantities in sorted(demand.items())
+        for recipe_id, quantity in quantities.items() if recipe_id in loaf_weights]
+    if items:
+        db.session.execute(ProductionItem.__table__.insert(), items)
+        # Read back the new item ids for their ingredient amounts (RETURNING would insert row by
+        # row on SQLite to keep them in order)
+        write_ingredient_amounts(db.session.query(
+            ProductionItem.id, ProductionItem.recipe_id, ProductionItem.batch_weight
+        ).filter(ProductionItem.production_run_id.in_(list(runs.values()))).all())
+    refresh_consumption(dates)
+
+    mark_mep_sheets_stale(dates)
+    db.session.commit()
+    refresh_mep_sheets(current_app._get_current_object(), dates)
+
+
+def lock_production_runs(dates, create_dates=(), created_by=None, notes=None) -> Dict:
+    """
+    Production run ids for these dates ({date: run_id}), row-locked until the transaction ends.
+    Runs for create_dates that do not exist yet are inserted first with ON CONFLICT (date) DO NOTHING,
+    so a run another worker is creating at the same moment is picked up instead of duplicated.
+    """
+    create_dates = sorted(set(create_dates))
+    if create_dates:
+        statement = dialect_insert(ProductionRun.__table__).values([{
+            'date': run_date,
+            'batch_id': run_date.strftime('%m%d%y'),  # Auto-generate batch ID (MMDDYY)
+            'created_at': datetime.utcnow(),
+            'created_by': created_by,
+            'notes': notes
+        } for run_date in create_dates])
+        db.session.execute(statement.on_conflict_do_nothing(index_elements=['date']))
+
+    return {
+        run_date: run_id
+        for run_id, run_date in db.session.query(ProductionRun.id, ProductionRun.date).filter(
+            ProductionRun.date.in_(sorted(set(dates) | set(create_dates)))
+        ).order_by(ProductionRun.date).with_for_update().all()
+    }
+
+
+def clear_production_items(run_ids):
+    """Delete the items of these runs and their ingredient amounts (bulk DELETEs; caller commits)"""
+    if not run_ids:
+        return
+    item_ids = db.session.query(ProductionItem.id).filter(ProductionItem.production_run_id.in_(run_ids))
+    ProductionIngredient.query.filter(
+        ProductionIngredient.production_item_id.in_(item_ids.scalar_subquery())
+    ).delete(synchronize_session=False)
+    ProductionItem.query.filter(
+        ProductionItem.production_run_id.in_(run_ids)
+    ).delete(synchronize_session=False)
+
+
+def write_ingredient_amounts(items):
+    """
+    Store the raw ingredients each production item uses, scaled from the recipe as it is now, so
+    later reports do not depend on recipe edits. Starters, soakers and dough carved from another
+    bread are expanded into their own ingredients, so a carved bread carries the flour of the dough
+    it is cut from. items: [(production_item_id, recipe_id, batch_weight)]
+    One bulk INSERT; caller commits.
+    """
+    deps = get_dependency_graph(get_recipe_graph())
+
+    rows = []
+    for item_id, recipe_id, batch_weight in items:
+        if deps.graph.get(recipe_id) is None or not batch_weight:
+            continue
+        rows.extend({
+            'production_item_id': item_id,
+            'ingredient_id': ingredient_id,
+            'amount_grams': coefficient * batch_weight
+        } for ingredient_id, coefficient in deps.leaf_coefficients(recipe_id).items() if coefficient)
+
+    if rows:
+        db.session.execute(ProductionIngredient.__table__.insert(), rows)
+
+
+def queue_production_sync(dates):
+    """Record dates whose orders changed so their production runs get re-synced; caller commits"""
+    if not isinstance(dates, (list, set, tuple)):
+        dates = [dates]
+    dates = sorted(set(dates))
+    if not dates:
+        return
+
+    now = datetime.utcnow()
+    statement = dialect_insert(ProductionSyncDate.__table__).values([
+        {'date': target_date, 'queued_at': now} for target_date in dates
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=['date'],
+        set_={'queued_at': statement.excluded.queued_at}
+    )
+    db.session.execute(statement)
+
+
+def sync_queued_dates() -> int:
+    """
+    Sync every queued date in one pass; returns how many were synced.
+    Dates queued again while this runs stay queued for the next pass.
+    """
+    queued = db.session.query(ProductionSyncDate.date, ProductionSyncDate.queued_at).all()
+    if not queued:
+        return 0
+
+    dates = [target_date for target_date, queued_at in queued]
+    cutoff = max(queued_at for target_date, queued_at in queued)
+
+    # Dequeued in the same transaction as the sync, so a failed sync leaves them queued
+    ProductionSyncDate.query.filter(
+        ProductionSyncDate.date.in_(dates),
+        ProductionSyncDate.queued_at <= cutoff
+    ).delete(synchronize_session=False)
+    sync_production_runs_for_dates(dates)
+    return len(dates)
+
+
+class ProductionSyncWorker:
+    """
+    Background thread that syncs queued dates after PRODUCTION_SYNC_DELAY seconds without
+    order changes. A steady stream of changes is still synced every PRODUCTION_SYNC_MAX_DELAY seconds.
+    A failed sync leaves its dates queued and is retried with a growing delay (PRODUCTION_SYNC_RETRY_DELAY,
+    doubling up to PRODUCTION_SYNC_RETRY_MAX_DELAY).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.condition = threading.Condition()
+        self.thread = None
+        self.first_change = None
+        self.last_change = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def notify(self):
+        with self.condition:
+            now = time.monotonic()
+            if self.first_change is None:
+                self.first_change = now
+            self.last_change = now
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='production-sync-worker', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def _due(self) -> float:
+        delay = self.app.config.get('PRODUCTION_SYNC_DELAY', 2.0)
+        max_delay = self.app.config.get('PRODUCTION_SYNC_MAX_DELAY', 10.0)
+        return max(min(self.last_change + delay, self.first_change + max_delay), self.retry_at)
+
+    def _retry_later(self):
+        """Schedule another pass after a failed one, backing off while it keeps failing"""
+        delay = self.app.config.get('PRODUCTION_SYNC_RETRY_DELAY', 5.0)
+        max_delay = self.app.config.get('PRODUCTION_SYNC_RETRY_MAX_DELAY', 300.0)
+        with self.condition:
+            self.failures += 1
+            now = time.monotonic()
+            self.retry_at = now + min(delay * 2 ** (self.failures - 1), max_delay)
+            if self.first_change is None:
+                self.first_change = now
+                self.last_change = now
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.first_change is None:
+                    self.condition.wait()
+                # Debounce: every change pushes the sync back, up to the max delay
+                while True:
+                    remaining = self._due() - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                self.first_change = None
+                self.last_change = None
+
+            with self.app.app_context():
+                try:
+                    sync_queued_dates()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Production sync failed; the dates stay queued for a retry')
+                    self._retry_later()
+                else:
+                    with self.condition:
+                        self.failures = 0
+                        self.retry_at = 0.0
+                finally:
+                    db.session.remove()
+
+
+_worker: Optional[ProductionSyncWorker] = None
+_worker_lock = threading.Lock()
+
+
+def schedule_production_sync(app):
+    """Sync queued dates soon (in the background unless disabled, then right away)"""
+    global _worker
+
+    if not app.config.get('PRODUCTION_SYNC_BACKGROUND', True):
+        sync_queued_dates()
+        return
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = ProductionSyncWorker(app)
+    _worker.notify()
+
+
+def resume_production_sync(app):
+    """Pick up dates left queued by a previous process"""
+    with app.app_context():
+        try:
+            pending = ProductionSyncDate.query.count()
+        except Exception:
+            # Table not created yet (see migrations/add_production_sync_queue.py)
+            db.session.rollback()
+            return
+        if pending:
+            schedule_production_sync(app)
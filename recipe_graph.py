@@ -0,0 +1,100 @@
+"""
+Recipe Graph
+Compiled, read-only view of every recipe and its ingredients (plain dataclasses, no ORM;
+see recipe_store for loading it from the database)
+"""
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class IngredientNode:
+    """An ingredient as seen by the calculators"""
+    id: int
+    name: str
+    category: Optional[str]
+
+
+@dataclass(frozen=True)
+class RecipeLine:
+    """One ingredient line of a recipe (mirrors RecipeIngredient)"""
+    ingredient: IngredientNode
+    percentage: Optional[float]
+    amount_grams: Optional[float]
+    is_percentage: bool
+
+
+@dataclass(frozen=True)
+class RecipeNode:
+    """A recipe with its ingredient lines (mirrors Recipe)"""
+    id: int
+    name: str
+    recipe_type: Optional[str]
+    loaf_weight: Optional[float]
+    base_batch_weight: Optional[float]
+    is_active: bool
+    ingredients: Tuple[RecipeLine, ...]
+    mix_minutes: Optional[int] = None
+    bulk_minutes: Optional[int] = None
+    bake_minutes: Optional[int] = None
+
+
+class RecipeGraph:
+    """
+    Immutable lookup tables over all recipes, keyed by id and by (name, type).
+    capacities holds mixer limits in grams by recipe id; the None key is the default limit.
+    """
+
+    def __init__(self, recipes: Tuple[RecipeNode, ...], version: int, capacities: Dict[Optional[int], float] = None):
+        self.version = version
+        self.recipes = recipes
+        self.capacities: Dict[Optional[int], float] = dict(capacities or {})
+        self._by_id: Dict[int, RecipeNode] = {r.id: r for r in recipes}
+        self._by_name: Dict[Tuple[str, Optional[str]], RecipeNode] = {}
+        for recipe in recipes:
+            self._by_name.setdefault((recipe.name, recipe.recipe_type), recipe)
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of every recipe, stable across processes and restarts (unlike version)"""
+        if self._fingerprint is None:
+            content = repr((self.recipes, sorted(self.capacities.items(), key=lambda c: (c[0] is not None, c[0] or 0))))
+            self._fingerprint = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    def get(self, recipe_id) -> Optional[RecipeNode]:
+        """Equivalent of Recipe.query.get(recipe_id)"""
+        try:
+            return self._by_id.get(int(recipe_id))
+        except (TypeError, ValueError):
+            return None
+
+    def find(self, name: str, recipe_type: str) -> Optional[RecipeNode]:
+        """Equivalent of Recipe.query.filter_by(name=name, recipe_type=recipe_type).first()"""
+        return self._by_name.get((name, recipe_type))
+
+    def to_dict(self) -> Dict:
+        """Plain JSON-ready form, so batch jobs can run the calculations without a database"""
+        return {
+            'version': self.version,
+            'recipes': [asdict(recipe) for recipe in self.recipes],
+            'capacities': [[recipe_id, grams] for recipe_id, grams in self.capacities.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RecipeGraph':
+        """Rebuild a graph from to_dict() output"""
+        ingredients: Dict[int, IngredientNode] = {}
+        recipes = []
+        for recipe in data['recipes']:
+            lines = []
+            for line in recipe['ingredients']:
+                ingredient = line['ingredient']
+                node = ingredients.setdefault(ingredient['id'], IngredientNode(**ingredient))
+                lines.append(RecipeLine(**dict(line, ingredient=node)))
+            recipes.append(RecipeNode(**dict(recipe, ingredients=tuple(lines))))
+
+        capacities = {recipe_id: grams for recipe_id, grams in data.get('capacities', [])}
+        return cls(tuple(recipes), data.get('version', 0), capacities)
@@ -0,0 +1,133 @@
+"""
+Recipe Graph Store
+Loads the recipe graph from the database and keeps a per-process snapshot of it,
+checked against a version row that recipe writes bump
+"""
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional
+from flask import g
+from models import db, Recipe, RecipeIngredient, Ingredient, MixerCapacity, RecipeGraphVersion
+from recipe_graph import IngredientNode, RecipeLine, RecipeNode, RecipeGraph
+
+
+def load_recipe_graph(version: int = 0) -> RecipeGraph:
+    """
+    Build a RecipeGraph from the database with a single joined query over
+    recipes, recipe_ingredients and ingredients (plus one for mixer capacities)
+    """
+    rows = db.session.query(
+        Recipe.id, Recipe.name, Recipe.recipe_type, Recipe.loaf_weight,
+        Recipe.base_batch_weight, Recipe.is_active,
+        Recipe.mix_minutes, Recipe.bulk_minutes, Recipe.bake_minutes,
+        RecipeIngredient.percentage, RecipeIngredient.amount_grams, RecipeIngredient.is_percentage,
+        Ingredient.id, Ingredient.name, Ingredient.category
+    ).outerjoin(
+        RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id
+    ).outerjoin(
+        Ingredient, Ingredient.id == RecipeIngredient.ingredient_id
+    ).order_by(Recipe.id, RecipeIngredient.id).all()
+
+    # Ingredients are shared between recipes, so build each node only once
+    ingredient_nodes: Dict[int, IngredientNode] = {}
+    recipe_rows: Dict[int, tuple] = {}
+    recipe_lines: Dict[int, list] = {}
+
+    for (recipe_id, name, recipe_type, loaf_weight, base_batch_weight, is_active,
+         mix_minutes, bulk_minutes, bake_minutes,
+         percentage, amount_grams, is_percentage, ingredient_id, ingredient_name, category) in rows:
+        if recipe_id not in recipe_rows:
+            recipe_rows[recipe_id] = (name, recipe_type, loaf_weight, base_batch_weight, is_active,
+                                      mix_minutes, bulk_minutes, bake_minutes)
+            recipe_lines[recipe_id] = []
+
+        if ingredient_id is None:
+            continue
+
+        ingredient = ingredient_nodes.get(ingredient_id)
+        if ingredient is None:
+            ingredient = IngredientNode(id=ingredient_id, name=ingredient_name, category=category)
+            ingredient_nodes[ingredient_id] = ingredient
+
+        recipe_lines[recipe_id].append(RecipeLine(
+            ingredient=ingredient,
+            percentage=percentage,
+            amount_grams=amount_grams,
+            is_percentage=is_percentage
+        ))
+
+    recipes = tuple(
+        RecipeNode(
+            id=recipe_id,
+            name=name,
+            recipe_type=recipe_type,
+            loaf_weight=loaf_weight,
+            base_batch_weight=base_batch_weight,
+            is_active=is_active,
+            ingredients=tuple(recipe_lines[recipe_id]),
+            mix_minutes=mix_minutes,
+            bulk_minutes=bulk_minutes,
+            bake_minutes=bake_minutes
+        )
+        for recipe_id, (name, recipe_type, loaf_weight, base_batch_weight, is_active,
+                        mix_minutes, bulk_minutes, bake_minutes) in recipe_rows.items()
+    )
+
+    # Mixer limits; if several rows cover the same recipe, the smallest wins
+    capacities: Dict[Optional[int], float] = {}
+    for recipe_id, max_batch_weight in db.session.query(MixerCapacity.recipe_id, MixerCapacity.max_batch_weight).all():
+        if max_batch_weight and max_batch_weight > 0:
+            capacities[recipe_id] = min(max_batch_weight, capacities.get(recipe_id, max_batch_weight))
+
+    return RecipeGraph(recipes, version, capacities)
+
+
+# Per-process snapshot shared by every request handled in this worker.
+# Recipe writes bump the version row in the database (see invalidate_recipe_graph), so every
+# worker notices and rebuilds its snapshot, not just the one that handled the write.
+_graph: Optional[RecipeGraph] = None
+_graph_lock = Lock()
+
+# Id of the single recipe_graph_version row
+GRAPH_VERSION_ID = 1
+
+
+def recipe_graph_version() -> int:
+    """
+    Current recipe graph version, shared by every process (changes whenever recipes are edited).
+    Read once per app context, i.e. once per request or background pass.
+    """
+    if 'recipe_graph_version' not in g:
+        g.recipe_graph_version = db.session.query(
+            RecipeGraphVersion.version
+        ).filter_by(id=GRAPH_VERSION_ID).scalar() or 0
+    return g.recipe_graph_version
+
+
+def get_recipe_graph() -> RecipeGraph:
+    """Return the current recipe graph snapshot, rebuilding it if recipes changed since it was loaded"""
+    global _graph
+
+    version = recipe_graph_version()
+    graph = _graph
+    if graph is not None and graph.version == version:
+        return graph
+
+    with _graph_lock:
+        if _graph is None or _graph.version != version:
+            _graph = load_recipe_graph(version)
+        return _graph
+
+
+def invalidate_recipe_graph():
+    """
+    Mark every process's snapshot stale after a recipe, ingredient or mixer capacity write.
+    Bumps the version in the current transaction; caller commits together with the write.
+    """
+    updated = RecipeGraphVersion.query.filter_by(id=GRAPH_VERSION_ID).update({
+        'version': RecipeGraphVersion.version + 1,
+        'updated_at': datetime.utcnow()
+    }, synchronize_session=False)
+    if not updated:
+        db.session.add(RecipeGraphVersion(id=GRAPH_VERSION_ID, version=1))
+    g.pop('recipe_graph_version', None)
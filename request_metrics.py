@@ -0,0 +1,183 @@
+"""
+Request Metrics
+Opt-in (SQL_METRICS=1) per-endpoint SQL query counts and timings, served at /api/_metrics
+and sent with every response as a Server-Timing header
+"""
+import threading
+import time
+from typing import Dict, List
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+
+SLOWEST_STATEMENTS = 5     # kept per endpoint
+STATEMENT_PREVIEW = 500    # characters of SQL kept for a slow statement
+
+# Not worth recording
+IGNORED_ENDPOINTS = ('static', 'get_request_metrics')
+
+
+class RequestMetrics:
+    """Per-endpoint totals since startup (or the last reset), shared by all request threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.since = time.time()
+            self.endpoints: Dict[str, Dict] = {}
+
+    def record(self, endpoint: str, current: Dict, total_ms: float):
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_ms': 0.0,
+                'json_ms': 0.0,
+                'total_ms': 0.0,
+                'max_total_ms': 0.0,
+                'slowest_statements': [],
+                'repeated_statements': {}
+            })
+            stats['requests'] += 1
+            stats['queries'] += current['queries']
+            stats['max_queries'] = max(stats['max_queries'], current['queries'])
+            stats['db_ms'] += current['db_ms']
+            stats['json_ms'] += current['json_ms']
+            stats['total_ms'] += total_ms
+            stats['max_total_ms'] = max(stats['max_total_ms'], total_ms)
+            stats['slowest_statements'] = _slowest(stats['slowest_statements'] + current['statements'])
+
+            # The same statement many times in one request is usually an N+1 lazy load
+            repeated = stats['repeated_statements']
+            for statement, count in current['executions'].items():
+                if count > 1 and count > repeated.get(statement, 0):
+                    repeated[statement] = count
+            if len(repeated) > SLOWEST_STATEMENTS:
+                stats['repeated_statements'] = dict(sorted(repeated.items(), key=lambda r: -r[1])[:SLOWEST_STATEMENTS])
+
+    def snapshot(self) -> Dict:
+        """Endpoints by total DB time, with per-request averages"""
+        with self.lock:
+            endpoints = []
+            for endpoint, stats in self.endpoints.items():
+                requests = stats['requests']
+                endpoints.append({
+                    'endpoint': endpoint,
+                    'requests': requests,
+                    'queries': stats['queries'],
+                    'queries_per_request': round(stats['queries'] / requests, 1),
+                    'max_queries': stats['max_queries'],
+                    'db_ms': round(stats['db_ms'], 2),
+                    'db_ms_per_request': round(stats['db_ms'] / requests, 2),
+                    'json_ms_per_request': round(stats['json_ms'] / requests, 2),
+                    'total_ms_per_request': round(stats['total_ms'] / requests, 2),
+                    'max_total_ms': round(stats['max_total_ms'], 2),
+                    'slowest_statements': [dict(s) for s in stats['slowest_statements']],
+                    'repeated_statements': [
+                        {'statement': statement, 'max_per_request': count}
+                        for statement, count in sorted(stats['repeated_statements'].items(), key=lambda r: -r[1])
+                    ]
+                })
+            since = self.since
+
+        endpoints.sort(key=lambda e: -e['db_ms'])
+        return {
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(since)),
+            'endpoints': endpoints
+        }
+
+
+request_metrics = RequestMetrics()
+
+
+def _slowest(statements: List[Dict]) -> List[Dict]:
+    return sorted(statements, key=lambda s: -s['ms'])[:SLOWEST_STATEMENTS]
+
+
+def _current() -> Dict:
+    """Counters for the request being handled, or None outside a request / before it started"""
+    if not has_request_context():
+        return None
+    return g.get('sql_metrics')
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that adds the time spent serializing to the request's metrics"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            current = _current()
+            if current is not None:
+                current['json_ms'] += (time.perf_counter() - started) * 1000
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own execution context, so a statement that raises
+    # (and never reaches after_cursor_execute) leaves nothing behind on the connection
+    if context is not None and _current() is not None:
+        context.sql_metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current()
+    started = getattr(context, 'sql_metrics_started', None)
+    if current is None or started is None:
+        return
+
+    elapsed = (time.perf_counter() - started) * 1000
+    statement = ' '.join(statement.split())[:STATEMENT_PREVIEW]
+    current['queries'] += 1
+    current['db_ms'] += elapsed
+    current['executions'][statement] = current['executions'].get(statement, 0) + 1
+    current['statements'] = _slowest(current['statements'] + [{'statement': statement, 'ms': round(elapsed, 2)}])
+
+
+def _start_request():
+    g.sql_metrics = {
+        'started': time.perf_counter(),
+        'queries': 0,
+        'db_ms': 0.0,
+        'json_ms': 0.0,
+        'statements': [],
+        'executions': {}
+    }
+
+
+def _finish_request(response):
+    current = _current()
+    if current is None:
+        return response
+
+    total_ms = (time.perf_counter() - current['started']) * 1000
+    response.headers.add('Server-Timing', ', '.join([
+        f'db;dur={current["db_ms"]:.2f};desc="{current["queries"]} queries"',
+        f'json;dur={current["json_ms"]:.2f}',
+        f'total;dur={total_ms:.2f}'
+    ]))
+
+    endpoint = request.endpoint
+    if endpoint and endpoint not in IGNORED_ENDPOINTS:
+        request_metrics.record(endpoint, current, total_ms)
+    return response
+
+
+def init_request_metrics(app, db):
+    """Hook the metrics into the app and its engine when SQL_METRICS is enabled"""
+    if not app.config.get('SQL_METRICS'):
+        return
+
+    app.json = TimedJSONProvider(app)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
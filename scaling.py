@@ -0,0 +1,129 @@
+"""
+Baker's Percentage Scaling Engine
+Precomputed per-recipe coefficients and a recipes x ingredients matrix (NumPy)
+"""
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from recipe_graph import RecipeGraph, RecipeLine, RecipeNode, IngredientNode
+
+
+def line_coefficients(recipe: RecipeNode) -> np.ndarray:
+    """
+    Grams of each ingredient line per gram of finished dough, in recipe order.
+
+    Percentage lines are baker's percentages: flour_weight = total_weight / (sum_of_percentages / 100),
+    so each line is percentage / sum_of_percentages of the total weight.
+    Fixed lines scale with the recipe's base batch weight.
+    """
+    total_percentage = sum((ri.percentage or 0) for ri in recipe.ingredients if ri.is_percentage)
+    base_batch_weight = recipe.base_batch_weight or 0
+
+    coefficients = []
+    for ri in recipe.ingredients:
+        if ri.is_percentage:
+            coefficients.append((ri.percentage or 0) / total_percentage if total_percentage > 0 else 0.0)
+        else:
+            coefficients.append((ri.amount_grams or 0) / base_batch_weight if base_batch_weight > 0 else 0.0)
+
+    return np.array(coefficients, dtype=float)
+
+
+class ScalingEngine:
+    """
+    Scale recipes by weight or by loaf count.
+
+    coefficients[recipe_id]  - per-line vector (grams per gram of dough), aligned with recipe.ingredients
+    dough_matrix             - recipes x ingredients, grams of ingredient per gram of dough
+    loaf_matrix              - recipes x ingredients, grams of ingredient per loaf
+    """
+
+    def __init__(self, graph: RecipeGraph):
+        self.graph = graph
+        self.version = graph.version
+
+        self.recipe_ids: List[int] = [r.id for r in graph.recipes]
+        self.recipe_index: Dict[int, int] = {rid: i for i, rid in enumerate(self.recipe_ids)}
+
+        self.ingredients: List[IngredientNode] = []
+        self.ingredient_index: Dict[int, int] = {}
+        for recipe in graph.recipes:
+            for ri in recipe.ingredients:
+                if ri.ingredient.id not in self.ingredient_index:
+                    self.ingredient_index[ri.ingredient.id] = len(self.ingredients)
+                    self.ingredients.append(ri.ingredient)
+
+        self.coefficients: Dict[int, np.ndarray] = {}
+        self.dough_matrix = np.zeros((len(self.recipe_ids), len(self.ingredients)))
+        loaf_weights = np.zeros(len(self.recipe_ids))
+
+        for recipe in graph.recipes:
+            row = self.recipe_index[recipe.id]
+            coefficients = line_coefficients(recipe)
+            self.coefficients[recipe.id] = coefficients
+            loaf_weights[row] = recipe.loaf_weight or 0
+            for ri, coefficient in zip(recipe.ingredients, coefficients):
+                self.dough_matrix[row, self.ingredient_index[ri.ingredient.id]] += coefficient
+
+        self.loaf_weights = loaf_weights
+        self.loaf_matrix = self.dough_matrix * loaf_weights[:, None]
+
+    def scale(self, recipe: RecipeNode, total_weight: float) -> List[Tuple[RecipeLine, float]]:
+        """Scale one recipe to a total dough weight; returns (line, grams) in recipe order"""
+        amounts = (self.coefficients[recipe.id] * total_weight).tolist()
+        return list(zip(recipe.ingredients, amounts))
+
+    def quantity_vector(self, quantities: Iterable[Tuple[int, float]]) -> np.ndarray:
+        """Build a dense per-recipe vector from (recipe_id, value) pairs (unknown ids are ignored)"""
+        vector = np.zeros(len(self.recipe_ids))
+        for recipe_id, value in quantities:
+            row = self.recipe_index.get(recipe_id)
+            if row is not None:
+                vector[row] += value
+        return vector
+
+    def totals_for_loaves(self, quantities: Iterable[Tuple[int, float]]) -> Dict[int, float]:
+        """Ingredient totals (ingredient_id -> grams) for loaf counts, as one matrix-vector product"""
+        return self._to_dict(self.quantity_vector(quantities) @ self.loaf_matrix)
+
+    def totals_for_weights(self, weights: Iterable[Tuple[int, float]]) -> Dict[int, float]:
+        """Ingredient totals (ingredient_id -> grams) for dough weights, as one matrix-vector product"""
+        return self._to_dict(self.quantity_vector(weights) @ self.dough_matrix)
+
+    def rollup(self, days: Dict) -> Dict:
+        """
+        Ingredient totals for many days at once.
+        days: {day: [(recipe_id, loaves), ...]}
+        Returns {day: {ingredient_id: grams}} from a single days x recipes x ingredients product.
+        """
+        keys = list(days.keys())
+        if not keys:
+            return {}
+
+        quantities = np.vstack([self.quantity_vector(days[key]) for key in keys])
+        totals = quantities @ self.loaf_matrix
+        return {key: self._to_dict(totals[i]) for i, key in enumerate(keys)}
+
+    def _to_dict(self, vector: np.ndarray) -> Dict[int, float]:
+        return {
+            self.ingredients[i].id: float(vector[i])
+            for i in np.flatnonzero(vector)
+        }
+
+
+_engine: Optional[ScalingEngine] = None
+_engine_lock = Lock()
+
+
+def get_scaling_engine(graph: RecipeGraph) -> ScalingEngine:
+    """Return the scaling engine for a recipe graph, building it once per graph"""
+    global _engine
+
+    engine = _engine
+    if engine is not None and engine.graph is graph:
+        return engine
+
+    with _engine_lock:
+        if _engine is None or _engine.graph is not graph:
+            _engine = ScalingEngine(graph)
+        return _engine
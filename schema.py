@@ -0,0 +1,84 @@
+"""
+Schema Upgrades
+Tables, columns and unique indexes that need no backfill are created here at startup when an
+older database lacks them (the migrations/ scripts do the same for one change each, plus any backfill)
+"""
+from sqlalchemy import inspect, text
+from models import db
+
+
+# Tables that start out empty
+ADDED_TABLES = ['recipe_graph_version']
+
+# (table, column, SQL type) for every column added after the table first shipped (nullable or with a default)
+ADDED_COLUMNS = [
+    ('recipes', 'mix_minutes', 'INTEGER'),
+    ('recipes', 'bulk_minutes', 'INTEGER'),
+    ('recipes', 'bake_minutes', 'INTEGER'),
+    ('mep_sheets', 'recipe_fingerprint', 'VARCHAR(64)'),
+    ('mep_sheets', 'stale_version', 'INTEGER NOT NULL DEFAULT 0'),
+]
+
+# (table, index, migration) for unique indexes upserts rely on; the migration named here merges duplicates first
+ADDED_INDEXES = [
+    ('production_runs', 'uq_production_runs_date', 'migrations/add_production_run_unique_date.py'),
+]
+
+
+def missing_columns():
+    """ADDED_COLUMNS entries whose table exists without the column"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    existing = {}
+    missing = []
+    for table, column, column_type in ADDED_COLUMNS:
+        if table not in tables:
+            continue
+        if table not in existing:
+            existing[table] = {c['name'] for c in inspector.get_columns(table)}
+        if column not in existing[table]:
+            missing.append((table, column, column_type))
+    return missing
+
+
+def missing_indexes():
+    """ADDED_INDEXES entries whose table exists without the index"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    return [
+        (table, name, migration) for table, name, migration in ADDED_INDEXES
+        if table in tables and name not in {i['name'] for i in inspector.get_indexes(table)}
+    ]
+
+
+def upgrade_schema(app):
+    """Add missing tables, columns and indexes so models that declare them keep working on older databases"""
+    with app.app_context():
+        try:
+            for table in ADDED_TABLES:
+                db.metadata.tables[table].create(bind=db.engine, checkfirst=True)
+            missing = missing_columns()
+            missing_unique = missing_indexes()
+        except Exception as e:
+            app.logger.error(f'Schema check failed: {e}')
+            return
+
+        for table, column, column_type in missing:
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}'))
+                app.logger.info(f'Added {table}.{column}')
+            except Exception as e:
+                # Another worker added it first
+                if 'duplicate column' not in str(e).lower() and 'already exists' not in str(e).lower():
+                    raise
+
+        for table, name, migration in missing_unique:
+            index = next(i for i in db.metadata.tables[table].indexes if i.name == name)
+            try:
+                index.create(bind=db.engine)
+                app.logger.info(f'Added {name}')
+            except Exception as e:
+                # Existing rows still have duplicates (or another worker created it first)
+                if 'already exists' not in str(e).lower():
+                    app.logger.error(f'Could not add {name}, run {migration}: {e}')
@@ -0,0 +1,92 @@
+"""
+Standing Orders
+Expands the active WeeklyOrderTemplate rows into Order rows for a run of future weeks,
+written with one set-based upsert
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from models import db, WeeklyOrderTemplate, Customer, Recipe
+from order_upsert import upsert_orders
+
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+MAX_WEEKS = 53
+
+
+def weekday_index(day_of_week: str) -> Optional[int]:
+    """'Monday' / 'mon' -> 0; None when it is not a day name"""
+    prefix = (day_of_week or '').strip()[:3].lower()
+    for index, day in enumerate(DAYS_OF_WEEK):
+        if day[:3].lower() == prefix:
+            return index
+    return None
+
+
+def next_monday(today: Optional[date] = None) -> date:
+    """First Monday after today"""
+    today = today or date.today()
+    return today + timedelta(days=7 - today.weekday())
+
+
+def expand_templates(start_date: date, weeks: int, customer_id: Optional[int] = None) -> List[Dict]:
+    """
+    Order rows for every active template on every matching day from start_date
+    through start_date + weeks * 7 - 1. Templates of inactive customers or recipes are skipped;
+    templates repeating the same customer/recipe/day add up.
+    [{'customer_id', 'recipe_id', 'order_date', 'quantity'}]
+    """
+    query = db.session.query(
+        WeeklyOrderTemplate.customer_id, WeeklyOrderTemplate.recipe_id,
+        WeeklyOrderTemplate.day_of_week, WeeklyOrderTemplate.quantity
+    ).join(
+        Customer, Customer.id == WeeklyOrderTemplate.customer_id
+    ).join(
+        Recipe, Recipe.id == WeeklyOrderTemplate.recipe_id
+    ).filter(
+        WeeklyOrderTemplate.is_active.isnot(False),
+        Customer.is_active.isnot(False),
+        Recipe.is_active.isnot(False),
+        WeeklyOrderTemplate.quantity > 0
+    )
+    if customer_id is not None:
+        query = query.filter(WeeklyOrderTemplate.customer_id == customer_id)
+
+    # (customer, recipe, weekday) -> loaves per week
+    standing = {}
+    for template_customer_id, recipe_id, day_of_week, quantity in query.order_by(WeeklyOrderTemplate.id).all():
+        weekday = weekday_index(day_of_week)
+        if weekday is None:
+            continue
+        key = (template_customer_id, recipe_id, weekday)
+        standing[key] = standing.get(key, 0) + quantity
+
+    orders = []
+    for offset in range(weeks * 7):
+        order_date = start_date + timedelta(days=offset)
+        for (template_customer_id, recipe_id, weekday), quantity in standing.items():
+            if weekday == order_date.weekday():
+                orders.append({
+                    'customer_id': template_customer_id,
+                    'recipe_id': recipe_id,
+                    'order_date': order_date,
+                    'quantity': quantity
+                })
+    return orders
+
+
+def generate_standing_orders(start_date: date, weeks: int, customer_id: Optional[int] = None,
+                             overwrite: bool = False) -> Dict:
+    """
+    Write the expanded templates as orders; caller commits.
+    Orders that already exist keep their quantity unless overwrite is set.
+    Returns {'created', 'updated', 'skipped', 'dates': [date, ...]}
+    """
+    orders = expand_templates(start_date, weeks, customer_id)
+    created, updated = upsert_orders(orders, update_existing=overwrite)
+    return {
+        'created': created,
+        'updated': updated,
+        'skipped': len(orders) - created - updated,
+        'dates': sorted({order['order_date'] for order in orders})
+    }
@@ -0,0 +1,45 @@
+/**
+ * Shared API helpers
+ */
+
+// Orders per /api/orders page
+const ORDERS_PAGE_SIZE = 1000;
+
+// Every order matching the query string, following /api/orders pages until next_after runs out
+async function fetchAllOrders(query) {
+    let orders = [];
+    let after = null;
+    do {
+        const url = `/api/orders?${query}&limit=${ORDERS_PAGE_SIZE}` + (after ? `&after=${encodeURIComponent(after)}` : '');
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error(`Failed to load orders (${response.status})`);
+        }
+        const page = await response.json();
+        orders = orders.concat(page.orders);
+        after = page.next_after;
+    } while (after);
+    return orders;
+}
+
+// Order changes bump a stamp in localStorage, so caches of order data (in any tab) know to refetch
+const ORDERS_CHANGED_KEY = 'ordersChangedAt';
+let ordersChangedAt = '0';  // Fallback when localStorage is unavailable
+
+function notifyOrdersChanged() {
+    ordersChangedAt = String(Date.now());
+    try {
+        localStorage.setItem(ORDERS_CHANGED_KEY, ordersChangedAt);
+    } catch (error) {
+        // Private browsing: only this tab sees the change
+    }
+}
+
+// Stamp of the last order change, part of the key of anything cached from order data
+function ordersVersion() {
+    try {
+        return localStorage.getItem(ORDERS_CHANGED_KEY) || ordersChangedAt;
+    } catch (error) {
+        return ordersChangedAt;
+    }
+}
@@ -2,6 +2,7 @@
 
 let customers = [];
 let currentProduction = null;
+let productionCube = null;  // All customers' orders for the loaded date range
 
 // Initialize page
 document.addEventListener('DOMContentLoaded', function() {
@@ -112,15 +113,9 @@ async function loadCustomerProduction() {
     }
 
     try {
-        const response = await fetch(
-            `/api/customer-production/${customerId}?start_date=${dateRange.start}&end_date=${dateRange.end}`
-        );
-
-        if (!response.ok) {
-            throw new Error('Failed to load production data');
-        }
-
-        currentProduction = await response.json();
+        // One request per date range; switching customers slices the cached cube
+        const cube = await loadProductionCube(dateRange);
+        currentProduction = sliceCustomer(cube, parseInt(customerId));
         displayProduction();
 
     } catch (error) {
@@ -129,6 +124,70 @@ async function loadCustomerProduction() {
     }
 }
 
+async function loadProductionCube(dateRange) {
+    // Orders saved since the cube was loaded (here or in another tab) change the key and refetch it
+    const key = `${dateRange.start}_${dateRange.end}_${ordersVersion()}`;
+    if (productionCube && productionCube.key === key) {
+        return productionCube;
+    }
+
+    const response = await fetch(
+        `/api/production-cube?start_date=${dateRange.start}&end_date=${dateRange.end}&encoding=sparse`
+    );
+
+    if (!response.ok) {
+        throw new Error('Failed to load production data');
+    }
+
+    const cube = await response.json();
+
+    // Expand the non-zero cells into one flat array indexed [customer][recipe][date]
+    const [numCustomers, numRecipes, numDays] = cube.shape;
+    const values = new Int32Array(numCustomers * numRecipes * numDays);
+    cube.cells.quantity.forEach((quantity, i) => {
+        values[(cube.cells.customer[i] * numRecipes + cube.cells.recipe[i]) * numDays + cube.cells.date[i]] = quantity;
+    });
+
+    productionCube = {
+        key: key,
+        cube: cube,
+        values: values,
+        customerIndex: new Map(cube.customers.map((customer, i) => [customer.id, i]))
+    };
+    return productionCube;
+}
+
+function sliceCustomer(productionCube, customerId) {
+    const cube = productionCube.cube;
+    const [, numRecipes, numDays] = cube.shape;
+    const customer = customers.find(c => c.id === customerId);
+    const c = productionCube.customerIndex.get(customerId);
+
+    // Same shape as /api/customer-production?format=columnar: only recipes this customer ordered
+    const recipes = [];
+    const dailyTotals = new Array(numDays).fill(0);
+    if (c !== undefined) {
+        cube.recipes.forEach((recipe, r) => {
+            const offset = (c * numRecipes + r) * numDays;
+            const quantities = Array.from(productionCube.values.subarray(offset, offset + numDays));
+            if (quantities.some(quantity => quantity > 0)) {
+                recipes.push({ recipe_id: recipe.id, recipe_name: recipe.name, quantities: quantities });
+                quantities.forEach((quantity, d) => { dailyTotals[d] += quantity; });
+            }
+        });
+    }
+
+    return {
+        customer_id: customerId,
+        customer_name: customer ? customer.name : '',
+        start_date: cube.start_date,
+        end_date: cube.end_date,
+        dates: cube.dates,
+        recipes: recipes,
+        daily_totals: dailyTotals
+    };
+}
+
 function displayProduction() {
     const container = document.getElementById('production-table-container');
     const tableCard = document.getElementById('production-table-card');
@@ -154,8 +213,9 @@ function displayProduction() {
     html += '<thead><tr>';
     html += '<th class="recipe-header">Bread Type</th>';
 
-    currentProduction.recipes[0].quantities.forEach(dateInfo => {
-        const date = new Date(dateInfo.date);
+    // Columnar payload: dates listed once, one integer per date for each recipe
+    currentProduction.dates.forEach(dateValue => {
+        const date = new Date(dateValue);
         const dayName = date.toLocaleDateString('en-US', { weekday: 'short' });
         const dateStr = date.toLocaleDateString('en-US', { month: 'numeric', day: 'numeric' });
 
@@ -176,13 +236,13 @@ function displayProduction() {
         html += `<td class="recipe-name">${recipe.recipe_name}</td>`;
 
         let rowTotal = 0;
-        recipe.quantities.forEach(qty => {
-            const hasOrder = qty.quantity > 0;
+        recipe.quantities.forEach(quantity => {
+            const hasOrder = quantity > 0;
             const quantityClass = hasOrder ? 'has-order' : 'no-order';
-            const displayValue = hasOrder ? qty.quantity : '-';
+            const displayValue = hasOrder ? quantity : '-';
 
             html += `<td class="quantity ${quantityClass}">${displayValue}</td>`;
-            rowTotal += qty.quantity;
+            rowTotal += quantity;
         });
 
         html += `<td class="quantity"><strong>${rowTotal}</strong></td>`;
@@ -193,18 +253,13 @@ function displayProduction() {
     html += '<tr class="totals-row">';
     html += '<td>Daily Totals</td>';
 
-    // Calculate daily totals
-    const numDays = currentProduction.recipes[0].quantities.length;
+    // Daily totals come with the payload
     let grandTotal = 0;
 
-    for (let i = 0; i < numDays; i++) {
-        let dayTotal = 0;
-        currentProduction.recipes.forEach(recipe => {
-            dayTotal += recipe.quantities[i].quantity;
-        });
+    currentProduction.daily_totals.forEach(dayTotal => {
         html += `<td>${dayTotal > 0 ? dayTotal : '-'}</td>`;
         grandTotal += dayTotal;
-    }
+    });
 
     html += `<td><strong>${grandTotal}</strong></td>`;
     html += '</tr>';
@@ -23,8 +23,7 @@ async function loadDashboardData() {
 
     // Load this week's orders
     try {
-        const ordersResponse = await fetch(`/api/orders?start_date=${startDate}&end_date=${endDate}`);
-        const orders = await ordersResponse.json();
+        const orders = await fetchAllOrders(`start_date=${startDate}&end_date=${endDate}`);
 
         document.getElementById('week-orders').textContent = orders.length;
 
@@ -123,10 +123,12 @@ function displayMixSheet(mixSheet) {
             html += '</div>';
         }
 
-        // Show Italian dough removal note if applicable
-        if (bread.italian_dough_amount) {
+        // Show dough removal note if this bread is carved from another batch
+        if (bread.dough_from && bread.dough_from.length > 0) {
             html += '<div class="alert alert-info" style="margin-top: 1rem;">';
-            html += `<strong>From Italian Batch:</strong> Remove ${bread.italian_dough_amount.toLocaleString()}g of Italian dough<br>`;
+            for (const source of bread.dough_from) {
+                html += `<strong>From ${source.recipe_name} Batch${source.batch_number ? ' ' + source.batch_number : ''}:</strong> Remove ${source.amount.toLocaleString()}g of ${source.ingredient_name}<br>`;
+            }
             html += 'Then mix with the ingredients below:';
             html += '</div>';
         }
@@ -443,13 +445,15 @@ function displayMEPIngredients(mepIngredients) {
                 <p class="bin-info">Total dough weight: ${bread.total_weight.toLocaleString()}g</p>
         `;
 
-        // Show Italian dough removal note if applicable
-        if (bread.italian_dough_amount) {
-            html += `
+        // Show dough removal note if this bread is carved from another batch
+        if (bread.dough_from && bread.dough_from.length > 0) {
+            for (const source of bread.dough_from) {
+                html += `
                 <div class="alert alert-info" style="margin-bottom: 1rem;">
-                    <strong>From Italian Batch:</strong> Remove ${bread.italian_dough_amount.toLocaleString()}g of Italian dough
+                    <strong>From ${source.recipe_name} Batch${source.batch_number ? ' ' + source.batch_number : ''}:</strong> Remove ${source.amount.toLocaleString()}g of ${source.ingredient_name}
                 </div>
             `;
+            }
         }
 
         if (bread.ingredients && bread.ingredients.length > 0) {
@@ -506,6 +510,104 @@ function showTab(tabName) {
     if (tabName === 'mixing-log') {
         initializeMixingLog();
     }
+
+    if (tabName === 'changes') {
+        loadChangesSincePrint();
+    }
+}
+
+async function printAllSheets() {
+    // Record what was printed so later order changes can be shown against it
+    const mepDate = document.getElementById('mep-date').value;
+    try {
+        await fetch(`/api/mep/${mepDate}/print`, {method: 'POST'});
+    } catch (error) {
+        console.error('Error recording print:', error);
+    }
+    window.print();
+}
+
+async function loadChangesSincePrint() {
+    const mepDate = document.getElementById('mep-date').value;
+    const container = document.getElementById('changes-content');
+
+    try {
+        const response = await fetch(`/api/mep/${mepDate}/changes`);
+        if (response.status === 404) {
+            container.innerHTML = '<p class="placeholder-text">These sheets have not been printed yet</p>';
+            return;
+        }
+        if (!response.ok) {
+            container.innerHTML = '<p class="placeholder-text">Error loading changes</p>';
+            return;
+        }
+
+        const changes = await response.json();
+        const printedAt = new Date(changes.printed_at).toLocaleString('en-US');
+        document.getElementById('changes-subtitle').textContent =
+            `Printed ${printedAt}${changes.printed_by ? ' by ' + changes.printed_by : ''}`;
+
+        if (!changes.changed) {
+            container.innerHTML = '<p class="placeholder-text">Nothing changed since the sheets were printed</p>';
+            return;
+        }
+
+        const sections = [
+            ['mix_sheet', 'Mix Sheet'],
+            ['morning_emmy_feed', 'Morning Emmy Feed'],
+            ['starter_sheet', 'Starters'],
+            ['soak_sheet', 'Soakers'],
+            ['mep_ingredients', 'MEP']
+        ];
+
+        let html = '';
+        if (changes.changed_recipes.length > 0) {
+            html += `<p><strong>Orders changed:</strong> ${changes.changed_recipes.join(', ')}</p>`;
+        }
+        if (changes.recipes_edited) {
+            html += '<p><strong>Recipes were edited since the print.</strong></p>';
+        }
+
+        sections.forEach(([key, title]) => {
+            const section = changes[key];
+            if (!section || (section.changes.length === 0 && !Object.keys(section.batch_counts || {}).length)) {
+                return;
+            }
+
+            html += `<h3>${title}</h3><ul>`;
+            Object.entries(section.batch_counts || {}).forEach(([name, counts]) => {
+                html += `<li><strong>${name}</strong>: ${counts[0]} → ${counts[1]} batches</li>`;
+            });
+            section.changes.forEach(change => {
+                if (change.status !== 'changed') {
+                    html += `<li><strong>${change.name}</strong>: ${change.status}</li>`;
+                    return;
+                }
+                const details = [];
+                ['quantity', 'total_weight', 'total_grams'].forEach(field => {
+                    if (change[field]) {
+                        details.push(`${field.replace('_', ' ')} ${change[field][0]} → ${change[field][1]}`);
+                    }
+                });
+                (change.ingredients || []).forEach(ing => {
+                    details.push(`${ing.name} ${ing.delta > 0 ? '+' : ''}${ing.delta}g`);
+                });
+                if (change.dough_from) {
+                    details.push('dough source changed');
+                }
+                if (change.extra_dough_for) {
+                    details.push('extra dough changed');
+                }
+                html += `<li><strong>${change.name}</strong>: ${details.join(', ')}</li>`;
+            });
+            html += '</ul>';
+        });
+
+        container.innerHTML = html;
+    } catch (error) {
+        console.error('Error:', error);
+        container.innerHTML = '<p class="placeholder-text">Failed to load changes</p>';
+    }
 }
 
 function formatDate(dateStr) {
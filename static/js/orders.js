@@ -94,8 +94,7 @@ async function loadOrders() {
     }
 
     try {
-        const response = await fetch(`/api/orders?start_date=${startDate}&end_date=${endDate}`);
-        orders = await response.json();
+        orders = await fetchAllOrders(`start_date=${startDate}&end_date=${endDate}`);
 
         displayOrders();
     } catch (error) {
@@ -168,6 +167,8 @@ async function addOrder() {
         const result = await response.json();
 
         if (result.success) {
+            notifyOrdersChanged();
+
             // Reload orders
             await loadOrders();
 
@@ -198,6 +199,7 @@ async function deleteOrder(orderId) {
         const result = await response.json();
 
         if (result.success) {
+            notifyOrdersChanged();
             await loadOrders();
             showMessage('Order deleted successfully', 'success');
         } else {
@@ -191,8 +191,7 @@ async function loadPreviousWeek() {
     previousWeekEnd.setDate(previousWeekStart.getDate() + 6);
 
     try {
-        const response = await fetch(`/api/orders?customer_id=${customerId}&start_date=${formatDateForAPI(previousWeekStart)}&end_date=${formatDateForAPI(previousWeekEnd)}`);
-        const orders = await response.json();
+        const orders = await fetchAllOrders(`customer_id=${customerId}&start_date=${formatDateForAPI(previousWeekStart)}&end_date=${formatDateForAPI(previousWeekEnd)}`);
 
         // Clear current values
         document.querySelectorAll('.quantity-input').forEach(input => {
@@ -283,6 +282,7 @@ async function saveAllOrders() {
             return;
         }
 
+        notifyOrdersChanged();
         showSuccess(`Successfully saved ${data.created} orders!`);
         document.getElementById('save-status').textContent = `✓ Saved ${data.created} orders`;
 
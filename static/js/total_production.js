@@ -86,7 +86,7 @@ async function loadTotalProduction() {
 
     try {
         const response = await fetch(
-            `/api/total-production?start_date=${dateRange.start}&end_date=${dateRange.end}`
+            `/api/total-production?start_date=${dateRange.start}&end_date=${dateRange.end}&format=columnar`
         );
 
         if (!response.ok) {
@@ -131,8 +131,9 @@ function displayProduction() {
     html += '<thead><tr>';
     html += '<th class="recipe-header">Bread Type</th>';
 
-    currentProduction.recipes[0].quantities.forEach(dateInfo => {
-        const date = new Date(dateInfo.date);
+    // Columnar payload: dates listed once, one integer per date for each recipe
+    currentProduction.dates.forEach(dateValue => {
+        const date = new Date(dateValue);
         const dayName = date.toLocaleDateString('en-US', { weekday: 'short' });
         const dateStr = date.toLocaleDateString('en-US', { month: 'numeric', day: 'numeric' });
 
@@ -153,13 +154,13 @@ function displayProduction() {
         html += `<td class="recipe-name">${recipe.recipe_name}</td>`;
 
         let rowTotal = 0;
-        recipe.quantities.forEach(qty => {
-            const hasOrder = qty.quantity > 0;
+        recipe.quantities.forEach(quantity => {
+            const hasOrder = quantity > 0;
             const quantityClass = hasOrder ? 'has-order' : 'no-order';
-            const displayValue = hasOrder ? qty.quantity : '-';
+            const displayValue = hasOrder ? quantity : '-';
 
             html += `<td class="quantity ${quantityClass}">${displayValue}</td>`;
-            rowTotal += qty.quantity;
+            rowTotal += quantity;
         });
 
         html += `<td class="quantity"><strong>${rowTotal}</strong></td>`;
@@ -170,18 +171,13 @@ function displayProduction() {
     html += '<tr class="totals-row">';
     html += '<td>Daily Totals</td>';
 
-    // Calculate daily totals
-    const numDays = currentProduction.recipes[0].quantities.length;
+    // Daily totals come with the payload
     let grandTotal = 0;
 
-    for (let i = 0; i < numDays; i++) {
-        let dayTotal = 0;
-        currentProduction.recipes.forEach(recipe => {
-            dayTotal += recipe.quantities[i].quantity;
-        });
+    currentProduction.daily_totals.forEach(dayTotal => {
         html += `<td>${dayTotal > 0 ? dayTotal : '-'}</td>`;
         grandTotal += dayTotal;
-    }
+    });
 
     html += `<td><strong>${grandTotal}</strong></td>`;
     html += '</tr>';
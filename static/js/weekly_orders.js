@@ -86,8 +86,7 @@ async function loadWeeklySheet() {
 
     // Load existing orders for this customer and week
     try {
-        const response = await fetch(`/api/orders?start_date=${formatDate(currentWeekStart)}&end_date=${formatDate(weekEnd)}&customer_id=${customerId}`);
-        const orders = await response.json();
+        const orders = await fetchAllOrders(`start_date=${formatDate(currentWeekStart)}&end_date=${formatDate(weekEnd)}&customer_id=${customerId}`);
 
         // Build weeklyData structure
         weeklyData = {};
@@ -250,6 +249,7 @@ async function saveWeeklySheet() {
                 body: JSON.stringify(order)
             });
         }
+        notifyOrdersChanged();
 
         alert(`Weekly orders saved for ${currentCustomer.name}!\n\nTotal orders: ${orders.length}`);
     } catch (error) {
@@ -3,6 +3,7 @@ Test script to create sample orders and test the workflow
 """
 from app import app
 from models import db, Recipe, Customer, Order
+from daily_demand import rebuild_daily_demand
 from datetime import date, timedelta
 
 with app.app_context():
@@ -37,6 +38,7 @@ with app.app_context():
 
     # Clear existing orders for this week
     Order.query.filter(Order.order_date >= monday).delete()
+    rebuild_daily_demand()
     db.session.commit()
 
     # Create sample orders
@@ -0,0 +1,41 @@
+"""
+Shared fixtures: the Flask app on a throwaway SQLite database, with production sync and
+MEP refreshes run in the request instead of background threads
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config reads these at import time, so they are set before the app is imported
+_database_dir = tempfile.mkdtemp(prefix='bakery-tests-')
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(_database_dir, "bakery.db")}'
+os.environ['PRODUCTION_SYNC_BACKGROUND'] = '0'
+os.environ['MEP_BACKGROUND_REFRESH'] = '0'
+os.environ['SQL_METRICS'] = '0'
+
+
+@pytest.fixture
+def app():
+    """The app with freshly created, empty tables"""
+    import recipe_store
+    from app import app as flask_app
+    from mep_cache import mep_sheet_cache
+    from models import db
+
+    with flask_app.app_context():
+        db.create_all()
+        recipe_store._graph = None
+        mep_sheet_cache.clear()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
@@ -0,0 +1,42 @@
+"""BatchSplitter packing limits"""
+from batch_splitter import BatchSplitter, legacy_capacities
+from recipe_graph import RecipeGraph, RecipeNode
+
+
+def make_splitter(capacity):
+    bread = RecipeNode(id=1, name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000,
+                       is_active=True, ingredients=())
+    return bread, BatchSplitter(RecipeGraph((bread,), 1, {None: capacity}))
+
+
+def test_loaves_spread_over_fewest_batches():
+    bread, splitter = make_splitter(10000)
+    batches = splitter.split_dough(bread, 25, [])
+    assert [batch.loaves for batch in batches] == [9, 8, 8]
+    assert all(batch.weight <= 10000 for batch in batches)
+
+
+def test_oversized_carve_out_gets_its_own_batch():
+    bread, splitter = make_splitter(10000)
+    carve_out = ('Multigrain', 'Italian dough', 25000)
+    batches = splitter.split_dough(bread, 15, [carve_out])
+    assert [(batch.loaves, batch.carve_outs) for batch in batches] == [(0, [carve_out]), (5, []), (5, []), (5, [])]
+
+
+def test_loaf_bigger_than_mixer_one_per_batch():
+    bread, splitter = make_splitter(800)
+    batches = splitter.split_dough(bread, 400, [])
+    assert len(batches) == 400
+    assert all(batch.loaves == 1 for batch in batches)
+
+
+def test_legacy_capacities_match_the_old_thresholds():
+    def node(id, name, recipe_type, loaf_weight=0):
+        return RecipeNode(id=id, name=name, recipe_type=recipe_type, loaf_weight=loaf_weight, base_batch_weight=1000,
+                          is_active=True, ingredients=())
+
+    recipes = [node(1, 'Italian', 'bread', 1000), node(2, 'Multigrain', 'bread', 1000), node(3, 'Levain', 'starter'),
+               node(4, 'Itl Levain', 'starter'), node(5, 'Poolish', 'starter')]
+    assert [(recipe.name, grams) for recipe, grams in legacy_capacities(recipes)] == [
+        ('Italian', 110000), ('Levain', 6999), ('Itl Levain', 6999)
+    ]
@@ -0,0 +1,69 @@
+"""Ingredient consumption: stored amounts are raw ingredients, starters, soakers and carved dough included"""
+from datetime import date
+import pytest
+from models import db, Customer, Ingredient, Order, Recipe, RecipeIngredient
+from consumption import consumption_report
+from production_sync import sync_production_runs_for_dates
+
+MONDAY = date(2026, 1, 5)
+
+
+def add_recipe(name, recipe_type, loaf_weight, lines):
+    recipe = Recipe(name=name, recipe_type=recipe_type, loaf_weight=loaf_weight, base_batch_weight=1000)
+    recipe.ingredients = [
+        RecipeIngredient(ingredient=ingredient, percentage=percentage, is_percentage=True, order=i)
+        for i, (ingredient, percentage) in enumerate(lines)
+    ]
+    db.session.add(recipe)
+    return recipe
+
+
+@pytest.fixture
+def breads(app):
+    flour, water, salt, seeds = (Ingredient(name=name, category=category) for name, category in [
+        ('Red Rose Flour', 'flour'), ('Water', 'water'), ('Salt', 'salt'), ('Seeds', 'other')
+    ])
+    levain = Ingredient(name='Levain', category='starter')
+    soaker = Ingredient(name='7 Grain Soaker', category='soaker')
+    italian_dough = Ingredient(name='Italian dough', category='dough')
+
+    add_recipe('Levain', 'starter', 0, [(flour, 100), (water, 100)])
+    add_recipe('7 Grain Soaker', 'soaker', 0, [(seeds, 100), (water, 100)])
+    italian = add_recipe('Italian', 'bread', 1000, [(flour, 100), (water, 68), (salt, 2), (levain, 20)])
+    multigrain = add_recipe('Multigrain', 'bread', 1000, [(italian_dough, 85), (soaker, 15)])
+    customer = Customer(name='Cafe')
+    db.session.add(customer)
+    db.session.flush()
+
+    db.session.add_all([
+        Order(customer_id=customer.id, recipe_id=italian.id, order_date=MONDAY, day_of_week='Monday', quantity=10),
+        Order(customer_id=customer.id, recipe_id=multigrain.id, order_date=MONDAY, day_of_week='Monday', quantity=5),
+    ])
+    db.session.commit()
+    sync_production_runs_for_dates([MONDAY])
+    return italian.id, multigrain.id
+
+
+def totals(**kwargs):
+    report = consumption_report(MONDAY, MONDAY, period='day', **kwargs)
+    return {row['ingredient_name']: row['grams'] for row in report['totals']}
+
+
+def test_starters_soakers_and_carved_dough_are_expanded(breads):
+    used = totals()
+    # 10kg of Italian plus the 4.25kg carved into Multigrain; flour is 100/190 direct and 10/190 via Levain
+    assert used['Red Rose Flour'] == pytest.approx((10000 + 4250) * 110 / 190)
+    assert used['Salt'] == pytest.approx(14250 * 2 / 190)
+    assert used['Seeds'] == pytest.approx(5000 * 0.15 / 2)
+    assert not {'Levain', '7 Grain Soaker', 'Italian dough'} & used.keys()
+
+
+def test_carved_dough_is_counted_under_the_carved_bread(breads):
+    italian, multigrain = breads
+    report = consumption_report(MONDAY, MONDAY, period='day', by_recipe=True, category='flour')
+    # The report rounds to 0.1g
+    flour = {row['recipe_id']: row['grams'] for row in report['rows']}
+    assert flour == {
+        italian: pytest.approx(10000 * 110 / 190, abs=0.1),
+        multigrain: pytest.approx(4250 * 110 / 190, abs=0.1),
+    }
@@ -0,0 +1,105 @@
+"""daily_demand upkeep: ORM order writes, bulk upserts and overlapping bulk upserts"""
+import random
+import threading
+from datetime import date
+import pytest
+from models import db, Customer, DailyDemand, Order, Recipe
+from daily_demand import check_daily_demand, rebuild_daily_demand
+from order_upsert import upsert_orders
+
+MONDAY = date(2026, 1, 5)
+TUESDAY = date(2026, 1, 6)
+
+
+@pytest.fixture
+def ids(app):
+    customers = [Customer(name=f'Customer {i}') for i in range(3)]
+    recipes = [Recipe(name=f'Bread {i}', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000) for i in range(2)]
+    db.session.add_all(customers + recipes)
+    db.session.commit()
+    return [c.id for c in customers], [r.id for r in recipes]
+
+
+def demand():
+    return {(row.date, row.recipe_id): (row.quantity, row.order_count) for row in DailyDemand.query.all()}
+
+
+def rebuilt_demand():
+    """What a full rebuild from the orders writes (rolled back afterwards)"""
+    rebuild_daily_demand()
+    rows = demand()
+    db.session.rollback()
+    return rows
+
+
+def test_orm_writes_keep_demand_in_step(ids):
+    (cafe, market, _), (italian, multigrain) = ids
+    first = Order(customer_id=cafe, recipe_id=italian, order_date=MONDAY, quantity=10, day_of_week='Monday')
+    second = Order(customer_id=market, recipe_id=italian, order_date=MONDAY, quantity=5, day_of_week='Monday')
+    db.session.add_all([first, second])
+    db.session.commit()
+    assert demand() == {(MONDAY, italian): (15, 2)}
+
+    first.quantity = 12
+    second.order_date = TUESDAY
+    db.session.commit()
+    assert demand() == {(MONDAY, italian): (12, 1), (TUESDAY, italian): (5, 1)}
+
+    second.recipe_id = multigrain
+    db.session.delete(first)
+    db.session.commit()
+    assert demand() == {(TUESDAY, multigrain): (5, 1)}
+    assert check_daily_demand() == []
+
+
+def test_upserts_keep_demand_in_step(ids):
+    (cafe, market, _), (italian, multigrain) = ids
+    upsert_orders([
+        {'customer_id': cafe, 'recipe_id': italian, 'order_date': MONDAY, 'quantity': 10},
+        {'customer_id': market, 'recipe_id': italian, 'order_date': MONDAY, 'quantity': 4},
+    ])
+    db.session.commit()
+    assert demand() == {(MONDAY, italian): (14, 2)}
+
+    upsert_orders([
+        {'customer_id': cafe, 'recipe_id': italian, 'order_date': MONDAY, 'quantity': 6},
+        {'customer_id': cafe, 'recipe_id': multigrain, 'order_date': MONDAY, 'quantity': 3},
+    ])
+    upsert_orders([{'customer_id': market, 'recipe_id': italian, 'order_date': MONDAY, 'quantity': 50}],
+                  update_existing=False)
+    db.session.commit()
+    assert demand() == {(MONDAY, italian): (10, 2), (MONDAY, multigrain): (3, 1)}
+    assert demand() == rebuilt_demand()
+
+
+def test_overlapping_upserts_match_a_rebuild(app, ids):
+    customers, recipes = ids
+    keys = [(c, r, d) for c in customers for r in recipes for d in (MONDAY, TUESDAY)]
+    errors = []
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        with app.app_context():
+            try:
+                for _ in range(15):
+                    batch = rnd.sample(keys, 5)
+                    upsert_orders([
+                        {'customer_id': c, 'recipe_id': r, 'order_date': d, 'quantity': rnd.randint(1, 20)}
+                        for c, r, d in batch
+                    ], update_existing=rnd.random() < 0.7)
+                    db.session.commit()
+            except Exception as e:
+                errors.append(e)
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert check_daily_demand() == []
+    assert demand() == rebuilt_demand()
@@ -0,0 +1,74 @@
+"""Requirement resolution from bread orders"""
+from datetime import date
+import pytest
+from mep_core import MEPSheetCalculator
+from recipe_graph import IngredientNode, RecipeGraph, RecipeLine, RecipeNode
+
+FLOUR = IngredientNode(1, 'Red Rose Flour', 'flour')
+WATER = IngredientNode(2, 'Water', 'water')
+LEVAIN = IngredientNode(3, 'Levain', 'starter')
+EMMY = IngredientNode(4, 'Emmy', 'starter')
+ITALIAN_DOUGH = IngredientNode(5, 'Italian dough', 'dough')
+SEEDS = IngredientNode(6, 'Seeds', 'other')
+
+
+def recipe(recipe_id, name, recipe_type, loaf_weight, lines):
+    return RecipeNode(id=recipe_id, name=name, recipe_type=recipe_type, loaf_weight=loaf_weight,
+                      base_batch_weight=loaf_weight, is_active=True,
+                      ingredients=tuple(RecipeLine(ingredient, percentage, None, True) for ingredient, percentage in lines))
+
+
+GRAPH = RecipeGraph((
+    recipe(1, 'Levain', 'starter', 0, [(FLOUR, 100), (WATER, 100)]),
+    recipe(2, 'Country', 'bread', 1000, [(FLOUR, 100), (WATER, 70), (LEVAIN, 30)]),
+    recipe(3, 'Unweighed', 'bread', None, [(FLOUR, 100), (WATER, 70), (LEVAIN, 30)]),
+), 1)
+
+
+def test_starter_totals_follow_bread_weight():
+    calculator = MEPSheetCalculator(GRAPH, [{'recipe_id': 2, 'quantity': 2}])
+    assert calculator.requirements.totals[1] == pytest.approx(2000 * 30 / 200)
+
+
+def test_bread_without_loaf_weight_does_not_fail_the_sheets():
+    calculator = MEPSheetCalculator(GRAPH, [{'recipe_id': 2, 'quantity': 2}, {'recipe_id': 3, 'quantity': 5}])
+    sheets = calculator.calculate_all_sheets()
+
+    breads = {entry['name']: entry for entry in sheets['mix_sheet']['breads']}
+    assert breads['Unweighed']['quantity'] == 5
+    assert breads['Unweighed']['total_weight'] == 0
+    # Only the weighed bread needs Levain
+    assert calculator.requirements.totals[1] == pytest.approx(2000 * 30 / 200)
+
+
+# Multigrain is carved from Italian dough; Levain is built from Emmy, which is fed with yesterday's Levain
+CARVED = RecipeGraph((
+    recipe(1, 'Emmy', 'starter', 0, [(FLOUR, 100), (WATER, 100), (LEVAIN, 25)]),
+    recipe(2, 'Levain', 'starter', 0, [(FLOUR, 100), (WATER, 100), (EMMY, 20)]),
+    recipe(3, 'Italian', 'bread', 1000, [(FLOUR, 100), (WATER, 68), (LEVAIN, 20)]),
+    recipe(4, 'Multigrain', 'bread', 1000, [(ITALIAN_DOUGH, 85), (SEEDS, 15)]),
+), 1)
+CARVED_ORDERS = [{'recipe_id': 3, 'quantity': 10}, {'recipe_id': 4, 'quantity': 5}]
+# 10kg of Italian plus the 4.25kg of Italian dough carved into Multigrain
+CARVED_LEVAIN = (10000 + 4250) * 20 / 188
+
+
+def test_starter_sheet_builds_levain_for_carved_dough():
+    calculator = MEPSheetCalculator(CARVED, CARVED_ORDERS)
+    starters = calculator.calculate_starter_sheet()['starters']
+
+    # Emmy is fed in the morning, not built as a starter
+    assert [starter['starter_name'] for starter in starters] == ['Levain']
+    assert starters[0]['total_grams'] == pytest.approx(CARVED_LEVAIN, abs=0.1)
+    assert starters[0]['recipes_needing'] == [{'recipe': 'Italian', 'amount_grams': pytest.approx(CARVED_LEVAIN, abs=0.1)}]
+
+
+def test_emmy_feed_covers_levain_for_carved_dough():
+    calculator = MEPSheetCalculator(CARVED, CARVED_ORDERS, delivery_date=date(2026, 1, 5), next_day_items=CARVED_ORDERS)
+    feed = calculator.calculate_morning_emmy_feed()['emmy_feed']
+
+    assert feed['culture_name'] == 'Emmy'
+    assert feed['total_grams'] == pytest.approx(CARVED_LEVAIN * 20 / 220, abs=0.1)
+    assert [ingredient['name'] for ingredient in feed['ingredients']] == [
+        'Red Rose Flour', 'Water', "Yesterday's Levain (saved)"
+    ]
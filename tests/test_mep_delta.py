@@ -0,0 +1,108 @@
+"""Changes on the MEP sheets since they were printed"""
+from datetime import date
+import pytest
+from mep_delta import diff_sheets
+from models import db, Customer, Ingredient, Order, Recipe, RecipeIngredient
+from production_sync import sync_production_runs_for_dates
+
+MONDAY = date(2026, 1, 5)
+
+
+def sheets(breads, starters):
+    return {
+        'mix_sheet': {'breads': [{'name': name, 'quantity': quantity, 'total_weight': quantity * 1000}
+                                 for name, quantity in breads]},
+        'starter_sheet': {'starters': [{'starter_name': name, 'total_grams': grams,
+                                        'ingredients': [{'name': 'Flour', 'amount_grams': grams / 2}]}
+                                       for name, grams in starters]},
+    }
+
+
+def test_diff_reports_changed_added_and_removed_entries():
+    old = sheets([('Italian', 10), ('Baguette', 4)], [('Levain', 2000)])
+    new = sheets([('Italian', 12), ('Country', 3)], [('Levain', 2400)])
+    delta = diff_sheets(old, new, include_emmy_feed=False)
+
+    breads = {change['name']: change for change in delta['mix_sheet']['changes']}
+    assert breads['Italian'] == {'name': 'Italian', 'status': 'changed', 'quantity': [10, 12], 'total_weight': [10000, 12000]}
+    assert breads['Baguette']['status'] == 'removed'
+    assert breads['Country']['status'] == 'added'
+    levain, = delta['starter_sheet']['changes']
+    assert levain['total_grams'] == [2000, 2400]
+    assert levain['ingredients'] == [{'name': 'Flour', 'old': 1000, 'new': 1200, 'delta': 200}]
+    assert delta['changed']
+
+
+def test_diff_of_identical_sheets_is_unchanged():
+    printed = sheets([('Italian', 10)], [('Levain', 2000)])
+    delta = diff_sheets(printed, sheets([('Italian', 10)], [('Levain', 2000)]), include_emmy_feed=False)
+    assert not delta['changed']
+    assert delta['mix_sheet'] == {'changes': [], 'batch_counts': {}}
+
+
+def test_diff_counts_batches_and_respects_scope():
+    old = sheets([('Italian', 10)], [('Levain', 6000)])
+    new = sheets([('Italian', 10)], [('Levain - BATCH 1', 4000), ('Levain - BATCH 2', 4000)])
+    assert diff_sheets(old, new, include_emmy_feed=False)['starter_sheet']['batch_counts'] == {'Levain': [1, 2]}
+    # Entries outside the scope are not compared
+    assert not diff_sheets(old, new, scope_names={'Italian'}, include_emmy_feed=False)['changed']
+
+
+@pytest.fixture
+def printed(app, client):
+    flour, water = Ingredient(name='Red Rose Flour', category='flour'), Ingredient(name='Water', category='water')
+    levain = Ingredient(name='Levain', category='starter')
+
+    def add_recipe(name, recipe_type, loaf_weight, lines):
+        recipe = Recipe(name=name, recipe_type=recipe_type, loaf_weight=loaf_weight, base_batch_weight=1000)
+        recipe.ingredients = [RecipeIngredient(ingredient=ingredient, percentage=percentage, is_percentage=True, order=i)
+                              for i, (ingredient, percentage) in enumerate(lines)]
+        db.session.add(recipe)
+        return recipe
+
+    add_recipe('Levain', 'starter', 0, [(flour, 100), (water, 100)])
+    italian = add_recipe('Italian', 'bread', 1000, [(flour, 100), (water, 70), (levain, 30)])
+    baguette = add_recipe('Baguette', 'bread', 500, [(flour, 100), (water, 70)])
+    customer = Customer(name='Cafe')
+    db.session.add(customer)
+    db.session.flush()
+    orders = {
+        recipe.name: Order(customer_id=customer.id, recipe_id=recipe.id, order_date=MONDAY, day_of_week='Monday', quantity=10)
+        for recipe in (italian, baguette)
+    }
+    db.session.add_all(orders.values())
+    db.session.commit()
+    sync_production_runs_for_dates([MONDAY])
+
+    assert client.post(f'/api/mep/{MONDAY.isoformat()}/print', json={'printed_by': 'Sam'}).status_code == 201
+    return {name: order.id for name, order in orders.items()}
+
+
+def changes(client):
+    return client.get(f'/api/mep/{MONDAY.isoformat()}/changes').get_json()
+
+
+def test_nothing_changed_since_print(client, printed):
+    result = changes(client)
+    assert result['printed_by'] == 'Sam'
+    assert not result['changed']
+
+
+def test_changed_order_shows_its_bread_and_starter(client, printed):
+    db.session.get(Order, printed['Italian']).quantity = 12
+    db.session.commit()
+    sync_production_runs_for_dates([MONDAY])
+
+    result = changes(client)
+    assert result['changed']
+    assert result['changed_recipes'] == ['Italian']
+    # Baguette is not built from anything Italian needs, so it is not recomputed
+    assert result['recomputed_recipes'] == ['Italian', 'Levain']
+    italian, = result['mix_sheet']['changes']
+    assert (italian['name'], italian['quantity']) == ('Italian', [10, 12])
+    levain, = result['starter_sheet']['changes']
+    assert levain['total_grams'] == [pytest.approx(10000 * 30 / 200), pytest.approx(12000 * 30 / 200)]
+
+
+def test_changes_before_print_is_not_found(client):
+    assert client.get(f'/api/mep/{MONDAY.isoformat()}/changes').status_code == 404
@@ -0,0 +1,95 @@
+"""Materialized MEP sheets: a slow refresh never overwrites sheets from newer production"""
+import json
+import threading
+from datetime import date
+import pytest
+import mep_materializer
+from models import db, Customer, MEPSheet, Order, Recipe
+from mep_materializer import materialize_mep_sheets, mark_mep_sheets_stale
+from production_sync import sync_production_runs_for_dates
+
+MONDAY = date(2026, 1, 5)
+
+
+@pytest.fixture
+def order(app):
+    customer = Customer(name='Cafe')
+    italian = Recipe(name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000)
+    db.session.add_all([customer, italian])
+    db.session.flush()
+    order = Order(customer_id=customer.id, recipe_id=italian.id, order_date=MONDAY, day_of_week='Monday', quantity=10)
+    db.session.add(order)
+    db.session.commit()
+    sync_production_runs_for_dates([MONDAY])
+    return order.id
+
+
+def stored_loaves():
+    row = MEPSheet.query.filter_by(delivery_date=MONDAY).one()
+    breads = json.loads(row.sheets)['mix_sheet']['breads']
+    return row.is_stale, [bread['quantity'] for bread in breads]
+
+
+def change_order(app, order_id, quantity):
+    """An order change synced by another worker (its own session) while a refresh is running"""
+    def run():
+        with app.app_context():
+            db.session.get(Order, order_id).quantity = quantity
+            db.session.commit()
+            sync_production_runs_for_dates([MONDAY])
+            db.session.remove()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+
+def test_sync_materializes_fresh_sheets(order):
+    assert stored_loaves() == (False, [10])
+
+
+def test_slow_refresh_does_not_overwrite_newer_sheets(app, order, monkeypatch):
+    real_load = mep_materializer.load_production_items
+    calls = []
+
+    def load_then_production_changes(dates):
+        runs = real_load(dates)
+        if not calls:
+            calls.append(dates)
+            # Production changes and is re-materialized after this pass read its inputs
+            change_order(app, order, 25)
+        return runs
+
+    mark_mep_sheets_stale([MONDAY])
+    db.session.commit()
+    monkeypatch.setattr(mep_materializer, 'load_production_items', load_then_production_changes)
+    materialize_mep_sheets([MONDAY])
+
+    db.session.expire_all()
+    assert stored_loaves() == (False, [25])
+
+
+def test_refresh_after_a_newer_mark_leaves_the_row_stale(app, order, monkeypatch):
+    real_load = mep_materializer.load_production_items
+
+    def load_then_marked(dates):
+        runs = real_load(dates)
+
+        def mark():
+            with app.app_context():
+                mark_mep_sheets_stale([MONDAY])
+                db.session.commit()
+                db.session.remove()
+
+        thread = threading.Thread(target=mark)
+        thread.start()
+        thread.join()
+        return runs
+
+    mark_mep_sheets_stale([MONDAY])
+    db.session.commit()
+    monkeypatch.setattr(mep_materializer, 'load_production_items', load_then_marked)
+    materialize_mep_sheets([MONDAY])
+
+    db.session.expire_all()
+    assert stored_loaves()[0] is True
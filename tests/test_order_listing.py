@@ -0,0 +1,58 @@
+"""GET /api/orders: the unpaged array, keyset pages and the NDJSON stream"""
+import json
+from datetime import date, timedelta
+import pytest
+import app as bakery
+from models import db, Customer, Order, Recipe
+
+START = date(2026, 1, 5)
+
+
+@pytest.fixture
+def order_ids(app, monkeypatch):
+    monkeypatch.setattr(bakery, 'DEFAULT_ORDERS_PAGE', 4)
+    customer = Customer(name='Cafe')
+    recipe = Recipe(name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000)
+    db.session.add_all([customer, recipe])
+    db.session.flush()
+    orders = [
+        Order(customer_id=customer.id, recipe_id=recipe.id, order_date=START + timedelta(days=i),
+              day_of_week=(START + timedelta(days=i)).strftime('%A'), quantity=i + 1)
+        for i in range(10)
+    ]
+    db.session.add_all(orders)
+    db.session.commit()
+    return [o.id for o in orders]
+
+
+def test_without_paging_returns_every_order_as_an_array(client, order_ids):
+    orders = client.get('/api/orders').get_json()
+    assert [o['id'] for o in orders] == order_ids
+
+
+def test_after_without_limit_returns_a_default_page(client, order_ids):
+    after = f'{START.isoformat()},{order_ids[0]}'
+    page = client.get('/api/orders', query_string={'after': after}).get_json()
+    assert [o['id'] for o in page['orders']] == order_ids[1:5]
+    assert page['next_after'] == f'{(START + timedelta(days=4)).isoformat()},{order_ids[4]}'
+
+
+def test_pages_cover_every_order_once(client, order_ids):
+    seen = []
+    after = None
+    while True:
+        page = client.get('/api/orders', query_string={'limit': 3, **({'after': after} if after else {})}).get_json()
+        seen.extend(o['id'] for o in page['orders'])
+        after = page['next_after']
+        if not after:
+            break
+    assert seen == order_ids
+
+
+def test_ndjson_streams_everything_without_limit(client, order_ids):
+    response = client.get('/api/orders', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()] == order_ids
+
+    limited = client.get('/api/orders?limit=3', headers={'Accept': 'application/x-ndjson'})
+    assert len(limited.get_data(as_text=True).splitlines()) == 3
@@ -0,0 +1,169 @@
+"""Set-based order upsert and the order endpoints that use it"""
+import threading
+from datetime import date
+import pytest
+from models import db, Customer, DailyDemand, Order, Recipe
+from daily_demand import check_daily_demand
+from order_upsert import upsert_orders
+
+MONDAY = date(2026, 1, 5)
+TUESDAY = date(2026, 1, 6)
+
+
+@pytest.fixture
+def ids(app):
+    customer = Customer(name='Cafe')
+    italian = Recipe(name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000)
+    multigrain = Recipe(name='Multigrain', recipe_type='bread', loaf_weight=900, base_batch_weight=900)
+    db.session.add_all([customer, italian, multigrain])
+    db.session.commit()
+    return customer.id, italian.id, multigrain.id
+
+
+def order(customer_id, recipe_id, order_date, quantity):
+    return {'customer_id': customer_id, 'recipe_id': recipe_id, 'order_date': order_date, 'quantity': quantity}
+
+
+def stored_orders():
+    return {(o.customer_id, o.recipe_id, o.order_date): (o.quantity, o.day_of_week) for o in Order.query.all()}
+
+
+def test_creates_new_orders(ids):
+    customer, italian, multigrain = ids
+    assert upsert_orders([order(customer, italian, MONDAY, 10), order(customer, multigrain, TUESDAY, 4)]) == (2, 0)
+    db.session.commit()
+
+    assert stored_orders() == {
+        (customer, italian, MONDAY): (10, 'Monday'),
+        (customer, multigrain, TUESDAY): (4, 'Tuesday'),
+    }
+
+
+def test_duplicates_in_one_call_are_merged_and_the_last_wins(ids):
+    customer, italian, multigrain = ids
+    assert upsert_orders([order(customer, italian, MONDAY, 10), order(customer, italian, MONDAY, 7)]) == (1, 0)
+    db.session.commit()
+
+    assert stored_orders() == {(customer, italian, MONDAY): (7, 'Monday')}
+
+
+def test_existing_orders_get_the_new_quantity(ids):
+    customer, italian, multigrain = ids
+    upsert_orders([order(customer, italian, MONDAY, 10)])
+    db.session.commit()
+
+    created, updated = upsert_orders([order(customer, italian, MONDAY, 12), order(customer, multigrain, MONDAY, 3)])
+    db.session.commit()
+
+    assert (created, updated) == (1, 1)
+    assert stored_orders() == {
+        (customer, italian, MONDAY): (12, 'Monday'),
+        (customer, multigrain, MONDAY): (3, 'Monday'),
+    }
+
+
+def test_existing_orders_kept_without_update_existing(ids):
+    customer, italian, multigrain = ids
+    upsert_orders([order(customer, italian, MONDAY, 10)])
+    db.session.commit()
+
+    created, updated = upsert_orders([order(customer, italian, MONDAY, 12), order(customer, italian, TUESDAY, 5)],
+                                     update_existing=False)
+    db.session.commit()
+
+    assert (created, updated) == (1, 0)
+    assert stored_orders() == {
+        (customer, italian, MONDAY): (10, 'Monday'),
+        (customer, italian, TUESDAY): (5, 'Tuesday'),
+    }
+
+
+def test_bulk_endpoint_reports_counts(client, ids):
+    customer, italian, multigrain = ids
+    payload = {'orders': [
+        {'customer_id': customer, 'recipe_id': italian, 'order_date': '2026-01-05', 'quantity': 10},
+        {'customer_id': customer, 'recipe_id': italian, 'order_date': '2026-01-05', 'quantity': 11},
+    ]}
+    assert client.post('/api/orders/bulk', json=payload).get_json()['created'] == 1
+
+    payload['orders'].append({'customer_id': customer, 'recipe_id': multigrain, 'order_date': '2026-01-05', 'quantity': 2})
+    response = client.post('/api/orders/bulk', json=payload).get_json()
+    assert (response['created'], response['updated'], response['total']) == (1, 1, 2)
+    assert stored_orders()[(customer, italian, MONDAY)] == (11, 'Monday')
+
+
+
+def test_add_quantities_adds_to_existing_orders(ids):
+    customer, italian, multigrain = ids
+    upsert_orders([order(customer, italian, MONDAY, 10)])
+    db.session.commit()
+
+    created, updated = upsert_orders([
+        order(customer, italian, MONDAY, 2), order(customer, italian, MONDAY, 3), order(customer, multigrain, MONDAY, 4)
+    ], add_quantities=True)
+    db.session.commit()
+
+    assert (created, updated) == (1, 1)
+    assert stored_orders()[(customer, italian, MONDAY)] == (15, 'Monday')
+    assert check_daily_demand() == []
+
+
+def test_single_order_post_adds_to_the_existing_order(client, ids):
+    customer, italian, _ = ids
+    payload = {'customer_id': customer, 'recipe_id': italian, 'order_date': '2026-01-05', 'quantity': 10}
+    first = client.post('/api/orders', json=payload).get_json()
+    second = client.post('/api/orders', json={**payload, 'quantity': 5, 'notes': 'Sliced'}).get_json()
+
+    assert first['order_id'] == second['order_id']
+    stored = Order.query.one()
+    assert (stored.quantity, stored.notes) == (15, 'Sliced')
+    assert DailyDemand.query.one().quantity == 15
+
+
+def test_concurrent_single_and_bulk_posts_lose_nothing(app, ids):
+    customer, italian, _ = ids
+    errors = []
+
+    def poster(bulk):
+        client = app.test_client()
+        for _ in range(10):
+            if bulk:
+                response = client.post('/api/orders/bulk', json={'orders': [
+                    {'customer_id': customer, 'recipe_id': italian, 'order_date': '2026-01-06', 'quantity': 7}
+                ]})
+            else:
+                response = client.post('/api/orders', json={
+                    'customer_id': customer, 'recipe_id': italian, 'order_date': '2026-01-05', 'quantity': 1
+                })
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=poster, args=(i == 0,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert stored_orders() == {
+        (customer, italian, MONDAY): (30, 'Monday'),
+        (customer, italian, TUESDAY): (7, 'Tuesday'),
+    }
+    assert check_daily_demand() == []
+
+
+def test_unknown_customer_or_recipe_is_rejected(client, ids):
+    customer, italian, _ = ids
+    response = client.post('/api/orders/bulk', json={'orders': [
+        {'customer_id': customer, 'recipe_id': italian, 'order_date': '2026-01-05', 'quantity': 1},
+        {'customer_id': 999, 'recipe_id': 998, 'order_date': '2026-01-05', 'quantity': 1},
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown customer 999, recipe 998'
+
+    response = client.post('/api/orders', json={
+        'customer_id': customer, 'recipe_id': 998, 'order_date': '2026-01-05', 'quantity': 1
+    })
+    assert response.status_code == 400
+    assert client.post('/api/orders', json={'customer_id': customer}).status_code == 400
+    assert Order.query.count() == 0
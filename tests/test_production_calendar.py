@@ -0,0 +1,76 @@
+"""Production calendars: the columnar format carries the same numbers as the default one"""
+from collections import namedtuple
+from datetime import date, timedelta
+import pytest
+from models import db, Customer, Order, Recipe
+from order_aggregates import production_calendar_columnar
+
+MONDAY = date(2026, 1, 5)
+RANGE = {'start_date': '2026-01-05', 'end_date': '2026-01-08'}
+
+Row = namedtuple('Row', 'recipe_id recipe_name order_date quantity')
+
+
+def test_columnar_sums_rows_into_a_recipe_by_date_matrix():
+    dates = [MONDAY + timedelta(days=i) for i in range(3)]
+    rows = [
+        Row(2, 'Italian', MONDAY, 4), Row(2, 'Italian', MONDAY, 6), Row(1, 'Baguette', MONDAY + timedelta(days=2), 3),
+        Row(1, 'Baguette', MONDAY + timedelta(days=9), 50),  # outside the dates
+    ]
+    assert production_calendar_columnar(rows, dates) == {
+        'days_of_week': ['Monday', 'Tuesday', 'Wednesday'],
+        'recipes': [
+            {'recipe_name': 'Baguette', 'recipe_id': 1, 'quantities': [0, 0, 3]},
+            {'recipe_name': 'Italian', 'recipe_id': 2, 'quantities': [10, 0, 0]},
+        ],
+        'daily_totals': [10, 0, 3]
+    }
+
+
+def test_columnar_without_orders():
+    assert production_calendar_columnar([], [MONDAY]) == {'days_of_week': ['Monday'], 'recipes': [], 'daily_totals': [0]}
+
+
+@pytest.fixture
+def customers(app):
+    cafe, deli = Customer(name='Cafe'), Customer(name='Deli')
+    italian = Recipe(name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000)
+    baguette = Recipe(name='Baguette', recipe_type='bread', loaf_weight=500, base_batch_weight=1000)
+    db.session.add_all([cafe, deli, italian, baguette])
+    db.session.flush()
+    db.session.add_all([
+        Order(customer_id=customer.id, recipe_id=recipe.id, order_date=MONDAY + timedelta(days=offset),
+              day_of_week=(MONDAY + timedelta(days=offset)).strftime('%A'), quantity=quantity)
+        for customer, recipe, offset, quantity in [
+            (cafe, italian, 0, 10), (deli, italian, 0, 4), (cafe, baguette, 1, 6), (deli, baguette, 3, 2),
+            (cafe, italian, 7, 99),  # after the range
+        ]
+    ])
+    db.session.commit()
+    return cafe.id, deli.id
+
+
+def as_columns(calendar):
+    """Default-format recipes -> {name: [quantity per date]}"""
+    return {recipe['recipe_name']: [q['quantity'] for q in recipe['quantities']] for recipe in calendar['recipes']}
+
+
+@pytest.mark.parametrize('path', ['/api/total-production', '/api/customer-production/{cafe}'])
+def test_columnar_matches_the_default_format(client, customers, path):
+    url = path.format(cafe=customers[0])
+    default = client.get(url, query_string=RANGE).get_json()
+    columnar = client.get(url, query_string={**RANGE, 'format': 'columnar'}).get_json()
+
+    assert columnar['format'] == 'columnar'
+    assert columnar['dates'] == default['dates'] == ['2026-01-05', '2026-01-06', '2026-01-07', '2026-01-08']
+    assert columnar['days_of_week'] == [q['day_of_week'] for q in default['recipes'][0]['quantities']]
+    assert {r['recipe_name']: r['quantities'] for r in columnar['recipes']} == as_columns(default)
+    assert columnar['daily_totals'] == [sum(day) for day in zip(*as_columns(default).values())]
+
+
+def test_total_production_columnar_adds_up_customers(client, customers):
+    columnar = client.get('/api/total-production', query_string={**RANGE, 'format': 'columnar'}).get_json()
+    assert {r['recipe_name']: r['quantities'] for r in columnar['recipes']} == {
+        'Baguette': [0, 6, 0, 2], 'Italian': [14, 0, 0, 0]
+    }
+    assert columnar['daily_totals'] == [14, 6, 0, 2]
@@ -0,0 +1,76 @@
+"""GET /api/production/history: keyset pages, recipe filter and summary mode"""
+from datetime import date, timedelta
+import pytest
+from models import db, ProductionItem, ProductionRun, Recipe
+
+START = date(2026, 1, 5)
+
+
+@pytest.fixture
+def runs(app):
+    italian = Recipe(name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000)
+    baguette = Recipe(name='Baguette', recipe_type='bread', loaf_weight=500, base_batch_weight=1000)
+    db.session.add_all([italian, baguette])
+    db.session.flush()
+
+    runs = []
+    for i in range(5):
+        run = ProductionRun(date=START + timedelta(days=i), batch_id=(START + timedelta(days=i)).strftime('%m%d%y'))
+        run.items = [ProductionItem(recipe_id=italian.id, quantity=i + 1, batch_weight=(i + 1) * 1000)]
+        if i % 2 == 0:
+            run.items.append(ProductionItem(recipe_id=baguette.id, quantity=4, batch_weight=2000))
+        runs.append(run)
+    db.session.add_all(runs)
+    db.session.commit()
+    # Newest first
+    return [run.id for run in reversed(runs)]
+
+
+def history(client, **args):
+    response = client.get('/api/production/history', query_string=args)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_without_limit_returns_every_run_newest_first(client, runs):
+    result = history(client)
+    assert [run['id'] for run in result] == runs
+    assert result[0]['items'] == [{'recipe_name': 'Italian', 'quantity': 5, 'batch_weight': 5000},
+                                  {'recipe_name': 'Baguette', 'quantity': 4, 'batch_weight': 2000}]
+
+
+def test_pages_cover_every_run_once(client, runs):
+    seen = []
+    pages = 0
+    after = None
+    while True:
+        page = history(client, limit=2, **({'after': after} if after else {}))
+        seen.extend(run['id'] for run in page['runs'])
+        pages += 1
+        after = page['next_after']
+        if not after:
+            break
+    assert seen == runs
+    assert pages == 3
+
+
+def test_recipe_filter_keeps_matching_runs_and_items(client, runs):
+    result = history(client, recipe_name='Baguette', limit=10)
+    assert [run['id'] for run in result['runs']] == [runs[0], runs[2], runs[4]]
+    assert all([item['recipe_name'] for item in run['items']] == ['Baguette'] for run in result['runs'])
+    assert result['next_after'] is None
+
+
+def test_summary_totals_each_run(client, runs):
+    result = history(client, summary='1', limit=2)
+    assert [{key: run[key] for key in ('id', 'item_count', 'total_quantity', 'total_weight')}
+            for run in result['runs']] == [
+        {'id': runs[0], 'item_count': 2, 'total_quantity': 9, 'total_weight': 7000},
+        {'id': runs[1], 'item_count': 1, 'total_quantity': 4, 'total_weight': 4000},
+    ]
+    assert 'items' not in result['runs'][0]
+
+
+@pytest.mark.parametrize('args', [{'limit': 0}, {'limit': 'all'}, {'after': 'yesterday'}])
+def test_invalid_paging_is_a_bad_request(client, runs, args):
+    assert client.get('/api/production/history', query_string=args).status_code == 400
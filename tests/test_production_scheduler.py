@@ -0,0 +1,22 @@
+"""Mix schedule resource limits"""
+import pytest
+from production_scheduler import MAX_MIXERS, MAX_OVENS, ProductionScheduler
+
+
+@pytest.mark.parametrize('query', [
+    {'mixers': 0}, {'ovens': -1}, {'mixers': MAX_MIXERS + 1}, {'ovens': 10 ** 9}, {'mixers': 'two'},
+])
+def test_schedule_rejects_invalid_resource_counts(client, query):
+    response = client.get('/api/mep/2026-01-05/schedule', query_string=query)
+    assert response.status_code == 400
+
+
+def test_schedule_accepts_the_limits(client):
+    # Valid counts get past validation; there is no production run for the date
+    response = client.get('/api/mep/2026-01-05/schedule', query_string={'mixers': MAX_MIXERS, 'ovens': MAX_OVENS})
+    assert response.status_code == 404
+
+
+def test_scheduler_clamps_resource_counts():
+    scheduler = ProductionScheduler(mixers=10 ** 9, ovens=0)
+    assert (scheduler.mixers, scheduler.ovens) == (MAX_MIXERS, 1)
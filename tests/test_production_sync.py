@@ -0,0 +1,195 @@
+"""Production sync: the date queue, the worker's debounce, and one run per date under concurrent syncs"""
+import threading
+import time
+from datetime import date
+import pytest
+import production_sync
+from models import db, Customer, Order, ProductionItem, ProductionRun, ProductionSyncDate, Recipe
+from production_sync import ProductionSyncWorker, queue_production_sync, sync_production_runs_for_dates, sync_queued_dates
+
+MONDAY = date(2026, 1, 5)
+TUESDAY = date(2026, 1, 6)
+
+
+@pytest.fixture
+def ids(app):
+    customer = Customer(name='Cafe')
+    recipes = [Recipe(name=f'Bread {i}', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000) for i in range(2)]
+    db.session.add_all([customer] + recipes)
+    db.session.commit()
+    return customer.id, [r.id for r in recipes]
+
+
+def add_orders(customer, quantities):
+    """quantities: {(recipe_id, date): loaves}; queues nothing (the tests sync by hand)"""
+    db.session.add_all([
+        Order(customer_id=customer, recipe_id=recipe_id, order_date=order_date, quantity=quantity,
+              day_of_week=order_date.strftime('%A'))
+        for (recipe_id, order_date), quantity in quantities.items()
+    ])
+    db.session.commit()
+    ProductionSyncDate.query.delete()
+    db.session.commit()
+
+
+def production():
+    return sorted(
+        (run.date, item.recipe_id, item.quantity)
+        for run in ProductionRun.query.all() for item in run.items
+    )
+
+
+def test_queue_keeps_latest_change(app):
+    queue_production_sync([MONDAY, TUESDAY])
+    db.session.commit()
+    first = dict(db.session.query(ProductionSyncDate.date, ProductionSyncDate.queued_at).all())
+
+    time.sleep(0.01)
+    queue_production_sync(MONDAY)
+    db.session.commit()
+    queued = dict(db.session.query(ProductionSyncDate.date, ProductionSyncDate.queued_at).all())
+
+    assert queued.keys() == {MONDAY, TUESDAY}
+    assert queued[MONDAY] > first[MONDAY]
+    assert queued[TUESDAY] == first[TUESDAY]
+
+
+def test_sync_queued_dates_syncs_and_dequeues(ids):
+    customer, (italian, multigrain) = ids
+    add_orders(customer, {(italian, MONDAY): 10, (multigrain, MONDAY): 4, (italian, TUESDAY): 6})
+    queue_production_sync([MONDAY, TUESDAY])
+    db.session.commit()
+
+    assert sync_queued_dates() == 2
+    assert ProductionSyncDate.query.count() == 0
+    assert production() == [(MONDAY, italian, 10), (MONDAY, multigrain, 4), (TUESDAY, italian, 6)]
+    assert sync_queued_dates() == 0
+
+
+def test_date_queued_during_sync_stays_queued(ids, monkeypatch):
+    customer, (italian, _) = ids
+    add_orders(customer, {(italian, MONDAY): 10})
+    queue_production_sync(MONDAY)
+    db.session.commit()
+
+    def sync_after_another_change(dates):
+        # An order write commits between reading the queue and the sync
+        time.sleep(0.01)
+        queue_production_sync(MONDAY)
+        sync_production_runs_for_dates(dates)
+
+    monkeypatch.setattr(production_sync, 'sync_production_runs_for_dates', sync_after_another_change)
+    assert sync_queued_dates() == 1
+    assert [row.date for row in ProductionSyncDate.query.all()] == [MONDAY]
+
+
+def test_worker_debounces_up_to_max_delay(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PRODUCTION_SYNC_DELAY', 2.0)
+    monkeypatch.setitem(app.config, 'PRODUCTION_SYNC_MAX_DELAY', 10.0)
+    worker = ProductionSyncWorker(app)
+
+    worker.first_change = worker.last_change = 100.0
+    assert worker._due() == 102.0
+    worker.last_change = 105.0
+    assert worker._due() == 107.0
+    worker.last_change = 109.5
+    assert worker._due() == 110.0
+
+
+def test_worker_syncs_after_changes_stop(app, ids, monkeypatch):
+    customer, (italian, _) = ids
+    add_orders(customer, {(italian, MONDAY): 10})
+    monkeypatch.setitem(app.config, 'PRODUCTION_SYNC_DELAY', 0.2)
+    monkeypatch.setitem(app.config, 'PRODUCTION_SYNC_MAX_DELAY', 5.0)
+    queue_production_sync(MONDAY)
+    db.session.commit()
+
+    worker = ProductionSyncWorker(app)
+    worker.notify()
+    time.sleep(0.05)
+    assert ProductionRun.query.count() == 0
+    db.session.rollback()
+
+    deadline = time.monotonic() + 5
+    while ProductionSyncDate.query.count() and time.monotonic() < deadline:
+        db.session.rollback()
+        time.sleep(0.05)
+    db.session.rollback()
+    assert production() == [(MONDAY, italian, 10)]
+
+
+def test_worker_retries_a_failed_sync(app, ids, monkeypatch):
+    customer, (italian, _) = ids
+    add_orders(customer, {(italian, MONDAY): 10})
+    monkeypatch.setitem(app.config, 'PRODUCTION_SYNC_DELAY', 0.05)
+    monkeypatch.setitem(app.config, 'PRODUCTION_SYNC_RETRY_DELAY', 0.2)
+    queue_production_sync(MONDAY)
+    db.session.commit()
+
+    calls = []
+    real_sync = production_sync.sync_queued_dates
+
+    def fail_once():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RuntimeError('database went away')
+        return real_sync()
+
+    monkeypatch.setattr(production_sync, 'sync_queued_dates', fail_once)
+    worker = ProductionSyncWorker(app)
+    worker.notify()
+
+    deadline = time.monotonic() + 5
+    while (ProductionSyncDate.query.count() or worker.failures) and time.monotonic() < deadline:
+        db.session.rollback()
+        time.sleep(0.05)
+    db.session.rollback()
+
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.2
+    assert worker.failures == 0
+    assert production() == [(MONDAY, italian, 10)]
+
+
+def test_concurrent_syncs_keep_one_run_per_date(app, ids):
+    customer, (italian, multigrain) = ids
+    add_orders(customer, {(italian, MONDAY): 10, (multigrain, MONDAY): 4, (italian, TUESDAY): 6})
+    errors = []
+
+    def syncer():
+        with app.app_context():
+            try:
+                for _ in range(5):
+                    sync_production_runs_for_dates([MONDAY, TUESDAY])
+            except Exception as e:
+                errors.append(e)
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=syncer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(run.date for run in ProductionRun.query.all()) == [MONDAY, TUESDAY]
+    assert production() == [(MONDAY, italian, 10), (MONDAY, multigrain, 4), (TUESDAY, italian, 6)]
+    assert ProductionItem.query.count() == 3
+
+
+def test_saving_a_date_twice_reuses_its_run(client, ids):
+    _, (italian, multigrain) = ids
+    first = client.post('/api/production/save', json={
+        'date': '2026-01-05', 'items': [{'recipe_id': italian, 'quantity': 10}]
+    }).get_json()
+    second = client.post('/api/production/save', json={
+        'date': '2026-01-05', 'items': [{'recipe_id': multigrain, 'quantity': 3}], 'notes': 'Recount'
+    }).get_json()
+
+    assert second['production_run_id'] == first['production_run_id']
+    assert second['batch_id'] == '010526'
+    run = ProductionRun.query.one()
+    assert run.notes == 'Recount'
+    assert production() == [(MONDAY, multigrain, 3)]
@@ -0,0 +1,32 @@
+"""Per-request SQL metrics"""
+import pytest
+from flask import g
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from models import db
+from request_metrics import _after_cursor_execute, _before_cursor_execute, _start_request
+
+
+@pytest.fixture
+def metrics(app):
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    yield
+    event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.remove(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def test_failed_statement_leaves_no_timer_behind(app, metrics):
+    with app.test_request_context('/api/recipes'):
+        _start_request()
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+
+        db.session.execute(text('SELECT 1'))
+        connection = db.session.connection()
+
+        assert g.sql_metrics['queries'] == 1
+        assert g.sql_metrics['statements'][0]['statement'] == 'SELECT 1'
+        assert not connection.info.get('sql_metrics_started')
@@ -0,0 +1,59 @@
+"""Baker's percentage scaling, including breads carved from another bread's dough"""
+import pytest
+from mep_core import MEPSheetCalculator
+from models import db, Recipe
+from recipe_graph import IngredientNode, RecipeGraph, RecipeLine, RecipeNode
+from scaling import line_coefficients
+
+FLOUR = IngredientNode(1, 'Red Rose Flour', 'flour')
+WATER = IngredientNode(2, 'Water', 'water')
+SEEDS = IngredientNode(3, 'Seeds', 'other')
+ITALIAN_DOUGH = IngredientNode(4, 'Italian dough', 'dough')
+
+
+def line(ingredient, percentage):
+    return RecipeLine(ingredient, percentage, None, True)
+
+
+def bread(recipe_id, name, lines):
+    return RecipeNode(id=recipe_id, name=name, recipe_type='bread', loaf_weight=1000, base_batch_weight=1000,
+                      is_active=True, ingredients=tuple(lines))
+
+
+ITALIAN = bread(1, 'Italian', [line(FLOUR, 100), line(WATER, 70)])
+
+
+def test_percentages_normalized_to_dough_weight():
+    assert line_coefficients(ITALIAN).tolist() == pytest.approx([100 / 170, 70 / 170])
+
+
+def test_carved_dough_line_counts_towards_the_total():
+    # Lines add up to 110%: the carved dough is 90/110 of the loaf, not 90/100
+    seeded = bread(2, 'Seeded', [line(ITALIAN_DOUGH, 90), line(SEEDS, 20)])
+    assert line_coefficients(seeded).tolist() == pytest.approx([90 / 110, 20 / 110])
+
+    graph = RecipeGraph((ITALIAN, seeded), 1)
+    sheet = MEPSheetCalculator(graph, [{'recipe_id': 1, 'quantity': 2}, {'recipe_id': 2, 'quantity': 11}])
+    breads = {entry['name']: entry for entry in sheet.calculate_mix_sheet()['breads']}
+
+    assert breads['Seeded']['italian_dough_amount'] == pytest.approx(9000)
+    assert breads['Seeded']['ingredients'] == [{'name': 'Seeds', 'amount_grams': 2000.0, 'category': 'other'}]
+    assert breads['Italian']['total_weight'] == pytest.approx(2000 + 9000)
+
+
+def test_calculate_without_a_body_is_a_bad_request(client):
+    assert client.post('/api/production/calculate').status_code == 400
+    assert client.post('/api/production/calculate', data='not json', content_type='application/json').status_code == 400
+
+
+def test_calculate_recipe_without_loaf_weight(client):
+    starter = Recipe(name='Levain', recipe_type='starter', loaf_weight=None, base_batch_weight=1000)
+    db.session.add(starter)
+    db.session.commit()
+
+    items = client.post('/api/production/calculate', json={'items': [{'recipe_id': starter.id, 'quantity': 3}]}).get_json()
+    assert [(item['recipe_name'], item['total_weight']) for item in items] == [('Levain', 0)]
+    scenarios = client.post('/api/production/calculate', json={
+        'scenarios': [{'name': 'Starters', 'items': [{'recipe_id': starter.id, 'quantity': 3}]}]
+    }).get_json()
+    assert scenarios['combined']['total_weight'] == 0
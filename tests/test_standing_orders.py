@@ -0,0 +1,80 @@
+"""Standing orders: weekly templates expanded into orders"""
+from datetime import date
+import pytest
+from models import db, Customer, Order, Recipe, WeeklyOrderTemplate
+from standing_orders import expand_templates, generate_standing_orders, next_monday
+
+MONDAY = date(2026, 1, 5)
+
+
+@pytest.fixture
+def templates(app):
+    cafe, closed = Customer(name='Cafe'), Customer(name='Closed', is_active=False)
+    italian = Recipe(name='Italian', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000)
+    retired = Recipe(name='Retired', recipe_type='bread', loaf_weight=1000, base_batch_weight=1000, is_active=False)
+    db.session.add_all([cafe, closed, italian, retired])
+    db.session.flush()
+    db.session.add_all([
+        WeeklyOrderTemplate(customer_id=cafe.id, recipe_id=italian.id, day_of_week='Monday', quantity=10),
+        # Repeats of the same customer/recipe/day add up; short day names work
+        WeeklyOrderTemplate(customer_id=cafe.id, recipe_id=italian.id, day_of_week='mon', quantity=2),
+        WeeklyOrderTemplate(customer_id=cafe.id, recipe_id=italian.id, day_of_week='Friday', quantity=5),
+        # None of these become orders
+        WeeklyOrderTemplate(customer_id=cafe.id, recipe_id=italian.id, day_of_week='Tuesday', quantity=3, is_active=False),
+        WeeklyOrderTemplate(customer_id=cafe.id, recipe_id=italian.id, day_of_week='Someday', quantity=3),
+        WeeklyOrderTemplate(customer_id=closed.id, recipe_id=italian.id, day_of_week='Monday', quantity=3),
+        WeeklyOrderTemplate(customer_id=cafe.id, recipe_id=retired.id, day_of_week='Monday', quantity=3),
+    ])
+    db.session.commit()
+    return cafe.id, italian.id
+
+
+def quantities():
+    return {(o.order_date, o.quantity) for o in Order.query.all()}
+
+
+def test_templates_expand_to_matching_days(templates):
+    orders = expand_templates(MONDAY, 2)
+    assert [(o['order_date'], o['quantity']) for o in orders] == [
+        (date(2026, 1, 5), 12), (date(2026, 1, 9), 5), (date(2026, 1, 12), 12), (date(2026, 1, 16), 5)
+    ]
+
+
+def test_generate_skips_existing_orders(templates):
+    cafe, italian = templates
+    db.session.add(Order(customer_id=cafe, recipe_id=italian, order_date=MONDAY, day_of_week='Monday', quantity=7))
+    db.session.commit()
+
+    result = generate_standing_orders(MONDAY, 1)
+    db.session.commit()
+    assert (result['created'], result['updated'], result['skipped']) == (1, 0, 1)
+    assert result['dates'] == [date(2026, 1, 5), date(2026, 1, 9)]
+    # The order placed by hand keeps its quantity
+    assert quantities() == {(MONDAY, 7), (date(2026, 1, 9), 5)}
+
+    # Running it again creates nothing new
+    again = generate_standing_orders(MONDAY, 1)
+    assert (again['created'], again['updated'], again['skipped']) == (0, 0, 2)
+    assert Order.query.count() == 2
+
+
+def test_generate_overwrite_replaces_quantities(templates):
+    cafe, italian = templates
+    db.session.add(Order(customer_id=cafe, recipe_id=italian, order_date=MONDAY, day_of_week='Monday', quantity=7))
+    db.session.commit()
+
+    result = generate_standing_orders(MONDAY, 1, overwrite=True)
+    db.session.commit()
+    assert (result['created'], result['updated'], result['skipped']) == (1, 1, 0)
+    assert quantities() == {(MONDAY, 12), (date(2026, 1, 9), 5)}
+
+
+def test_generate_endpoint(client, templates):
+    response = client.post('/api/orders/generate-from-templates', json={'start_date': '2026-01-05', 'weeks': 2})
+    assert response.get_json() == {'success': True, 'created': 4, 'updated': 0, 'skipped': 0, 'dates': 4}
+    assert client.post('/api/orders/generate-from-templates', json={'weeks': 0}).status_code == 400
+
+
+def test_next_monday():
+    assert next_monday(date(2026, 1, 5)) == date(2026, 1, 12)
+    assert next_monday(date(2026, 1, 10)) == date(2026, 1, 12)
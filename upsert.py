@@ -0,0 +1,26 @@
+"""
+Upserts
+INSERT ... ON CONFLICT for the databases the app runs on (SQLite locally, PostgreSQL in production)
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db
+
+
+# Dialects whose INSERT construct supports on_conflict_do_update / on_conflict_do_nothing
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def check_upsert_support(app):
+    """Refuse to start on a database without ON CONFLICT support, instead of failing on the first order write"""
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise RuntimeError(f'Unsupported database {dialect!r}: order upserts need SQLite or PostgreSQL')
+
+
+def dialect_insert(table, session=None):
+    """INSERT construct with ON CONFLICT support for the session's database (checked at startup)"""
+    return UPSERT_INSERTS[(session or db.session).get_bind().dialect.name](table)